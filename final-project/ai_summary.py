@@ -1,37 +1,78 @@
+import hashlib
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
-def get_ai_task_summary(tasks: List[Dict[str, Any]]) -> str:
+from summary_cache import SummaryCache, cache_key
+
+MODEL = "gpt-4o-mini"
+SYSTEM_PROMPT = "You are a helpful task management assistant for students studying economics and computer science."
+TEMPERATURE = 0.7
+
+# Responses are cached here, keyed by model, prompts and temperature
+CACHE_PATH = os.getenv('TASKS_AI_CACHE', '.ai_summary_cache.db')
+
+# Backlogs larger than one chunk are summarized chunk by chunk (map), then the
+# chunk summaries are combined at most REDUCE_FAN_IN at a time (reduce)
+CHUNK_SIZE = 50
+REDUCE_FAN_IN = 20
+MAX_WORKERS = 8
+MAX_DESCRIPTION_CHARS = 200
+MANIFEST_KEY = 'task_digests'
+
+def get_ai_task_summary(tasks: List[Dict[str, Any]], cache: Optional[SummaryCache] = None, chunk_size: int = CHUNK_SIZE) -> str:
     """
     Generate an AI-powered summary of tasks using OpenAI's API.
-    
+    Identical requests are answered from the cache without calling the API.
+
+    Backlogs of more than `chunk_size` tasks are summarized incrementally:
+    tasks are grouped into chunks by ID, each chunk is summarized separately,
+    and the chunk summaries are combined. Every prompt is cached by content,
+    so a re-run only sends the chunks whose tasks changed.
+
     :param tasks: List of task dictionaries
+    :param cache: Optional response cache; defaults to the cache at CACHE_PATH
+    :param chunk_size: Maximum number of tasks sent in one prompt
     :return: AI-generated summary string
     """
-    api_key = os.getenv('OPENAI_API_KEY')
-    
-    if not api_key:
-        return "❌ Error: OPENAI_API_KEY environment variable not set.\nPlease set your API key with: $env:OPENAI_API_KEY = \"your-key-here\""
-    
+    # Prepare task data for the prompt
+    if not tasks:
+        return "📝 No tasks to summarize."
+
+    own_cache = cache is None
     try:
-        client = OpenAI(api_key=api_key)
-        
-        # Prepare task data for the prompt
-        if not tasks:
-            return "📝 No tasks to summarize."
-        
-        task_details = []
-        for task in tasks:
-            task_info = f"- {task['description']} (Utility: {task['utility_score']}, Cost: {task['cost_hours']}hrs, Status: {task['status']}"
-            if task.get('deadline'):
-                task_info += f", Deadline: {task['deadline']}"
-            task_info += ")"
-            task_details.append(task_info)
-        
-        tasks_text = "\n".join(task_details)
-        
-        prompt = f"""You are an AI assistant helping students prioritize their tasks. 
+        if own_cache:
+            cache = SummaryCache(CACHE_PATH)
+        if len(tasks) > chunk_size:
+            summary, note = _summarize_incrementally(tasks, cache, chunk_size)
+        else:
+            summary, note = _summarize_all_at_once(tasks, cache), None
+        if summary is None:
+            return "❌ Error: OPENAI_API_KEY environment variable not set.\nPlease set your API key with: $env:OPENAI_API_KEY = \"your-key-here\""
+        result = f"🤖 AI Task Summary:\n\n{summary}"
+        if note:
+            result += f"\n\n{note}"
+        return result
+
+    except Exception as e:
+        return f"❌ Error generating AI summary: {str(e)}"
+    finally:
+        if own_cache and cache is not None:
+            cache.close()
+
+def _summarize_all_at_once(tasks: List[Dict[str, Any]], cache: SummaryCache) -> Optional[str]:
+    """
+    Summarize a small backlog with a single prompt.
+
+    :param tasks: List of task dictionaries
+    :param cache: Response cache
+    :return: The summary, or None if no API key is configured
+    """
+    tasks_text = "\n".join(_task_line(task) for task in tasks)
+
+    prompt = f"""You are an AI assistant helping students prioritize their tasks.
 Analyze the following tasks and provide a brief, insightful summary (3-5 sentences) that:
 1. Identifies high-priority tasks based on utility/cost ratio
 2. Highlights any urgent deadlines
@@ -43,18 +84,158 @@ Tasks:
 
 Provide a concise, actionable summary."""
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a helpful task management assistant for students studying economics and computer science."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=300
-        )
-        
-        summary = response.choices[0].message.content
-        return f"🤖 AI Task Summary:\n\n{summary}"
-        
-    except Exception as e:
-        return f"❌ Error generating AI summary: {str(e)}"
+    return cache.get_or_compute(MODEL, SYSTEM_PROMPT, TEMPERATURE, prompt, lambda: _complete(prompt))
+
+def _summarize_incrementally(tasks: List[Dict[str, Any]], cache: SummaryCache, chunk_size: int) -> Tuple[Optional[str], str]:
+    """
+    Map-reduce summary of a large backlog that only re-sends changed chunks.
+
+    :param tasks: List of task dictionaries
+    :param cache: Response cache
+    :param chunk_size: Maximum number of tasks per chunk
+    :return: The summary (None if no API key is configured) and a note on what was re-sent
+    """
+    digests = {str(task['id']): task_digest(task) for task in tasks}
+    previous = json.loads(cache.get_meta(MANIFEST_KEY) or '{}')
+    changed = sum(1 for task_id, digest in digests.items() if previous.get(task_id) != digest)
+    removed = sum(1 for task_id in previous if task_id not in digests)
+
+    chunks = chunk_tasks(tasks, chunk_size)
+    chunk_prompts = [_chunk_prompt(chunk) for chunk in chunks]
+    summaries, sent = _complete_cached(cache, chunk_prompts, max_tokens=150)
+    if any(summary is None for summary in summaries):
+        return None, ""
+
+    pending = sum(1 for task in tasks if task['status'] != 'complete')
+    while len(summaries) > REDUCE_FAN_IN:
+        groups = [summaries[i:i + REDUCE_FAN_IN] for i in range(0, len(summaries), REDUCE_FAN_IN)]
+        summaries, more = _complete_cached(cache, [_combine_prompt(group, final=False) for group in groups], max_tokens=200)
+        sent += more
+        if any(summary is None for summary in summaries):
+            return None, ""
+    final_prompt = _combine_prompt(summaries, final=True, total=len(tasks), pending=pending)
+    final, more = _complete_cached(cache, [final_prompt], max_tokens=300)
+    sent += more
+
+    cache.put_meta(MANIFEST_KEY, json.dumps(digests))
+    note = (f"{changed} changed and {removed} removed of {len(tasks)} tasks since the last summary; "
+            f"{sent} of {len(chunks)} chunk and combine prompts sent.")
+    return final[0], note
+
+def task_digest(task: Dict[str, Any]) -> str:
+    """
+    Hash the fields of a task that appear in its prompt line.
+
+    :param task: The task dictionary
+    :return: Short hex digest that changes whenever the task's prompt line does
+    """
+    return hashlib.sha256(_task_line(task).encode('utf-8')).hexdigest()[:16]
+
+def chunk_tasks(tasks: List[Dict[str, Any]], chunk_size: int) -> List[List[Dict[str, Any]]]:
+    """
+    Group tasks into chunks by ID range.
+
+    Chunk membership depends only on a task's ID, so adding, editing or
+    deleting one task changes only the chunk it belongs to.
+
+    :param tasks: List of task dictionaries
+    :param chunk_size: Width of each ID range
+    :return: Non-empty chunks in ID order, each sorted by ID
+    """
+    buckets: Dict[int, List[Dict[str, Any]]] = {}
+    for task in tasks:
+        buckets.setdefault(task['id'] // chunk_size, []).append(task)
+    return [sorted(buckets[b], key=lambda task: task['id']) for b in sorted(buckets)]
+
+def _task_line(task: Dict[str, Any]) -> str:
+    """
+    Format one task as a prompt line.
+    """
+    description = task['description']
+    if len(description) > MAX_DESCRIPTION_CHARS:
+        description = description[:MAX_DESCRIPTION_CHARS] + "…"
+    task_info = f"- {description} (Utility: {task['utility_score']}, Cost: {task['cost_hours']}hrs, Status: {task['status']}"
+    if task.get('deadline'):
+        task_info += f", Deadline: {task['deadline']}"
+    task_info += ")"
+    return task_info
+
+def _chunk_prompt(chunk: List[Dict[str, Any]]) -> str:
+    """
+    Build the map prompt for one chunk of tasks.
+    """
+    tasks_text = "\n".join(f"#{task['id']} {_task_line(task)[2:]}" for task in chunk)
+    return f"""Summarize this part of a student's task list in 2-3 sentences for a later overall review.
+Name the highest utility/cost tasks (with their #id), any deadlines, and how much work is still pending.
+
+Tasks:
+{tasks_text}"""
+
+def _combine_prompt(summaries: List[str], final: bool, total: int = 0, pending: int = 0) -> str:
+    """
+    Build a reduce prompt that merges several partial summaries.
+    """
+    parts = "\n\n".join(f"Part {i}:\n{summary}" for i, summary in enumerate(summaries, 1))
+    if not final:
+        return f"""Merge these summaries of parts of a task list into one 3-4 sentence summary.
+Keep the highest utility/cost tasks (with their #id) and the nearest deadlines.
+
+{parts}"""
+    return f"""You are an AI assistant helping students prioritize their tasks.
+The backlog has {total} tasks ({pending} pending). Below are summaries of its parts.
+Provide a brief, insightful summary (3-5 sentences) that:
+1. Identifies high-priority tasks based on utility/cost ratio
+2. Highlights any urgent deadlines
+3. Suggests a recommended order of completion
+4. Provides motivational advice
+
+{parts}
+
+Provide a concise, actionable summary."""
+
+def _complete_cached(cache: SummaryCache, prompts: List[str], max_tokens: int) -> Tuple[List[Optional[str]], int]:
+    """
+    Answer prompts from the cache, sending the misses to the API concurrently.
+
+    Cache access stays on the calling thread; only the API calls run in workers.
+
+    :param cache: Response cache
+    :param prompts: Prompts to answer
+    :param max_tokens: Maximum length of each response
+    :return: The responses in prompt order, and the number of prompts sent
+    """
+    keys = [cache_key(MODEL, SYSTEM_PROMPT, TEMPERATURE, prompt) for prompt in prompts]
+    results = [cache.get(key) for key in keys]
+    misses = [i for i, result in enumerate(results) if result is None]
+    if not misses:
+        return results, 0
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(misses))) as pool:
+        answers = list(pool.map(lambda i: _complete(prompts[i], max_tokens), misses))
+    for i, answer in zip(misses, answers):
+        results[i] = answer
+        if answer is not None:
+            cache.put(keys[i], answer)
+    return results, len(misses)
+
+def _complete(prompt: str, max_tokens: int = 300) -> Optional[str]:
+    """
+    Send one prompt to the model.
+
+    :param prompt: The user prompt.
+    :param max_tokens: Maximum length of the response.
+    :return: The response text, or None if no API key is configured.
+    """
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        return None
+    client = OpenAI(api_key=api_key)
+    response = client.chat.completions.create(
+        model=MODEL,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=TEMPERATURE,
+        max_tokens=max_tokens
+    )
+    return response.choices[0].message.content
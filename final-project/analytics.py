@@ -0,0 +1,290 @@
+import datetime
+import importlib.util
+import math
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+# numpy is optional (callers fall back to task_stats_python) and is only imported
+# when the first TaskColumns is built, so importing this module stays cheap
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+np = None
+
+
+def _import_numpy():
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+_EPOCH = datetime.date(1970, 1, 1)
+
+
+def _day_number(value: Optional[str]) -> float:
+    """
+    Convert a YYYY-MM-DD (or ISO timestamp) string to days since 1970-01-01.
+
+    :param value: Date string, or None.
+    :return: Day number, or NaN if missing or unparseable.
+    """
+    if not value:
+        return math.nan
+    try:
+        return float((datetime.date.fromisoformat(value[:10]) - _EPOCH).days)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class TaskColumns:
+    """
+    A columnar snapshot of the task store held in NumPy arrays.
+
+    Each task occupies one row of the id, utility, cost, ROI, deadline (days
+    since the epoch, NaN if none), created (days since the epoch) and status
+    code columns. Rows are updated in place as tasks change and deleted by moving
+    the last row into the gap, so the snapshot never needs a full rebuild.
+    Arrays grow by doubling.
+    """
+
+    def __init__(self, statuses: Sequence[str] = ('pending', 'complete'), capacity: int = 1024):
+        """
+        Initialize an empty snapshot.
+
+        :param statuses: Known statuses, in code order; unknown ones get new codes.
+        :param capacity: Initial number of rows to allocate.
+        """
+        if not HAS_NUMPY:
+            raise ImportError("TaskColumns requires numpy")
+        _import_numpy()
+        self._status_codes: Dict[str, int] = {status: code for code, status in enumerate(statuses)}
+        self._rows: Dict[int, int] = {}
+        self._size = 0
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._utility = np.zeros(capacity, dtype=np.float64)
+        self._cost = np.zeros(capacity, dtype=np.float64)
+        self._roi = np.zeros(capacity, dtype=np.float64)
+        self._deadline = np.full(capacity, np.nan)
+        self._created = np.full(capacity, np.nan)
+        self._status = np.zeros(capacity, dtype=np.int16)
+
+    @classmethod
+    def from_tasks(cls, tasks: Iterable[Dict[str, Any]], statuses: Sequence[str] = ('pending', 'complete')) -> "TaskColumns":
+        """
+        Build a snapshot from task dictionaries in one pass.
+
+        :param tasks: The tasks.
+        :param statuses: Known statuses, in code order.
+        :return: The snapshot.
+        """
+        tasks = list(tasks)
+        columns = cls(statuses, capacity=max(1024, len(tasks)))
+        n = len(tasks)
+        columns._ids[:n] = [task['id'] for task in tasks]
+        columns._utility[:n] = [task.get('utility_score') or 0 for task in tasks]
+        columns._cost[:n] = [task.get('cost_hours') or 0 for task in tasks]
+        cost = columns._cost[:n]
+        np.divide(columns._utility[:n], cost, out=columns._roi[:n], where=cost != 0)
+        columns._deadline[:n] = [_day_number(task.get('deadline')) for task in tasks]
+        columns._created[:n] = [_day_number(task.get('created_at')) for task in tasks]
+        columns._status[:n] = [columns._code(task['status']) for task in tasks]
+        columns._rows = {task['id']: row for row, task in enumerate(tasks)}
+        columns._size = n
+        return columns
+
+    _COLUMNS = ('_ids', '_utility', '_cost', '_roi', '_deadline', '_created', '_status')
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _code(self, status: str) -> int:
+        code = self._status_codes.get(status)
+        if code is None:
+            code = self._status_codes[status] = len(self._status_codes)
+        return code
+
+    def _grow(self) -> None:
+        """
+        Double the capacity of every column.
+        """
+        for name in self._COLUMNS:
+            old = getattr(self, name)
+            fill = np.nan if name in ('_deadline', '_created') else 0
+            new = np.full(len(old) * 2, fill, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def upsert(self, task: Dict[str, Any]) -> None:
+        """
+        Insert a task or overwrite its row with the task's current values.
+
+        :param task: The task dictionary.
+        """
+        row = self._rows.get(task['id'])
+        if row is None:
+            if self._size == len(self._ids):
+                self._grow()
+            row = self._rows[task['id']] = self._size
+            self._size += 1
+        self._ids[row] = task['id']
+        self._utility[row] = task.get('utility_score') or 0
+        self._cost[row] = task.get('cost_hours') or 0
+        self._roi[row] = self._utility[row] / self._cost[row] if self._cost[row] else 0.0
+        self._deadline[row] = _day_number(task.get('deadline'))
+        self._created[row] = _day_number(task.get('created_at'))
+        self._status[row] = self._code(task['status'])
+
+    def remove(self, task_id: int) -> None:
+        """
+        Remove a task's row by moving the last row into its place. Unknown IDs are ignored.
+
+        :param task_id: ID of the task.
+        """
+        row = self._rows.pop(task_id, None)
+        if row is None:
+            return
+        last = self._size - 1
+        if row != last:
+            for name in self._COLUMNS:
+                column = getattr(self, name)
+                column[row] = column[last]
+            self._rows[int(self._ids[row])] = row
+        self._size = last
+
+    def _mask(self, status: Optional[str]):
+        """
+        Boolean mask selecting live rows, optionally of one status.
+        """
+        if status is None:
+            return np.ones(self._size, dtype=bool)
+        code = self._status_codes.get(status)
+        if code is None:
+            return np.zeros(self._size, dtype=bool)
+        return self._status[:self._size] == code
+
+    def status_counts(self) -> Dict[str, int]:
+        """
+        Count tasks per status.
+
+        :return: Mapping of every known status to its count.
+        """
+        counts = np.bincount(self._status[:self._size], minlength=len(self._status_codes))
+        return {status: int(counts[code]) for status, code in self._status_codes.items()}
+
+    def _top_rows(self, k: int, rows, scores) -> List[int]:
+        """
+        IDs of the k best-scoring rows among the given ones, ties by ID.
+        """
+        if k <= 0 or not len(rows):
+            return []
+        ids = self._ids[rows]
+        if k < len(rows):
+            cutoff = scores[np.argpartition(-scores, k - 1)[k - 1]]
+            above = np.flatnonzero(scores > cutoff)
+            # Fill the remaining places with the lowest IDs tied at the cutoff
+            tied = np.flatnonzero(scores == cutoff)
+            need = k - len(above)
+            if need < len(tied):
+                tied = tied[np.argpartition(ids[tied], need - 1)[:need]]
+            keep = np.concatenate([above, tied])
+            ids, scores = ids[keep], scores[keep]
+        order = np.lexsort((ids, -scores))[:k]
+        return ids[order].tolist()
+
+    def _due_rows(self, rows, deadline, start_day: int, end_day: int) -> List[int]:
+        """
+        IDs of the given rows with start_day <= deadline < end_day, soonest first.
+        """
+        window = (deadline >= start_day) & (deadline < end_day)
+        ids = self._ids[rows[window]]
+        return ids[np.lexsort((ids, deadline[window]))].tolist()
+
+    @staticmethod
+    def _percentiles(values, qs: Sequence[float]) -> List[float]:
+        if not len(values):
+            return [math.nan] * len(qs)
+        return [float(value) for value in np.percentile(values, qs)]
+
+    def stats(self, today: datetime.date, days: int = 7, top: int = 5) -> Dict[str, Any]:
+        """
+        Dashboard statistics over the whole snapshot.
+
+        :param today: Reference date for overdue / due-soon counts.
+        :param days: Size of the due-soon window in days.
+        :param top: Number of best-ROI pending tasks to list.
+        :return: The statistics, in the same shape as task_stats_python.
+        """
+        # Gather the pending rows once and aggregate over the compact copies
+        rows = np.flatnonzero(self._mask('pending'))
+        roi = self._roi[rows]
+        cost = self._cost[rows]
+        deadline = self._deadline[rows]
+        today_day = (today - _EPOCH).days
+        roi_p50, roi_p90 = self._percentiles(roi, [50, 90])
+        cost_p50, cost_p90 = self._percentiles(cost, [50, 90])
+        return {
+            'total': self._size,
+            'by_status': self.status_counts(),
+            'pending_hours': float(cost.sum()),
+            'pending_utility': float(self._utility[rows].sum()),
+            'roi_p50': roi_p50,
+            'roi_p90': roi_p90,
+            'cost_p50': cost_p50,
+            'cost_p90': cost_p90,
+            'overdue': int(np.count_nonzero(deadline < today_day)),
+            'due_soon': self._due_rows(rows, deadline, today_day, today_day + days),
+            'top_roi': self._top_rows(top, rows, roi),
+        }
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """
+    Linear-interpolation percentile, matching numpy's default method.
+    """
+    if not sorted_values:
+        return math.nan
+    position = (len(sorted_values) - 1) * q / 100
+    low = math.floor(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+def task_stats_python(tasks: Iterable[Dict[str, Any]], today: datetime.date, days: int = 7, top: int = 5,
+                      statuses: Sequence[str] = ('pending', 'complete')) -> Dict[str, Any]:
+    """
+    The same statistics as TaskColumns.stats, computed with plain Python when numpy is unavailable.
+
+    :param tasks: The tasks.
+    :param today: Reference date for overdue / due-soon counts.
+    :param days: Size of the due-soon window in days.
+    :param top: Number of best-ROI pending tasks to list.
+    :param statuses: Statuses always present in the counts.
+    :return: The statistics.
+    """
+    by_status = {status: 0 for status in statuses}
+    pending = []
+    for task in tasks:
+        by_status[task['status']] = by_status.get(task['status'], 0) + 1
+        if task['status'] == 'pending':
+            pending.append(task)
+    today_day = (today - _EPOCH).days
+    end_day = today_day + days
+
+    def task_roi(task):
+        cost = task.get('cost_hours') or 0
+        return (task.get('utility_score') or 0) / cost if cost else 0.0
+
+    rois = sorted(task_roi(task) for task in pending)
+    costs = sorted(float(task.get('cost_hours') or 0) for task in pending)
+    dated = [(_day_number(task.get('deadline')), task['id']) for task in pending]
+    return {
+        'total': sum(by_status.values()),
+        'by_status': by_status,
+        'pending_hours': float(sum(costs)),
+        'pending_utility': float(sum(task.get('utility_score') or 0 for task in pending)),
+        'roi_p50': _percentile(rois, 50),
+        'roi_p90': _percentile(rois, 90),
+        'cost_p50': _percentile(costs, 50),
+        'cost_p90': _percentile(costs, 90),
+        'overdue': sum(1 for day, _ in dated if day < today_day),
+        'due_soon': [task_id for day, task_id in sorted((day, task_id) for day, task_id in dated if today_day <= day < end_day)],
+        'top_roi': [task['id'] for task in sorted(pending, key=lambda task: (-task_roi(task), task['id']))[:top]],
+    }
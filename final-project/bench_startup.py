@@ -0,0 +1,107 @@
+"""
+Measure cold-start wall time of main.py commands.
+
+Each command runs in a fresh interpreter against a scratch task store (by
+default bypassing any daemon), and the median over several runs is reported
+next to the cost of starting a bare interpreter.
+
+    python bench_startup.py                # all commands, 1,000 tasks
+    python bench_startup.py --tasks 100000 --runs 20 add view
+    python bench_startup.py --target-ms 80 # exit 1 if `add` is slower
+    python bench_startup.py --daemon       # the same, through `main.py serve`
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+COMMANDS = {
+    'help': ['--help'],
+    'add': ['add', 'Benchmark task', '50', '2.5'],
+    'view': ['view', '1'],
+    'search': ['search', 'section 42'],
+    'list': ['list', '--limit', '20'],
+    'stats': ['stats'],
+}
+
+
+def seed(path: str, count: int) -> None:
+    """
+    Write a tasks.json with count tasks.
+    """
+    tasks = [
+        {
+            'id': i,
+            'description': f"Write report section {i}",
+            'utility_score': i % 100 + 1,
+            'cost_hours': i % 8 + 0.5,
+            'status': 'pending' if i % 3 else 'complete',
+            'deadline': None,
+            'linked_tasks': [],
+            'version': 1,
+        }
+        for i in range(1, count + 1)
+    ]
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(tasks, file, indent=4)
+
+
+def time_command(argv, cwd: str, env: dict, runs: int) -> float:
+    """
+    Median wall time of a command in milliseconds.
+    """
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('commands', nargs='*', metavar='command', help=f"Commands to time: {', '.join(COMMANDS)} (default: all)")
+    parser.add_argument('--runs', type=int, default=10, help="Runs per command")
+    parser.add_argument('--tasks', type=int, default=1000, help="Tasks in the scratch store")
+    parser.add_argument('--target-ms', type=float, help="Fail if the median `add` time exceeds this")
+    parser.add_argument('--daemon', action='store_true', help="Run the commands through a task daemon")
+    args = parser.parse_args()
+    unknown = [name for name in args.commands if name not in COMMANDS]
+    if unknown:
+        parser.error(f"unknown command(s) {', '.join(unknown)}; choose from {', '.join(COMMANDS)}")
+
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(os.environ, TASKS_FILE="tasks.json", TASKS_NO_DAEMON="1")
+        baseline = time_command([sys.executable, '-c', 'pass'], scratch, env, args.runs)
+        print(f"{'python -c pass':<16}{baseline:8.1f} ms")
+        results = {}
+        for name in args.commands or COMMANDS:
+            seed(os.path.join(scratch, "tasks.json"), args.tasks)
+            server = None
+            if args.daemon:
+                env.pop('TASKS_NO_DAEMON', None)
+                server = subprocess.Popen([sys.executable, MAIN, 'serve'], cwd=scratch, env=env, stdout=subprocess.DEVNULL)
+                while not os.path.exists(os.path.join(scratch, "tasks.json.sock")):
+                    time.sleep(0.05)
+            try:
+                results[name] = time_command([sys.executable, MAIN, *COMMANDS[name]], scratch, env, args.runs)
+            finally:
+                if server:
+                    subprocess.run([sys.executable, MAIN, 'serve', '--stop'], cwd=scratch, env=env, stdout=subprocess.DEVNULL)
+                    server.wait()
+            print(f"{name:<16}{results[name]:8.1f} ms   (+{results[name] - baseline:.1f} ms over the interpreter)")
+
+    if args.target_ms is not None and 'add' in results and results['add'] > args.target_ms:
+        print(f"add took {results['add']:.1f} ms, over the {args.target_ms:g} ms target")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
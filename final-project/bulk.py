@@ -0,0 +1,318 @@
+import csv
+import datetime
+import json
+import math
+import uuid
+from typing import IO, Any, Dict, Iterable, Iterator, List, Tuple
+
+from records import json_default
+
+FORMATS = ('ndjson', 'csv', 'bundle')
+
+# Columns of the CSV format; list fields are written as IDs joined with ';'
+CSV_FIELDS = ('id', 'description', 'utility_score', 'cost_hours', 'status', 'deadline', 'linked_tasks', 'depends_on', 'version')
+
+STATUSES = ('pending', 'complete')
+
+# ExportBundle (task5/schema/v1.json) constants and status mapping
+BUNDLE_VERSION = "1.0.0"
+_TO_BUNDLE_STATUS = {'pending': 'todo', 'complete': 'done'}
+_FROM_BUNDLE_STATUS = {'todo': 'pending', 'in-progress': 'pending', 'blocked': 'pending', 'done': 'complete', 'archived': 'complete'}
+_MAX_TITLE = 500
+# Bundle IDs are derived from task IDs, so exporting the same store twice gives the same IDs
+_UUID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "https://taskpkms.dev/schema/v1.json")
+
+
+def guess_format(path: str) -> str:
+    """
+    Pick a format from a file name: .csv is CSV, .json an ExportBundle, and
+    .ndjson, .jsonl or standard input NDJSON.
+
+    :param path: File path, or - for standard input/output.
+    :return: One of FORMATS.
+    :raises ValueError: If the extension is none of these.
+    """
+    lower = path.lower()
+    if lower.endswith('.csv'):
+        return 'csv'
+    if lower.endswith('.json'):
+        return 'bundle'
+    if path == '-' or lower.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    raise ValueError(f"Cannot tell the format of {path} from its extension; pass --format.")
+
+
+def task_uuid(task_id: int) -> str:
+    """
+    Stable bundle ID of a task: a name-based UUID with the version 4 layout
+    that the schema requires.
+
+    :param task_id: The task's ID in this store.
+    :return: The UUID string.
+    """
+    digest = uuid.uuid5(_UUID_NAMESPACE, f"task:{task_id}")
+    return str(uuid.UUID(bytes=digest.bytes, version=4))
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _key(value: Any) -> Any:
+    """
+    Normalise a task reference: digit strings (from CSV) become ints.
+    """
+    if isinstance(value, str):
+        value = value.strip()
+        if value.isdigit():
+            return int(value)
+    return value
+
+
+def _id_list(value: Any, field: str) -> List[Any]:
+    """
+    Parse a list of task references from a JSON list or a ';'-separated CSV cell.
+    """
+    if value is None or value == '':
+        return []
+    if isinstance(value, str):
+        value = [part for part in value.split(';') if part.strip()]
+    if not isinstance(value, list):
+        raise ValueError(f"{field} must be a list of task IDs")
+    keys = [_key(item) for item in value]
+    if any(isinstance(key, (bool, float, list, dict)) or key in ('', None) for key in keys):
+        raise ValueError(f"{field} must be a list of task IDs")
+    return keys
+
+
+def validate_task(row: Any) -> Dict[str, Any]:
+    """
+    Check one imported row and convert it to the tasks.json shape.
+
+    CSV cells arrive as strings, so numbers and lists are parsed here and
+    empty cells count as missing. Unknown fields are kept; 'version' is dropped since imported tasks
+    start at version 1.
+
+    :param row: The parsed row.
+    :return: The task dictionary. Its 'id', if any, is only a key for links
+        within the same import (see TaskManager.add_tasks).
+    :raises ValueError: If a field is missing or invalid.
+    """
+    if not isinstance(row, dict):
+        raise ValueError("expected an object")
+    task = {field: value for field, value in row.items() if field != 'version' and value not in (None, '')}
+
+    if 'id' in task:
+        key = _key(task.pop('id'))
+        if isinstance(key, (bool, float, list, dict)):
+            raise ValueError("id must be an integer or a string")
+        task['id'] = key
+
+    description = task.get('description')
+    if not isinstance(description, str) or not description.strip():
+        raise ValueError("description is required")
+    task['description'] = description.strip()
+
+    try:
+        utility = task['utility_score']
+        if isinstance(utility, bool) or (isinstance(utility, float) and not utility.is_integer()):
+            raise TypeError
+        task['utility_score'] = int(utility)
+    except KeyError:
+        raise ValueError("utility_score is required")
+    except (TypeError, ValueError):
+        raise ValueError(f"utility_score must be an integer, not {task['utility_score']!r}")
+    if not 1 <= task['utility_score'] <= 100:
+        raise ValueError("utility_score must be between 1 and 100")
+
+    try:
+        cost = task['cost_hours']
+        if isinstance(cost, bool):
+            raise TypeError
+        task['cost_hours'] = float(cost)
+    except KeyError:
+        raise ValueError("cost_hours is required")
+    except (TypeError, ValueError):
+        raise ValueError(f"cost_hours must be a number, not {task['cost_hours']!r}")
+    if not math.isfinite(task['cost_hours']) or task['cost_hours'] < 0:
+        raise ValueError("cost_hours must be zero or more")
+
+    status = task.get('status') or 'pending'
+    if status not in STATUSES:
+        raise ValueError(f"status must be one of {', '.join(STATUSES)}, not {status!r}")
+    task['status'] = status
+
+    deadline = task.get('deadline') or None
+    if deadline is not None:
+        try:
+            datetime.date.fromisoformat(deadline)
+        except (TypeError, ValueError):
+            raise ValueError(f"deadline must be a YYYY-MM-DD date, not {deadline!r}")
+    task['deadline'] = deadline
+
+    for field in ('linked_tasks', 'depends_on'):
+        if field in task:
+            task[field] = _id_list(task[field], field)
+    return task
+
+
+def _bundle_row(entity: Any, depends_on: Dict[str, List[str]]) -> Dict[str, Any]:
+    """
+    Convert an ExportBundle Task entity to an import row. Utility and cost come
+    from the metadata this module writes, or default to the priority (x20) and
+    one hour for bundles made elsewhere.
+    """
+    if not isinstance(entity, dict) or entity.get('type', 'task') != 'task':
+        raise ValueError("expected a task entity")
+    if not isinstance(entity.get('id'), str):
+        raise ValueError("id must be a UUID string")
+    title = entity.get('title')
+    body = entity.get('body')
+    if isinstance(body, str) and isinstance(title, str) and body.startswith(title):
+        title = body  # the full description of a task whose title was truncated
+    metadata = entity.get('metadata') or {}
+    priority = entity.get('priority')
+    utility = metadata.get('utility_score', priority * 20 if isinstance(priority, int) else 50)
+    due = entity.get('due')
+    row = {
+        'id': entity['id'],
+        'description': title,
+        'utility_score': utility,
+        'cost_hours': metadata.get('cost_hours', 1.0),
+        'status': _FROM_BUNDLE_STATUS.get(entity.get('status'), entity.get('status')),
+        'deadline': due[:10] if isinstance(due, str) else due,
+        'linked_tasks': entity.get('links') or [],
+    }
+    if entity['id'] in depends_on:
+        row['depends_on'] = depends_on[entity['id']]
+    return row
+
+
+def _iter_rows(file: IO[str], fmt: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Yield (line number, parsed row). Parse errors are yielded as ValueError rows.
+    """
+    if fmt == 'ndjson':
+        for number, line in enumerate(file, 1):
+            if line.strip():
+                try:
+                    yield number, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield number, ValueError(f"invalid JSON ({e.msg})")
+    elif fmt == 'csv':
+        reader = csv.DictReader(file)
+        for row in reader:
+            if None in row:
+                yield reader.line_num, ValueError("too many cells")
+            else:
+                yield reader.line_num, row
+    elif fmt == 'bundle':
+        # A bundle is one JSON document whose links section follows the tasks,
+        # so it is parsed whole; use ndjson or csv for very large imports
+        bundle = json.load(file)
+        if not isinstance(bundle, dict) or bundle.get('version') != BUNDLE_VERSION:
+            raise ValueError(f"not an ExportBundle version {BUNDLE_VERSION}")
+        entities = bundle.get('entities') or {}
+        depends_on: Dict[str, List[str]] = {}
+        for link in entities.get('links') or []:
+            if isinstance(link, dict) and link.get('type') == 'depends-on':
+                depends_on.setdefault(link.get('from'), []).append(link.get('to'))
+        for number, entity in enumerate(entities.get('tasks') or [], 1):
+            try:
+                yield number, _bundle_row(entity, depends_on)
+            except ValueError as e:
+                yield number, e
+    else:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+
+
+def read_tasks(file: IO[str], fmt: str, errors: List[Tuple[int, str]]) -> Iterator[Dict[str, Any]]:
+    """
+    Stream validated tasks from an NDJSON, CSV or ExportBundle file.
+
+    Only the current row is held in memory (except for bundles, see _iter_rows).
+    Invalid rows are skipped and recorded in errors.
+
+    :param file: Open text file.
+    :param fmt: One of FORMATS.
+    :param errors: Receives (line number, message) for each skipped row. For
+        bundles the number is the task's position in entities.tasks.
+    :return: Iterator of tasks for TaskManager.add_tasks.
+    """
+    for number, row in _iter_rows(file, fmt):
+        try:
+            if isinstance(row, ValueError):
+                raise row
+            yield validate_task(row)
+        except ValueError as e:
+            errors.append((number, str(e)))
+
+
+def _csv_cell(value: Any) -> Any:
+    if isinstance(value, list):
+        return ';'.join(str(item) for item in value)
+    return '' if value is None else value
+
+
+def _bundle_task(task: Dict[str, Any], now: str) -> Dict[str, Any]:
+    """
+    Convert a task to an ExportBundle Task entity. The store has no timestamps,
+    so created/modified are the export time; utility and cost go in metadata.
+    """
+    description = task['description'] or f"Task {task['id']}"
+    entity = {
+        'id': task_uuid(task['id']),
+        'type': 'task',
+        'title': description[:_MAX_TITLE],
+        'status': _TO_BUNDLE_STATUS.get(task.get('status'), 'todo'),
+        'priority': min(5, max(1, math.ceil(task['utility_score'] / 20))),
+        'links': [task_uuid(linked_id) for linked_id in task.get('linked_tasks') or []],
+        'created': now,
+        'modified': now,
+        'version': task.get('version', 1),
+        'metadata': {'task_id': task['id'], 'utility_score': task['utility_score'], 'cost_hours': task['cost_hours']},
+    }
+    if len(description) > _MAX_TITLE:
+        entity['body'] = description
+    if task.get('deadline'):
+        entity['due'] = f"{task['deadline']}T00:00:00Z"
+    return entity
+
+
+def write_tasks(tasks: Iterable[Dict[str, Any]], file: IO[str], fmt: str) -> int:
+    """
+    Stream tasks to a file as NDJSON, CSV or an ExportBundle, one task at a time.
+
+    :param tasks: Tasks in the tasks.json shape (e.g. TaskManager.iter_tasks()).
+    :param file: Open text file.
+    :param fmt: One of FORMATS.
+    :return: Number of tasks written.
+    """
+    count = 0
+    if fmt == 'ndjson':
+        for task in tasks:
+            file.write(json.dumps(task, default=json_default) + "\n")
+            count += 1
+    elif fmt == 'csv':
+        writer = csv.writer(file, lineterminator='\n')
+        writer.writerow(CSV_FIELDS)
+        for task in tasks:
+            writer.writerow([_csv_cell(task.get(field)) for field in CSV_FIELDS])
+            count += 1
+    elif fmt == 'bundle':
+        now = _now()
+        # Dependencies become depends-on Link entities, written after the tasks
+        links: List[Tuple[int, int]] = []
+        file.write(f'{{"version": "{BUNDLE_VERSION}", "exported": "{now}", "entities": {{"notes": [], "tasks": [')
+        for task in tasks:
+            file.write((",\n" if count else "\n") + json.dumps(_bundle_task(task, now)))
+            links.extend((task['id'], prerequisite) for prerequisite in task.get('depends_on') or [])
+            count += 1
+        file.write('\n], "projects": [], "tags": [], "links": [')
+        for i, (task_id, prerequisite) in enumerate(links):
+            link = {'from': task_uuid(task_id), 'to': task_uuid(prerequisite), 'type': 'depends-on', 'created': now}
+            file.write((",\n" if i else "\n") + json.dumps(link))
+        file.write('\n], "attachments": [], "revisions": []}}\n')
+    else:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    return count
@@ -0,0 +1,200 @@
+import json
+import os
+import socket
+import sys
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Unix domain sockets are missing on some platforms (older Windows builds)
+HAS_UNIX_SOCKETS = hasattr(socket, "AF_UNIX")
+# Set TASKS_SOCKET to choose the socket path, TASKS_NO_DAEMON=1 to never use a daemon
+SOCKET_ENV = "TASKS_SOCKET"
+NO_DAEMON_ENV = "TASKS_NO_DAEMON"
+# sockaddr_un holds 104-108 bytes depending on the platform
+_MAX_SOCKET_PATH = 100
+
+# (argv, cwd, tty, width) -> (stdout, stderr, exit code)
+Runner = Callable[[List[str], str, bool, int], Tuple[str, str, int]]
+
+
+def socket_path(tasks_file: str) -> str:
+    """
+    Socket path of the daemon serving a task store: ``<tasks_file>.sock`` next to
+    the store, or a hashed name in the temp directory if that path is too long.
+
+    :param tasks_file: Path to the task store.
+    :return: The socket path (TASKS_SOCKET overrides it).
+    """
+    override = os.environ.get(SOCKET_ENV)
+    if override:
+        return override
+    path = os.path.abspath(tasks_file) + ".sock"
+    if len(path.encode()) > _MAX_SOCKET_PATH:
+        import hashlib
+        import tempfile
+        digest = hashlib.sha1(path.encode()).hexdigest()[:16]
+        path = os.path.join(tempfile.gettempdir(), f"tasks-{digest}.sock")
+    return path
+
+
+def _connect(path: str) -> Optional[socket.socket]:
+    """
+    Connect to a daemon socket, or return None if nothing is listening there.
+    """
+    if not HAS_UNIX_SOCKETS or not os.path.exists(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:  # stale socket file or a daemon that is shutting down
+        sock.close()
+        return None
+    return sock
+
+
+def _request(sock: socket.socket, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Send one JSON line and read one JSON line back (None if the connection closed).
+    """
+    with sock, sock.makefile('rb') as reader:
+        sock.sendall(json.dumps(message, separators=(',', ':')).encode() + b"\n")
+        line = reader.readline()
+    return json.loads(line) if line.endswith(b"\n") else None
+
+
+def forward(argv: List[str], tasks_file: str) -> Optional[int]:
+    """
+    Run a CLI command in the daemon serving tasks_file, if one is running, and
+    copy its output to this process's stdout and stderr.
+
+    Only the standard library is imported, so a forwarded command costs little
+    more than the interpreter start.
+
+    :param argv: Command-line arguments (without the program name).
+    :param tasks_file: Path to the task store.
+    :return: The command's exit code, or None if no daemon is available and
+        the command should run in this process.
+    """
+    if os.environ.get(NO_DAEMON_ENV):
+        return None
+    sock = _connect(socket_path(tasks_file))
+    if sock is None:
+        return None
+    try:
+        width = os.get_terminal_size(sys.stdout.fileno()).columns
+    except (OSError, ValueError):
+        width = 80
+    request = {'argv': argv, 'cwd': os.getcwd(), 'tty': sys.stdout.isatty(), 'width': width}
+    try:
+        reply = _request(sock, request)
+    except OSError:
+        reply = None
+    if reply is None:
+        # The command may or may not have run, so do not retry it locally
+        print("Error: the task daemon closed the connection.", file=sys.stderr)
+        return 1
+    sys.stdout.write(reply['stdout'])
+    sys.stderr.write(reply['stderr'])
+    sys.stdout.flush()
+    return reply['code']
+
+
+def stop(path: str) -> bool:
+    """
+    Ask the daemon listening on path to shut down.
+
+    :param path: The daemon's socket path.
+    :return: True if a daemon was running.
+    """
+    sock = _connect(path)
+    if sock is None:
+        return False
+    try:
+        _request(sock, {'shutdown': True})
+    except OSError:
+        pass
+    return True
+
+
+def invoke(app: Callable[..., Any], argv: List[str]) -> Tuple[str, str, int]:
+    """
+    Run a Typer/Click application in this process, capturing what it prints.
+
+    :param app: The application.
+    :param argv: Command-line arguments (without the program name).
+    :return: (stdout, stderr, exit code).
+    """
+    # Server-side only; the client path keeps its imports to the bare minimum
+    import io
+    import traceback
+    from contextlib import redirect_stderr, redirect_stdout
+
+    out, err = io.StringIO(), io.StringIO()
+    with redirect_stdout(out), redirect_stderr(err):
+        try:
+            app(args=argv, prog_name="main.py")
+            code = 0
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except Exception:
+            traceback.print_exc()
+            code = 1
+    return out.getvalue(), err.getvalue(), code
+
+
+def serve(path: str, run: Runner) -> None:
+    """
+    Serve commands on a Unix socket until a client asks for shutdown.
+
+    Each connection carries JSON lines. A request is
+    ``{"argv": [...], "cwd": str, "tty": bool, "width": int}`` and gets the reply
+    ``{"stdout": str, "stderr": str, "code": int}``; ``{"shutdown": true}`` stops
+    the server. Requests are handled one at a time, so commands never run
+    concurrently against the in-memory state. The socket is private to the user
+    and removed on exit.
+
+    :param path: Socket path.
+    :param run: Runs one command.
+    :raises RuntimeError: If another daemon is already listening on path.
+    """
+    import socketserver
+
+    existing = _connect(path)
+    if existing is not None:
+        existing.close()
+        raise RuntimeError(f"A task daemon is already listening on {path}")
+    if os.path.exists(path):
+        os.remove(path)  # left behind by a daemon that did not exit cleanly
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            for line in self.rfile:
+                try:
+                    request = json.loads(line)
+                    if request.get('shutdown'):
+                        self.server.stopping = True
+                        reply = {'stdout': "", 'stderr': "", 'code': 0}
+                    elif request['argv'][:1] == ['serve']:
+                        reply = {'stdout': "", 'stderr': "Error: the daemon cannot run 'serve'.\n", 'code': 2}
+                    else:
+                        stdout, stderr, code = run(request['argv'], request['cwd'], request['tty'], request['width'])
+                        reply = {'stdout': stdout, 'stderr': stderr, 'code': code}
+                except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+                    reply = {'stdout': "", 'stderr': f"Error: bad request ({e})\n", 'code': 2}
+                self.wfile.write(json.dumps(reply, separators=(',', ':')).encode() + b"\n")
+                self.wfile.flush()
+
+    old_umask = os.umask(0o177)
+    try:
+        server = socketserver.UnixStreamServer(path, Handler)
+    finally:
+        os.umask(old_umask)
+    server.stopping = False
+    try:
+        with server:
+            while not server.stopping:
+                server.handle_request()
+    finally:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,138 @@
+import json
+import os
+from typing import Any, Dict, Iterator, List
+
+# Compact the journal into a fresh snapshot once it grows past this many bytes.
+DEFAULT_COMPACT_THRESHOLD = 4 * 1024 * 1024
+
+
+class TaskJournal:
+    """
+    An append-only log of task mutations stored next to tasks.json.
+
+    Each mutation is written as one compact JSON object per line, so the cost of
+    recording a change does not depend on how many tasks are stored. During
+    compaction the active log is rotated to ``<path>.1`` while the snapshot is
+    rewritten, and both files are replayed (rotated first) when loading.
+    """
+
+    def __init__(self, path: str, compact_threshold: int = DEFAULT_COMPACT_THRESHOLD):
+        """
+        Initialize the journal.
+
+        :param path: Path to the active journal file.
+        :param compact_threshold: Size in bytes after which compaction is due.
+        """
+        self.path = path
+        self.rotated_path = path + ".1"
+        self.compact_threshold = compact_threshold
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """
+        Append a single mutation record to the journal.
+
+        :param record: The mutation record (must be JSON serializable).
+        """
+        self.append_many([record])
+
+    def append_many(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Append several records with a single write and fsync (group commit).
+
+        :param records: The mutation records, oldest first.
+        """
+        if not records:
+            return
+        data = "".join(json.dumps(record, separators=(',', ':')) + "\n" for record in records)
+        with open(self.path, 'a+b') as file:
+            self._drop_torn_record(file)
+            file.write(data.encode('utf-8'))
+            file.flush()
+            os.fsync(file.fileno())
+
+    @staticmethod
+    def _drop_torn_record(file) -> None:
+        """
+        Cut off a partial last line left by a crash mid-append, so the next
+        record starts on a line of its own. replay() already skips such a line.
+
+        :param file: The journal, open for appending in binary mode.
+        """
+        size = file.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - 4096)
+            file.seek(start)
+            block = file.read(end - start)
+            if end == size and block.endswith(b"\n"):
+                return
+            newline = block.rfind(b"\n")
+            if newline >= 0:
+                file.truncate(start + newline + 1)
+                return
+            end = start
+        file.truncate(0)
+
+    def replay(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every record in the journal, oldest first.
+
+        A torn final line (left by a crash mid-append) is skipped.
+        """
+        for path in (self.rotated_path, self.path):
+            try:
+                file = open(path, 'r', encoding='utf-8')
+            except FileNotFoundError:
+                continue
+            with file:
+                for line in file:
+                    if not line.endswith("\n"):
+                        break
+                    yield json.loads(line)
+
+    def size(self) -> int:
+        """
+        Return the size of the active journal in bytes.
+        """
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def needs_compaction(self) -> bool:
+        """
+        Return True once the active journal has passed the compaction threshold.
+        """
+        return self.size() >= self.compact_threshold
+
+    def has_rotated(self) -> bool:
+        """
+        Return True if a rotated journal from an unfinished compaction exists.
+        """
+        return os.path.exists(self.rotated_path)
+
+    def rotate(self) -> None:
+        """
+        Move the active journal aside so new records start a fresh file.
+        """
+        if os.path.exists(self.path):
+            os.replace(self.path, self.rotated_path)
+
+    def discard_rotated(self) -> None:
+        """
+        Remove the rotated journal once its records are part of a snapshot.
+        """
+        try:
+            os.remove(self.rotated_path)
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        """
+        Remove both the active and the rotated journal.
+        """
+        self.discard_rotated()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,246 @@
+# Kept identical in final-project and names/src/task_manager; see "Shared modules" in the top-level README.md
+import bisect
+import codecs
+import json
+import mmap
+import os
+import struct
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]"
+
+# Sidecar layout: header (magic, source size, source mtime_ns, source inode, count)
+# followed by `count` (id, offset, length) records sorted by id.
+_INDEX_MAGIC = b"TASKIDX1"
+_HEADER = struct.Struct("<8sqqqq")
+_RECORD = struct.Struct("<qqq")
+
+
+def _iter_array(path: str, with_offsets: bool) -> Iterator[Any]:
+    """
+    Incrementally parse a top-level JSON array, reading the file in chunks.
+
+    :param path: Path to the JSON file.
+    :param with_offsets: If True, yield (byte offset, byte length, item) tuples.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    with open(path, 'rb') as file:
+        buf = ""
+        pos = 0
+        byte_pos = 0  # byte offset in the file of buf[pos]
+        eof = False
+
+        def fill() -> bool:
+            """Read the next chunk, dropping consumed text. Returns False at EOF."""
+            nonlocal buf, pos, eof
+            if eof:
+                return False
+            data = file.read(CHUNK_SIZE)
+            eof = not data
+            buf = buf[pos:] + utf8.decode(data, final=eof)
+            pos = 0
+            return not eof
+
+        def skip_whitespace() -> str:
+            nonlocal pos, byte_pos
+            while True:
+                while pos < len(buf) and buf[pos] in _WHITESPACE:
+                    pos += 1
+                    byte_pos += 1
+                if pos < len(buf):
+                    return buf[pos]
+                if not fill():
+                    return ""
+
+        if skip_whitespace() != "[":
+            raise json.JSONDecodeError("Expecting '['", buf, pos)
+        pos += 1
+        byte_pos += 1
+        if skip_whitespace() == "]":
+            return
+        while True:
+            if not skip_whitespace():
+                raise json.JSONDecodeError("Unterminated array", buf, pos)
+            while True:
+                try:
+                    item, end = decoder.raw_decode(buf, pos)
+                    # A scalar cut at the chunk edge can parse as a shorter value
+                    # ("1.5e10" as "1."), so only accept it once a delimiter follows
+                    if eof or (end < len(buf) and buf[end] in _DELIMITERS):
+                        break
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                fill()
+            if with_offsets:
+                length = len(buf[pos:end].encode('utf-8'))
+                yield byte_pos, length, item
+                byte_pos += length
+            else:
+                yield item
+                byte_pos += end - pos  # only needs to be exact when offsets are requested
+            pos = end
+            separator = skip_whitespace()
+            pos += 1
+            byte_pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", buf, pos - 1)
+
+
+def iter_json_array(path: str) -> Iterator[Any]:
+    """
+    Yield the items of a top-level JSON array one at a time.
+
+    Only the current chunk and item are held in memory, so peak memory stays
+    bounded by the largest item instead of a multiple of the file size.
+
+    :param path: Path to the JSON file.
+    """
+    return _iter_array(path, with_offsets=False)
+
+
+def iter_json_array_offsets(path: str) -> Iterator[Tuple[int, int, Any]]:
+    """
+    Yield (byte offset, byte length, item) for each item of a top-level JSON array.
+
+    :param path: Path to the JSON file.
+    """
+    return _iter_array(path, with_offsets=True)
+
+
+def write_json_array(file: IO[str], items: Iterable[Any], indent: int = 4, **dump_kwargs) -> int:
+    """
+    Write items as a JSON array one at a time, formatted exactly like
+    json.dump(list(items), file, indent=indent) but without building the list.
+
+    :param file: Text file open for writing.
+    :param items: The items.
+    :param indent: Indentation, as for json.dump.
+    :param dump_kwargs: Extra arguments for json.dumps (e.g. default=...).
+    :return: Number of items written.
+    """
+    padding = "\n" + " " * indent
+    count = 0
+    for item in items:
+        file.write(",\n" if count else "[\n")
+        file.write(" " * indent + json.dumps(item, indent=indent, **dump_kwargs).replace("\n", padding))
+        count += 1
+    file.write("\n]" if count else "[]")
+    return count
+
+
+class OffsetIndex:
+    """
+    A sidecar index of byte offsets for the records in a JSON array file.
+
+    The index is stored next to the data file as ``<path>.idx`` and rebuilt with
+    one streaming pass whenever the data file changes. Looking up a record is a
+    binary search over the memory-mapped index followed by one seek and read,
+    so single-record reads do not parse the rest of the file.
+    """
+
+    def __init__(self, path: str, key: str = 'id'):
+        """
+        Initialize the index for a data file.
+
+        :param path: Path to the JSON array file.
+        :param key: Integer field identifying each record.
+        """
+        self.path = path
+        self.index_path = path + ".idx"
+        self.key = key
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        self._ids: List[int] = []
+        self._spans: List[Tuple[int, int]] = []
+
+    def _source_stamp(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+    def _refresh(self) -> bool:
+        """
+        Make sure the in-memory index matches the data file.
+
+        :return: False if the data file does not exist.
+        """
+        stamp = self._source_stamp()
+        if stamp is None:
+            self._stamp, self._ids, self._spans = None, [], []
+            return False
+        if stamp == self._stamp:
+            return True
+        if not self._read_sidecar(stamp):
+            self._build(stamp)
+        return True
+
+    def _read_sidecar(self, stamp: Tuple[int, int, int]) -> bool:
+        try:
+            with open(self.index_path, 'rb') as file:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    magic, size, mtime_ns, ino, count = _HEADER.unpack_from(mm, 0)
+                    if magic != _INDEX_MAGIC or (size, mtime_ns, ino) != stamp:
+                        return False
+                    records = list(_RECORD.iter_unpack(mm[_HEADER.size:_HEADER.size + count * _RECORD.size]))
+        except (OSError, ValueError, struct.error):
+            return False
+        self._stamp = stamp
+        self._ids = [record[0] for record in records]
+        self._spans = [(record[1], record[2]) for record in records]
+        return True
+
+    def _build(self, stamp: Tuple[int, int, int]) -> None:
+        records = sorted(
+            (item[self.key], offset, length)
+            for offset, length, item in iter_json_array_offsets(self.path)
+        )
+        self._stamp = stamp
+        self._ids = [record[0] for record in records]
+        self._spans = [(record[1], record[2]) for record in records]
+        tmp_path = self.index_path + ".tmp"
+        try:
+            with open(tmp_path, 'wb') as file:
+                file.write(_HEADER.pack(_INDEX_MAGIC, *stamp, len(records)))
+                for record in records:
+                    file.write(_RECORD.pack(*record))
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            pass  # read-only directory; keep the in-memory index for this process
+
+    def get(self, record_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Read a single record by its ID.
+
+        :param record_id: The record's ID.
+        :return: The record, or None if it does not exist.
+        """
+        found = self.get_many([record_id])
+        return found[0] if found else None
+
+    def get_many(self, record_ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """
+        Read several records by ID, skipping IDs that do not exist.
+
+        :param record_ids: IDs to read.
+        :return: The records found, in the order requested.
+        """
+        if not self._refresh():
+            return []
+        records = []
+        with open(self.path, 'rb') as file:
+            for record_id in record_ids:
+                i = bisect.bisect_left(self._ids, record_id)
+                if i == len(self._ids) or self._ids[i] != record_id:
+                    continue
+                offset, length = self._spans[i]
+                file.seek(offset)
+                records.append(json.loads(file.read(length)))
+        return records
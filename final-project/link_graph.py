@@ -0,0 +1,250 @@
+# Kept identical in final-project and names/src/task_manager; see "Shared modules" in the top-level README.md
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+
+class LinkGraph:
+    """
+    An adjacency-list graph of task links.
+
+    Each task's outgoing links are kept in a set, and a reverse index records
+    which tasks link to it, so membership tests are O(1) and removing a task
+    touches only its own neighbours. Traversals treat links as undirected.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty graph.
+        """
+        self._out: Dict[int, Set[int]] = {}
+        self._in: Dict[int, Set[int]] = {}
+
+    @classmethod
+    def from_links(cls, items: Iterable[Tuple[int, Iterable[int]]]) -> "LinkGraph":
+        """
+        Build a graph from (task ID, linked IDs) pairs.
+
+        Links to IDs that never appear as a task are left out.
+
+        :param items: (task ID, linked task IDs) pairs.
+        :return: The graph.
+        """
+        graph = cls()
+        pending = []
+        for node, links in items:
+            graph.add_node(node)
+            pending.append((node, links))
+        for node, links in pending:
+            for other in links:
+                if other in graph._out:
+                    graph._out[node].add(other)
+                    graph._in[other].add(node)
+        return graph
+
+    def __len__(self) -> int:
+        return len(self._out)
+
+    def __contains__(self, node: int) -> bool:
+        return node in self._out
+
+    def add_node(self, node: int) -> None:
+        """
+        Add a task with no links. Existing tasks are left unchanged.
+
+        :param node: Task ID.
+        """
+        if node not in self._out:
+            self._out[node] = set()
+            self._in[node] = set()
+
+    def remove_node(self, node: int) -> Set[int]:
+        """
+        Remove a task and every link to or from it in O(degree).
+
+        :param node: Task ID.
+        :return: IDs of the tasks that linked to it.
+        """
+        if node not in self._out:
+            return set()
+        for other in self._out.pop(node):
+            self._in[other].discard(node)
+        referrers = self._in.pop(node)
+        referrers.discard(node)
+        for other in referrers:
+            self._out[other].discard(node)
+        return referrers
+
+    def add_edge(self, a: int, b: int) -> None:
+        """
+        Record a link from a to b. Both tasks must already be in the graph.
+
+        :param a: Source task ID.
+        :param b: Target task ID.
+        """
+        self._out[a].add(b)
+        self._in[b].add(a)
+
+    def remove_edge(self, a: int, b: int) -> None:
+        """
+        Remove the link from a to b, if present.
+
+        :param a: Source task ID.
+        :param b: Target task ID.
+        """
+        if a in self._out:
+            self._out[a].discard(b)
+        if b in self._in:
+            self._in[b].discard(a)
+
+    def has_edge(self, a: int, b: int) -> bool:
+        """
+        Return True if a links to b.
+        """
+        return b in self._out.get(a, ())
+
+    def neighbors(self, node: int) -> Set[int]:
+        """
+        Return the tasks linked to or from a task.
+
+        :param node: Task ID.
+        :return: Neighbouring task IDs (empty for unknown IDs).
+        """
+        if node not in self._out:
+            return set()
+        return self._out[node] | self._in[node]
+
+    def degree(self, node: int) -> int:
+        """
+        Return the number of distinct neighbours of a task.
+        """
+        return len(self.neighbors(node))
+
+    def bfs(self, start: int, max_depth: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+        """
+        Walk the graph breadth-first from a task.
+
+        :param start: Task ID to start from.
+        :param max_depth: Optional maximum number of hops.
+        :return: Iterator of (task ID, hops from start), starting with (start, 0).
+        """
+        if start not in self._out:
+            return
+        seen = {start}
+        queue = deque([(start, 0)])
+        while queue:
+            node, depth = queue.popleft()
+            yield node, depth
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for other in sorted(self.neighbors(node)):
+                if other not in seen:
+                    seen.add(other)
+                    queue.append((other, depth + 1))
+
+    def dfs(self, start: int) -> Iterator[int]:
+        """
+        Walk the graph depth-first (pre-order) from a task, without recursion.
+
+        :param start: Task ID to start from.
+        :return: Iterator of task IDs, starting with start.
+        """
+        if start not in self._out:
+            return
+        seen = set()
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            yield node
+            # Push in reverse so the smallest neighbour is visited first
+            stack.extend(sorted(self.neighbors(node) - seen, reverse=True))
+
+    def k_hop(self, start: int, k: int) -> Dict[int, int]:
+        """
+        Return every task within k hops of a task.
+
+        :param start: Task ID.
+        :param k: Maximum number of hops.
+        :return: Mapping of task ID to hop count, excluding start itself.
+        """
+        return {node: depth for node, depth in self.bfs(start, max_depth=k) if node != start}
+
+    def shortest_path(self, a: int, b: int) -> Optional[List[int]]:
+        """
+        Find a shortest chain of links between two tasks.
+
+        Searches from both ends at once, always expanding the smaller frontier.
+
+        :param a: First task ID.
+        :param b: Second task ID.
+        :return: Task IDs from a to b inclusive, or None if they are not connected.
+        """
+        if a not in self._out or b not in self._out:
+            return None
+        if a == b:
+            return [a]
+        source = a
+        parents_a: Dict[int, Optional[int]] = {a: None}
+        parents_b: Dict[int, Optional[int]] = {b: None}
+        frontier_a, frontier_b = [a], [b]
+        while frontier_a and frontier_b:
+            if len(frontier_a) > len(frontier_b):
+                frontier_a, frontier_b = frontier_b, frontier_a
+                parents_a, parents_b = parents_b, parents_a
+                a, b = b, a
+            next_frontier = []
+            for node in frontier_a:
+                for other in sorted(self.neighbors(node)):
+                    if other in parents_a:
+                        continue
+                    parents_a[other] = node
+                    if other in parents_b:
+                        path = self._trace(parents_a, other)[::-1] + self._trace(parents_b, other)[1:]
+                        return path if path[0] == source else path[::-1]
+                    next_frontier.append(other)
+            frontier_a = next_frontier
+        return None
+
+    @staticmethod
+    def _trace(parents: Dict[int, Optional[int]], node: int) -> List[int]:
+        """
+        Follow parent pointers from node back to the search root.
+        """
+        path = []
+        while node is not None:
+            path.append(node)
+            node = parents[node]
+        return path
+
+    def component(self, start: int) -> List[int]:
+        """
+        Return the IDs of every task connected to a task, sorted.
+        """
+        return sorted(node for node, _ in self.bfs(start))
+
+    def components(self) -> List[List[int]]:
+        """
+        Split the graph into connected components.
+
+        :return: Components as sorted ID lists, largest first, ties by smallest ID.
+        """
+        seen: Set[int] = set()
+        result = []
+        for node in sorted(self._out):
+            if node in seen:
+                continue
+            members = []
+            stack = [node]
+            seen.add(node)
+            while stack:
+                current = stack.pop()
+                members.append(current)
+                for other in self.neighbors(current):
+                    if other not in seen:
+                        seen.add(other)
+                        stack.append(other)
+            result.append(sorted(members))
+        result.sort(key=lambda members: (-len(members), members[0]))
+        return result
@@ -0,0 +1,123 @@
+# Kept identical in final-project and names/src/task_manager; see "Shared modules" in the top-level README.md
+import os
+import threading
+from typing import Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class VersionConflictError(ValueError):
+    """
+    Raised when a compare-and-swap update finds the record at a different version.
+    """
+
+    def __init__(self, task_id: int, expected: int, actual: int):
+        super().__init__(f"Task {task_id} is at version {actual}, not {expected}; it was changed by someone else")
+        self.task_id = task_id
+        self.expected = expected
+        self.actual = actual
+
+
+def _lock_fd(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return
+    while True:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            return
+        except OSError:  # LK_LOCK gives up after ~10 s; keep waiting
+            continue
+
+
+def _unlock_fd(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """
+    An exclusive advisory lock shared by every process using the same lock file.
+
+    The lock is re-entrant within a thread, and threads of one process take
+    turns, so a process can hold it across a whole batch of mutations. Only
+    writers take it; readers rely on atomic renames and never wait.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: Path of the lock file (created on first use).
+        """
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd: Optional[int] = None
+
+    def acquire(self) -> None:
+        """
+        Block until this thread holds the lock.
+        """
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+                try:
+                    _lock_fd(fd)
+                except BaseException:
+                    os.close(fd)
+                    raise
+            except BaseException:
+                self._thread_lock.release()
+                raise
+            self._fd = fd
+        self._depth += 1
+
+    def release(self) -> None:
+        """
+        Release one level of the lock; the file lock is dropped at the outermost level.
+        """
+        self._depth -= 1
+        if self._depth == 0:
+            fd, self._fd = self._fd, None
+            try:
+                _unlock_fd(fd)
+            finally:
+                os.close(fd)
+        self._thread_lock.release()
+
+    @property
+    def held(self) -> bool:
+        """
+        True while some thread of this process holds the lock.
+        """
+        return self._depth > 0
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+def file_stamp(path: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Identify a file's current contents cheaply: (inode, size, mtime in ns).
+
+    Atomic saves replace the file, so the inode changes on every save.
+
+    :param path: Path to the file.
+    :return: The stamp, or None if the file does not exist.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
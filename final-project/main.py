@@ -1,15 +1,52 @@
+import os
+import sys
+
+# Set TASKS_FILE to a .db/.sqlite path to use the SQLite backend
+TASKS_FILE = os.environ.get("TASKS_FILE", "tasks.json")
+
+# Thin client: if a daemon (`main.py serve`) is running for this store, hand it
+# the command before paying for the imports and the file load below
+# (`import -` reads this process's stdin, so it always runs here)
+if __name__ == "__main__" and sys.argv[1:2] != ["serve"] and not (sys.argv[1:2] == ["import"] and "-" in sys.argv[2:]):
+    from daemon import forward
+    _exit_code = forward(sys.argv[1:], TASKS_FILE)
+    if _exit_code is not None:
+        sys.exit(_exit_code)
+
 import typer
 from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
 from typing import Optional
-from task_manager import TaskManager
-from ai_summary import get_ai_task_summary
+from locking import VersionConflictError
+from priority import roi
+
+# Heavier modules (the storage layer, rich tables, the planner, the OpenAI SDK)
+# are imported by the commands that need them, so e.g. `add` starts quickly
 
 app = typer.Typer()
+graph_app = typer.Typer(help="Explore how tasks are linked together.")
+app.add_typer(graph_app, name="graph")
 console = Console()
 
-task_manager = TaskManager("tasks.json")
+
+def get_task_manager():
+    """
+    Get the task store, opening it on first use.
+
+    :return: A TaskManager, or a SqliteTaskManager for .db/.sqlite/.sqlite3 files.
+    """
+    manager = globals().get('task_manager')
+    if manager is None:
+        from task_manager import open_task_manager
+        manager = globals()['task_manager'] = open_task_manager(TASKS_FILE, lazy=True)
+    return manager
+
+
+def __getattr__(name: str):
+    # Keep `main.task_manager` working for code that reaches into the module
+    if name == 'task_manager':
+        return get_task_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 @app.command()
 def add(description: str, utility: int, cost: float, deadline: Optional[str] = None):
@@ -21,27 +58,25 @@ def add(description: str, utility: int, cost: float, deadline: Optional[str] = N
     :param cost: Cost in hours to complete the task.
     :param deadline: Optional deadline in YYYY-MM-DD format.
     """
-    task_manager.add_task(description, utility, cost, deadline)
+    get_task_manager().add_task(description, utility, cost, deadline)
     console.print(f"Task added successfully!", style="green")
 
 @app.command()
-def list():
+def list(
+    limit: Optional[int] = typer.Option(None, min=1, help="Tasks per page"),
+    page: int = typer.Option(1, min=1, help="Page to show when a limit is given"),
+):
     """
     List all tasks with their ROI (utility / cost), sorted by highest ROI first.
+
+    :param limit: Optional number of tasks per page.
+    :param page: Page number to show when a limit is given (starting at 1).
     """
-    tasks = task_manager.tasks
-    
-    # Calculate ROI for each task and sort by ROI descending
-    tasks_with_roi = []
-    for task in tasks:
-        utility = task['utility_score']
-        cost = task['cost_hours']
-        roi = utility / cost if cost != 0 else 0
-        tasks_with_roi.append((task, roi))
-    
-    # Sort by ROI descending (highest ROI first - The Rational Choice)
-    tasks_with_roi.sort(key=lambda x: x[1], reverse=True)
+    # Highest ROI first - The Rational Choice
+    offset = (page - 1) * limit if limit else 0
+    tasks = get_task_manager().get_tasks_by_roi(offset, limit)
     
+    from rich.table import Table
     table = Table(title="Tasks (Sorted by ROI - The Rational Choice)")
     table.add_column("ID", justify="right", style="cyan")
     table.add_column("Description", style="magenta")
@@ -51,7 +86,7 @@ def list():
     table.add_column("Deadline", justify="center", style="red")
     table.add_column("Links", justify="center", style="cyan")
 
-    for task, roi in tasks_with_roi:
+    for task in tasks:
         linked_count = len(task.get('linked_tasks', []))
         link_display = f"🔗 {linked_count}" if linked_count > 0 else "-"
         
@@ -60,7 +95,7 @@ def list():
             task['description'],
             str(task['utility_score']),
             f"{task['cost_hours']:.2f}",
-            f"{roi:.2f}",
+            f"{roi(task):.2f}",
             task.get('deadline') or 'N/A',
             link_display
         )
@@ -68,13 +103,19 @@ def list():
     console.print(table)
 
 @app.command()
-def delete(task_id: int):
+def delete(task_id: int, expected_version: Optional[int] = None):
     """
     Delete a task by its ID.
 
     :param task_id: ID of the task to delete.
+    :param expected_version: Only delete the task if it is still at this version.
     """
-    if task_manager.delete_task(task_id):
+    try:
+        deleted = get_task_manager().delete_task(task_id, expected_version=expected_version)
+    except VersionConflictError as e:
+        console.print(str(e), style="red")
+        raise typer.Exit(code=1)
+    if deleted:
         console.print(f"Task {task_id} deleted successfully!", style="green")
     else:
         console.print(f"Task {task_id} not found.", style="red")
@@ -82,15 +123,17 @@ def delete(task_id: int):
 @app.command()
 def search(query: str):
     """
-    Search for tasks containing the given query string.
+    Search for tasks whose descriptions contain every word of the query.
+    Words also match inside longer words ("econ" finds "microeconomics").
 
     :param query: Query string to search for in task descriptions.
     """
-    results = task_manager.search_tasks(query)
+    results = get_task_manager().search_tasks(query)
     if not results:
         console.print("No tasks found matching the query.", style="red")
         return
 
+    from rich.table import Table
     table = Table(title="Search Results")
     table.add_column("ID", justify="right", style="cyan")
     table.add_column("Description", style="magenta")
@@ -116,7 +159,8 @@ def edit(
     utility: Optional[int] = None,
     cost: Optional[float] = None,
     deadline: Optional[str] = None,
-    status: Optional[str] = None
+    status: Optional[str] = None,
+    expected_version: Optional[int] = None
 ):
     """
     Edit a task's properties. Only provided fields will be updated.
@@ -127,6 +171,7 @@ def edit(
     :param cost: New cost in hours.
     :param deadline: New deadline in YYYY-MM-DD format.
     :param status: New status (pending/complete).
+    :param expected_version: Only edit the task if it is still at this version (see `view`).
     """
     updates = {}
     if description is not None:
@@ -144,7 +189,12 @@ def edit(
         console.print("No updates provided. Please specify at least one field to update.", style="yellow")
         return
     
-    if task_manager.edit_task(task_id, **updates):
+    try:
+        edited = get_task_manager().edit_task(task_id, expected_version=expected_version, **updates)
+    except VersionConflictError as e:
+        console.print(str(e), style="red")
+        raise typer.Exit(code=1)
+    if edited:
         console.print(f"Task {task_id} updated successfully!", style="green")
         console.print(f"Updated fields: {', '.join(updates.keys())}", style="cyan")
     else:
@@ -156,7 +206,9 @@ def ai_summary():
     Generate an AI-powered summary of your tasks using OpenAI's API.
     Requires OPENAI_API_KEY environment variable to be set.
     """
-    summary = get_ai_task_summary(task_manager.tasks)
+    from ai_summary import get_ai_task_summary
+    from rich.panel import Panel
+    summary = get_ai_task_summary(get_task_manager().tasks)
     console.print(Panel(summary, title="🤖 AI Task Analysis", border_style="blue"))
 
 @app.command()
@@ -171,7 +223,7 @@ def link(task_id: int, linked_task_id: int):
         console.print("Cannot link a task to itself.", style="red")
         return
     
-    if task_manager.link_tasks(task_id, linked_task_id):
+    if get_task_manager().link_tasks(task_id, linked_task_id):
         console.print(f"✓ Tasks {task_id} and {linked_task_id} are now linked!", style="green")
     else:
         console.print(f"Failed to link tasks. Check that both task IDs exist.", style="red")
@@ -184,7 +236,7 @@ def unlink(task_id: int, linked_task_id: int):
     :param task_id: ID of the first task.
     :param linked_task_id: ID of the task to unlink from.
     """
-    if task_manager.unlink_tasks(task_id, linked_task_id):
+    if get_task_manager().unlink_tasks(task_id, linked_task_id):
         console.print(f"✓ Tasks {task_id} and {linked_task_id} are now unlinked.", style="green")
     else:
         console.print(f"Failed to unlink tasks. Check that both task IDs exist.", style="red")
@@ -196,28 +248,27 @@ def view(task_id: int):
 
     :param task_id: ID of the task to view.
     """
-    task = task_manager.get_task_by_id(task_id)
+    from rich.panel import Panel
+    task = get_task_manager().get_task_by_id(task_id)
     
     if not task:
         console.print(f"Task {task_id} not found.", style="red")
         return
     
-    # Calculate ROI
-    roi = task['utility_score'] / task['cost_hours'] if task['cost_hours'] != 0 else 0
-    
     # Create details panel
     details = f"""
 [bold cyan]ID:[/bold cyan] {task['id']}
 [bold magenta]Description:[/bold magenta] {task['description']}
 [bold green]Utility Score:[/bold green] {task['utility_score']}
 [bold yellow]Cost (Hours):[/bold yellow] {task['cost_hours']:.2f}
-[bold blue]ROI:[/bold blue] {roi:.2f}
+[bold blue]ROI:[/bold blue] {roi(task):.2f}
 [bold red]Deadline:[/bold red] {task.get('deadline') or 'N/A'}
 [bold white]Status:[/bold white] {task['status']}
+[bold white]Version:[/bold white] {task.get('version', 1)}
 """
     
     # Add linked tasks information
-    linked_tasks = task_manager.get_linked_tasks(task_id)
+    linked_tasks = get_task_manager().get_linked_tasks(task_id)
     if linked_tasks:
         details += "\n[bold]🔗 Linked Tasks:[/bold]\n"
         for linked in linked_tasks:
@@ -227,5 +278,323 @@ def view(task_id: int):
     
     console.print(Panel(details, title=f"📋 Task Details", border_style="cyan"))
 
+@app.command()
+def migrate(source: str, destination: str):
+    """
+    Copy all tasks from a tasks.json file into a SQLite database.
+
+    :param source: Path to the existing tasks.json file.
+    :param destination: Path to the SQLite database (.db/.sqlite/.sqlite3).
+    """
+    from sqlite_store import migrate_json_to_sqlite
+    count = migrate_json_to_sqlite(source, destination)
+    console.print(f"Migrated {count} tasks to {destination}.", style="green")
+    console.print(f"Set TASKS_FILE={destination} to use it.", style="cyan")
+
+@app.command()
+def convert(source: str, destination: str):
+    """
+    Convert a task store between tasks.json and the binary columnar format (.tcol).
+
+    :param source: Path to the file to read (.json or .tcol).
+    :param destination: Path to the file to write (.json or .tcol).
+    """
+    from task_manager import convert_snapshot
+    count = convert_snapshot(source, destination)
+    console.print(f"Converted {count} tasks to {destination}.", style="green")
+    if destination.lower().endswith('.tcol'):
+        console.print(f"Set TASKS_FILE={destination} to use it.", style="cyan")
+
+@app.command("import")
+def import_(
+    source: str = typer.Argument(..., help="File to read, or - for standard input"),
+    fmt: Optional[str] = typer.Option(None, "--format", help="ndjson, csv or bundle (default: from the file extension)"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only validate the rows"),
+):
+    """
+    Add the tasks in an NDJSON, CSV or ExportBundle file with a single write.
+
+    Rows are streamed and validated one at a time; invalid rows are reported and
+    skipped. New tasks get fresh IDs, and links between rows of the file are kept.
+    """
+    import bulk
+    try:
+        fmt = fmt or bulk.guess_format(source)
+    except ValueError as e:
+        console.print(str(e), style="red")
+        raise typer.Exit(code=2)
+    if fmt not in bulk.FORMATS:
+        console.print(f"Unknown format '{fmt}'. Use one of: {', '.join(bulk.FORMATS)}.", style="red")
+        raise typer.Exit(code=2)
+    errors = []
+    try:
+        file = sys.stdin if source == "-" else open(source, newline='', encoding='utf-8')
+    except OSError as e:
+        console.print(f"Cannot read {source}: {e.strerror}", style="red")
+        raise typer.Exit(code=1)
+    try:
+        tasks = bulk.read_tasks(file, fmt, errors)
+        count = sum(1 for _ in tasks) if dry_run else len(get_task_manager().add_tasks(tasks))
+    except ValueError as e:
+        console.print(f"Cannot import {source}: {e}", style="red", markup=False)
+        raise typer.Exit(code=1)
+    finally:
+        if file is not sys.stdin:
+            file.close()
+    for line, message in errors[:20]:
+        console.print(f"Line {line}: {message}", style="yellow", markup=False)
+    if len(errors) > 20:
+        console.print(f"... and {len(errors) - 20} more invalid rows", style="yellow")
+    skipped = f", skipped {len(errors)} invalid rows" if errors else ""
+    console.print(f"{'Validated' if dry_run else 'Imported'} {count} tasks{skipped}.", style="green")
+    if errors:
+        raise typer.Exit(code=1)
+
+@app.command()
+def export(
+    destination: str = typer.Argument("-", help="File to write, or - for standard output"),
+    fmt: Optional[str] = typer.Option(None, "--format", help="ndjson, csv or bundle (default: from the file extension)"),
+):
+    """
+    Write every task as NDJSON, CSV or an ExportBundle, one task at a time.
+    """
+    import bulk
+    try:
+        fmt = fmt or bulk.guess_format(destination)
+    except ValueError as e:
+        console.print(str(e), style="red")
+        raise typer.Exit(code=2)
+    if fmt not in bulk.FORMATS:
+        console.print(f"Unknown format '{fmt}'. Use one of: {', '.join(bulk.FORMATS)}.", style="red")
+        raise typer.Exit(code=2)
+    tasks = get_task_manager().iter_tasks()
+    if destination == "-":
+        bulk.write_tasks(tasks, sys.stdout, fmt)
+        return
+    from durable import atomic_write
+    written = []
+    atomic_write(destination, lambda file: written.append(bulk.write_tasks(tasks, file, fmt)))
+    console.print(f"Exported {written[0]} tasks to {destination}.", style="green")
+
+@app.command()
+def depend(task_id: int, prerequisite_id: int, remove: bool = False):
+    """
+    Mark a task as depending on another one, so plan only schedules it after its prerequisite.
+
+    :param task_id: ID of the dependent task.
+    :param prerequisite_id: ID of the task that must be done first.
+    :param remove: Remove the dependency instead of adding it.
+    """
+    task = get_task_manager().get_task_by_id(task_id)
+    if not task or not get_task_manager().get_task_by_id(prerequisite_id):
+        console.print("Check that both task IDs exist.", style="red")
+        return
+    depends_on = [dep for dep in task.get('depends_on') or [] if dep != prerequisite_id]
+    if remove:
+        get_task_manager().edit_task(task_id, depends_on=depends_on)
+        console.print(f"✓ Task {task_id} no longer depends on Task {prerequisite_id}.", style="green")
+        return
+    from planner import creates_cycle
+    tasks_by_id = {other['id']: other for other in get_task_manager().tasks}
+    if creates_cycle(tasks_by_id, task_id, prerequisite_id):
+        console.print(f"Task {prerequisite_id} already depends on Task {task_id}; that would create a cycle.", style="red")
+        return
+    get_task_manager().edit_task(task_id, depends_on=depends_on + [prerequisite_id])
+    console.print(f"✓ Task {task_id} now depends on Task {prerequisite_id}.", style="green")
+
+@app.command()
+def plan(hours: float = typer.Option(..., help="Hours available")):
+    """
+    Pick the pending tasks worth the most total utility that fit in the given hours,
+    always scheduling prerequisites before the tasks that depend on them.
+
+    :param hours: Hours available.
+    """
+    from planner import plan_tasks
+    tasks = get_task_manager().tasks
+    result = plan_tasks(tasks, hours)
+    if not result.tasks:
+        console.print(f"No pending tasks fit in {hours:g} hours.", style="yellow")
+    else:
+        from rich.table import Table
+        table = Table(title=f"🗓️ Plan for {hours:g} Hours")
+        table.add_column("Step", justify="right", style="cyan")
+        table.add_column("ID", justify="right", style="cyan")
+        table.add_column("Description", style="magenta")
+        table.add_column("Utility", justify="right", style="green")
+        table.add_column("Cost (Hrs)", justify="right", style="yellow")
+        table.add_column("After", justify="center", style="red")
+        # Prerequisites that no longer exist are not shown
+        known = {task['id'] for task in tasks}
+        for step, task in enumerate(result.tasks, 1):
+            after = ", ".join(str(dep) for dep in task.get('depends_on') or [] if dep in known) or "-"
+            table.add_row(
+                str(step),
+                str(task['id']),
+                task['description'],
+                str(task['utility_score']),
+                f"{task['cost_hours']:.2f}",
+                after
+            )
+        console.print(table)
+        console.print(f"Total utility: {result.utility:g} in {result.hours:.2f} of {hours:g} hours", style="green")
+    if result.exact:
+        console.print("This plan is optimal.", style="cyan")
+    elif result.bound > 0:
+        console.print(f"No plan can exceed {result.bound:.1f} utility (this one is within {100 * (1 - result.utility / result.bound):.1f}%).", style="cyan")
+    if result.blocked:
+        console.print(f"Skipped tasks with circular dependencies: {', '.join(map(str, result.blocked))}", style="red")
+
+@app.command()
+def stats(days: int = 7, top: int = 5):
+    """
+    Show backlog statistics: status counts, remaining work, ROI and cost percentiles,
+    overdue tasks and tasks due soon.
+
+    :param days: Size of the "due soon" window in days.
+    :param top: Number of best-ROI pending tasks to show.
+    """
+    result = get_task_manager().get_stats(days=days, top=top)
+
+    from rich.table import Table
+    table = Table(title="📊 Backlog Statistics")
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", justify="right", style="magenta")
+    table.add_row("Total tasks", str(result['total']))
+    for status, count in result['by_status'].items():
+        table.add_row(f"  {status.capitalize()}", str(count))
+    table.add_row("Pending hours", f"{result['pending_hours']:.2f}")
+    table.add_row("Pending utility", f"{result['pending_utility']:g}")
+    table.add_row("Median ROI (pending)", f"{result['roi_p50']:.2f}")
+    table.add_row("90th percentile ROI", f"{result['roi_p90']:.2f}")
+    table.add_row("Median cost (hrs)", f"{result['cost_p50']:.2f}")
+    table.add_row("90th percentile cost", f"{result['cost_p90']:.2f}")
+    table.add_row("Overdue", str(result['overdue']))
+    table.add_row(f"Due in {days} days", str(len(result['due_soon'])))
+    console.print(table)
+
+    for title, ids in ((f"⏰ Due in the next {days} days", result['due_soon'][:top]), ("🏆 Best ROI", result['top_roi'])):
+        if not ids:
+            continue
+        console.print(f"[bold]{title}:[/bold]")
+        for task_id in ids:
+            task = get_task_manager().get_task_by_id(task_id)
+            console.print(f"  • Task {task_id}: {task['description']} (ROI {roi(task):.2f}, deadline {task.get('deadline') or 'N/A'})")
+
+@graph_app.command("neighbors")
+def graph_neighbors(task_id: int, depth: int = 1):
+    """
+    Show every task within a number of links of a task.
+
+    :param task_id: ID of the task to start from.
+    :param depth: Maximum number of links to follow.
+    """
+    graph = get_task_manager().get_link_graph()
+    if task_id not in graph:
+        console.print(f"Task {task_id} not found.", style="red")
+        return
+    hops = graph.k_hop(task_id, depth)
+    if not hops:
+        console.print(f"Task {task_id} has no linked tasks.", style="yellow")
+        return
+
+    from rich.table import Table
+    table = Table(title=f"🔗 Tasks within {depth} link(s) of Task {task_id}")
+    table.add_column("ID", style="cyan")
+    table.add_column("Hops", style="yellow")
+    table.add_column("Description", style="magenta")
+    for other_id, hop in sorted(hops.items(), key=lambda item: (item[1], item[0])):
+        task = get_task_manager().get_task_by_id(other_id)
+        table.add_row(str(other_id), str(hop), task['description'] if task else "")
+    console.print(table)
+
+@graph_app.command("path")
+def graph_path(task_id: int, other_task_id: int):
+    """
+    Show the shortest chain of links between two tasks.
+
+    :param task_id: ID of the first task.
+    :param other_task_id: ID of the second task.
+    """
+    path = get_task_manager().get_link_graph().shortest_path(task_id, other_task_id)
+    if path is None:
+        console.print(f"No link path between tasks {task_id} and {other_task_id}.", style="red")
+        return
+    console.print(" → ".join(f"Task {node}" for node in path), style="green")
+    console.print(f"{len(path) - 1} link(s)", style="cyan")
+
+@graph_app.command("components")
+def graph_components(min_size: int = 2):
+    """
+    Show groups of tasks that are connected through links, largest first.
+
+    :param min_size: Hide groups with fewer tasks than this.
+    """
+    groups = [group for group in get_task_manager().get_link_graph().components() if len(group) >= min_size]
+    if not groups:
+        console.print("No linked task groups found.", style="yellow")
+        return
+
+    from rich.table import Table
+    table = Table(title="🧩 Linked Task Groups")
+    table.add_column("Group", style="cyan")
+    table.add_column("Size", style="yellow")
+    table.add_column("Task IDs", style="magenta")
+    for i, group in enumerate(groups, 1):
+        table.add_row(str(i), str(len(group)), ", ".join(str(task_id) for task_id in group))
+    console.print(table)
+
+@app.command()
+def serve(
+    socket_file: Optional[str] = typer.Option(None, "--socket", help="Socket path (default: <tasks file>.sock)"),
+    stop: bool = typer.Option(False, "--stop", help="Stop the running daemon instead"),
+):
+    """
+    Keep the tasks loaded in memory and serve commands over a Unix socket.
+    While it runs, other main.py invocations for the same store hand their
+    command to it and skip loading the file themselves.
+    """
+    import signal
+    import daemon
+
+    path = socket_file or daemon.socket_path(TASKS_FILE)
+    if stop:
+        if not daemon.stop(path):
+            console.print("No task daemon is running.", style="yellow")
+            raise typer.Exit(code=1)
+        console.print("Task daemon stopped.", style="green")
+        return
+    if not daemon.HAS_UNIX_SOCKETS:
+        console.print("The task daemon needs Unix domain sockets, which this platform lacks.", style="red")
+        raise typer.Exit(code=1)
+
+    from task_manager import open_task_manager
+    global task_manager
+    # An absolute path keeps the store fixed while requests switch to the client's directory
+    task_manager = open_task_manager(os.path.abspath(TASKS_FILE))
+    home = os.getcwd()
+
+    def run(argv, cwd, tty, width):
+        global console
+        # Pick up changes made by processes that bypassed the daemon
+        task_manager.refresh()
+        saved = console
+        console = Console(force_terminal=tty, width=width)
+        try:
+            os.chdir(cwd)
+            return daemon.invoke(app, argv)
+        finally:
+            console = saved
+            os.chdir(home)
+
+    # Let `kill` remove the socket on the way out
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    console.print(f"Serving {TASKS_FILE} on {path} (stop with: main.py serve --stop)", style="green")
+    try:
+        daemon.serve(path, run)
+    except RuntimeError as e:
+        console.print(str(e), style="red")
+        raise typer.Exit(code=1)
+
 if __name__ == "__main__":
     app()
\ No newline at end of file
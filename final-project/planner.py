@@ -0,0 +1,281 @@
+import heapq
+from math import gcd
+from typing import Any, Dict, Iterable, List, NamedTuple, Set, Tuple
+
+# The exact DP keeps (tasks x budget units) cells in memory; above this it plans greedily
+DP_CELL_LIMIT = 2_000_000
+# Costs and budgets are measured in hundredths of an hour
+HOUR_SCALE = 100
+
+
+class Plan(NamedTuple):
+    """
+    The tasks chosen for an hours budget.
+
+    :param tasks: Chosen tasks in an order that respects their dependencies.
+    :param hours: Total cost of the chosen tasks.
+    :param utility: Total utility of the chosen tasks.
+    :param bound: Upper bound on the utility any valid plan could reach.
+    :param exact: True if the plan is optimal (then utility == bound).
+    :param blocked: IDs of pending tasks that can never be planned because
+        their dependencies form a cycle.
+    """
+    tasks: List[Dict[str, Any]]
+    hours: float
+    utility: float
+    bound: float
+    exact: bool
+    blocked: List[int]
+
+
+def plan_tasks(tasks: Iterable[Dict[str, Any]], hours: float, cell_limit: int = DP_CELL_LIMIT) -> Plan:
+    """
+    Choose pending tasks that maximise total utility within an hours budget.
+
+    A task can only be chosen together with every pending task it depends on
+    (its `depends_on` IDs; complete or deleted prerequisites count as done).
+    When every task has at most one pending prerequisite the dependencies form
+    a forest, and if the budget is small enough the plan is solved exactly by
+    dynamic programming. Otherwise tasks are picked greedily in dependency
+    order, and the reported bound shows how far from optimal the plan can be.
+
+    :param tasks: All tasks.
+    :param hours: The hours budget.
+    :param cell_limit: Largest DP table (tasks x budget units) to solve exactly.
+    :return: The plan.
+    """
+    tasks = list(tasks)
+    pending = {task['id']: task for task in tasks if task['status'] == 'pending'}
+    prereqs = {
+        task_id: [dep for dep in dict.fromkeys(task.get('depends_on') or []) if dep in pending and dep != task_id]
+        for task_id, task in pending.items()
+    }
+    order, blocked = _topological_order(prereqs)
+    budget = _to_units(hours)
+    costs = {task_id: _to_units(pending[task_id]['cost_hours'], round_up=True) for task_id in order}
+    bound = _fractional_bound(order, pending, costs, budget)
+
+    is_forest = all(len(prereqs[task_id]) <= 1 for task_id in order)
+    unit = _common_unit([budget] + list(costs.values()))
+    if is_forest and len(order) * (budget // unit + 1) <= cell_limit:
+        chosen = _plan_forest(order, pending, prereqs, costs, budget, unit)
+        exact = True
+    else:
+        chosen = _plan_greedy(order, pending, prereqs, costs, budget)
+        exact = False
+
+    chosen_set = set(chosen)
+    planned = [pending[task_id] for task_id in order if task_id in chosen_set]
+    utility = sum(task['utility_score'] for task in planned)
+    return Plan(
+        tasks=planned,
+        hours=sum(costs[task['id']] for task in planned) / HOUR_SCALE,
+        utility=utility,
+        bound=utility if exact else max(utility, bound),
+        exact=exact,
+        blocked=sorted(blocked),
+    )
+
+
+def creates_cycle(tasks_by_id: Dict[int, Dict[str, Any]], task_id: int, prerequisite_id: int) -> bool:
+    """
+    Return True if making task_id depend on prerequisite_id would close a cycle.
+
+    :param tasks_by_id: All tasks keyed by ID.
+    :param task_id: The dependent task.
+    :param prerequisite_id: The proposed prerequisite.
+    """
+    stack = [prerequisite_id]
+    seen: Set[int] = set()
+    while stack:
+        current = stack.pop()
+        if current == task_id:
+            return True
+        if current in seen or current not in tasks_by_id:
+            continue
+        seen.add(current)
+        stack.extend(tasks_by_id[current].get('depends_on') or [])
+    return False
+
+
+def _to_units(hours: float, round_up: bool = False) -> int:
+    """
+    Convert hours to integer budget units. Task costs round up so a plan never
+    exceeds the real budget.
+    """
+    scaled = hours * HOUR_SCALE
+    units = int(scaled)
+    if round_up and units < scaled - 1e-9:
+        units += 1
+    return max(0, units)
+
+
+def _common_unit(values: List[int]) -> int:
+    """
+    Largest unit that divides every cost and the budget, to keep the DP small.
+    """
+    unit = 0
+    for value in values:
+        unit = gcd(unit, value)
+    return unit or 1
+
+
+def _topological_order(prereqs: Dict[int, List[int]]) -> Tuple[List[int], Set[int]]:
+    """
+    Order tasks so prerequisites come first (Kahn's algorithm, smallest ID first).
+
+    :param prereqs: Pending prerequisites of each pending task.
+    :return: The order, and the IDs left out because they sit on or behind a cycle.
+    """
+    remaining = {task_id: len(deps) for task_id, deps in prereqs.items()}
+    dependents: Dict[int, List[int]] = {task_id: [] for task_id in prereqs}
+    for task_id, deps in prereqs.items():
+        for dep in deps:
+            dependents[dep].append(task_id)
+    ready = [task_id for task_id, count in remaining.items() if count == 0]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        task_id = heapq.heappop(ready)
+        order.append(task_id)
+        for child in dependents[task_id]:
+            remaining[child] -= 1
+            if remaining[child] == 0:
+                heapq.heappush(ready, child)
+    return order, set(prereqs) - set(order)
+
+
+def _fractional_bound(order: List[int], pending: Dict[int, Dict[str, Any]], costs: Dict[int, int], budget: int) -> float:
+    """
+    Upper bound from the fractional knapsack without dependency constraints.
+    """
+    bound = 0.0
+    left = budget
+    for task_id in sorted(order, key=lambda task_id: -_ratio((pending[task_id]['utility_score'], costs[task_id]))):
+        utility = pending[task_id]['utility_score']
+        if utility <= 0:
+            break
+        cost = costs[task_id]
+        if cost <= left:
+            bound += utility
+            left -= cost
+        else:
+            bound += utility * left / cost
+            break
+    return bound
+
+
+def _plan_forest(order: List[int], pending: Dict[int, Dict[str, Any]], prereqs: Dict[int, List[int]],
+                 costs: Dict[int, int], budget: int, unit: int) -> List[int]:
+    """
+    Exact knapsack over a dependency forest in O(tasks x budget).
+
+    Tasks are laid out in depth-first preorder, so each subtree is a contiguous
+    range. Row i holds the best utility obtainable from tasks i.. for every
+    budget: either skip task i together with its whole subtree, or take it and
+    carry on into its subtree.
+    """
+    children: Dict[int, List[int]] = {task_id: [] for task_id in order}
+    roots = []
+    for task_id in order:
+        if prereqs[task_id]:
+            children[prereqs[task_id][0]].append(task_id)
+        else:
+            roots.append(task_id)
+
+    preorder: List[int] = []
+    subtree_end: List[int] = []
+    position: Dict[int, int] = {}
+    stack = [(task_id, False) for task_id in reversed(roots)]
+    while stack:
+        task_id, done = stack.pop()
+        if done:
+            subtree_end[position[task_id]] = len(preorder)
+            continue
+        position[task_id] = len(preorder)
+        preorder.append(task_id)
+        subtree_end.append(0)
+        stack.append((task_id, True))
+        stack.extend((child, False) for child in reversed(children[task_id]))
+
+    width = budget // unit + 1
+    n = len(preorder)
+    rows: List[List[float]] = [None] * (n + 1)
+    rows[n] = [0] * width
+    for i in range(n - 1, -1, -1):
+        task = pending[preorder[i]]
+        cost = costs[preorder[i]] // unit
+        utility = task['utility_score']
+        skip = rows[subtree_end[i]]
+        if cost >= width or utility <= 0:
+            rows[i] = skip
+            continue
+        take = rows[i + 1]
+        rows[i] = skip[:cost] + [s if s >= utility + t else utility + t for s, t in zip(skip[cost:], take)]
+
+    chosen = []
+    i, w = 0, width - 1
+    while i < n:
+        if rows[i][w] != rows[subtree_end[i]][w]:
+            chosen.append(preorder[i])
+            w -= costs[preorder[i]] // unit
+            i += 1
+        else:
+            i = subtree_end[i]
+    return chosen
+
+
+def _plan_greedy(order: List[int], pending: Dict[int, Dict[str, Any]], prereqs: Dict[int, List[int]],
+                 costs: Dict[int, int], budget: int) -> List[int]:
+    """
+    Greedy plan for large or tangled backlogs in O((tasks + dependencies) log tasks).
+
+    Each task is scored by the best utility-per-hour of itself or of a chain
+    through its dependents, so cheap prerequisites that unlock valuable work
+    are not starved. Tasks become available once all their prerequisites are
+    chosen and are taken best score first while they fit.
+    """
+    dependents: Dict[int, List[int]] = {task_id: [] for task_id in order}
+    for task_id in order:
+        for dep in prereqs[task_id]:
+            dependents[dep].append(task_id)
+
+    # Best (utility, cost) chain starting at each task, computed dependents-first
+    chain: Dict[int, Tuple[float, int]] = {}
+    score: Dict[int, float] = {}
+    for task_id in reversed(order):
+        utility = pending[task_id]['utility_score']
+        cost = costs[task_id]
+        best = (utility, cost)
+        for child in dependents[task_id]:
+            child_utility, child_cost = chain[child]
+            candidate = (utility + child_utility, cost + child_cost)
+            if candidate[1] <= budget and _ratio(candidate) > _ratio(best):
+                best = candidate
+        chain[task_id] = best
+        score[task_id] = _ratio(best)
+
+    waiting = {task_id: len(prereqs[task_id]) for task_id in order}
+    heap = [(-score[task_id], task_id) for task_id in order if waiting[task_id] == 0]
+    heapq.heapify(heap)
+    chosen = []
+    left = budget
+    while heap:
+        _, task_id = heapq.heappop(heap)
+        if costs[task_id] > left or pending[task_id]['utility_score'] <= 0 and not dependents[task_id]:
+            continue
+        chosen.append(task_id)
+        left -= costs[task_id]
+        for child in dependents[task_id]:
+            waiting[child] -= 1
+            if waiting[child] == 0:
+                heapq.heappush(heap, (-score[child], child))
+    return chosen
+
+
+def _ratio(pair: Tuple[float, int]) -> float:
+    """
+    Utility per budget unit; free tasks with positive utility come first.
+    """
+    utility, cost = pair
+    return utility / cost if cost else float('inf') if utility > 0 else 0.0
@@ -0,0 +1,128 @@
+import heapq
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+
+def roi(task: Dict[str, Any]) -> float:
+    """
+    Calculate a task's ROI (utility / cost). Tasks with no cost have an ROI of 0.
+
+    :param task: The task dictionary.
+    :return: The task's utility-to-cost ratio.
+    """
+    return ratio(task['utility_score'], task['cost_hours'])
+
+
+def ratio(utility_score: float, cost_hours: float) -> float:
+    """
+    The ROI of a utility score and cost, for callers that already have both.
+
+    :param utility_score: The task's utility score.
+    :param cost_hours: The task's cost in hours.
+    :return: utility_score / cost_hours, or 0 if the cost is 0.
+    """
+    return utility_score / cost_hours if cost_hours != 0 else 0
+
+
+class RoiQueue:
+    """
+    A max-priority queue of task IDs ordered by ROI, with lazy deletion.
+
+    Updating or removing a task only records the change; stale heap entries are
+    skipped when read and dropped when they outnumber the live ones. Ties are
+    broken by task ID so the order is deterministic.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty queue.
+        """
+        self._heap: List[Tuple[float, int, int]] = []
+        self._live: Dict[int, int] = {}
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def __contains__(self, task_id: int) -> bool:
+        return task_id in self._live
+
+    def push(self, task_id: int, score: float) -> None:
+        """
+        Insert a task, or move it if it is already queued.
+
+        :param task_id: ID of the task.
+        :param score: The task's ROI.
+        """
+        self._seq += 1
+        self._live[task_id] = self._seq
+        heapq.heappush(self._heap, (-score, task_id, self._seq))
+        self._maybe_compact()
+
+    def push_many(self, items: Iterable[Tuple[int, float]]) -> None:
+        """
+        Insert many tasks at once with a single heapify.
+
+        :param items: (task ID, ROI) pairs.
+        """
+        for task_id, score in items:
+            self._seq += 1
+            self._live[task_id] = self._seq
+            self._heap.append((-score, task_id, self._seq))
+        heapq.heapify(self._heap)
+        self._maybe_compact()
+
+    def discard(self, task_id: int) -> None:
+        """
+        Remove a task if it is queued.
+
+        :param task_id: ID of the task.
+        """
+        if self._live.pop(task_id, None) is not None:
+            self._maybe_compact()
+
+    def _maybe_compact(self) -> None:
+        """
+        Rebuild the heap without stale entries once they dominate it.
+        """
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._live):
+            self._heap = [entry for entry in self._heap if self._live.get(entry[1]) == entry[2]]
+            heapq.heapify(self._heap)
+
+    def __iter__(self) -> Iterator[int]:
+        """
+        Yield task IDs from highest to lowest ROI without modifying the heap.
+
+        Walks the heap as a tree using a small frontier heap, so the first k
+        results cost O(k log k). The queue must not be modified while iterating.
+        """
+        heap = self._heap
+        if not heap:
+            return
+        frontier = [(heap[0], 0)]
+        while frontier:
+            entry, i = heapq.heappop(frontier)
+            if self._live.get(entry[1]) == entry[2]:
+                yield entry[1]
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+
+    def top_k(self, k: int) -> List[int]:
+        """
+        Return the IDs of the k tasks with the highest ROI.
+
+        :param k: Number of tasks to return.
+        :return: Task IDs, highest ROI first.
+        """
+        return list(islice(self, k))
+
+    def page(self, offset: int, limit: int) -> List[int]:
+        """
+        Return one page of task IDs in ROI order.
+
+        :param offset: Number of tasks to skip.
+        :param limit: Maximum number of tasks to return.
+        :return: Task IDs, highest ROI first.
+        """
+        return list(islice(self, offset, offset + limit))
@@ -0,0 +1,560 @@
+import datetime
+import json
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from analytics import HAS_NUMPY, TaskColumns, task_stats_python
+from json_stream import iter_json_array
+from link_graph import LinkGraph
+from locking import VersionConflictError
+from search_index import tokenize
+
+# Columns stored directly; any other task fields are kept as JSON in `extra`.
+COLUMNS = ('id', 'description', 'utility_score', 'cost_hours', 'status', 'deadline', 'version')
+
+_ROI_SQL = "CASE WHEN cost_hours != 0 THEN utility_score * 1.0 / cost_hours ELSE 0 END"
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    utility_score NUMERIC NOT NULL,
+    cost_hours REAL NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    deadline TEXT,
+    roi REAL NOT NULL DEFAULT 0,
+    extra TEXT,
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_roi ON tasks (roi DESC, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_status_roi ON tasks (status, roi DESC, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_deadline ON tasks (deadline);
+CREATE TABLE IF NOT EXISTS task_links (
+    task_id INTEGER NOT NULL REFERENCES tasks (id) ON DELETE CASCADE,
+    linked_task_id INTEGER NOT NULL REFERENCES tasks (id) ON DELETE CASCADE,
+    PRIMARY KEY (task_id, linked_task_id)
+);
+CREATE INDEX IF NOT EXISTS idx_task_links_reverse ON task_links (linked_task_id);
+CREATE TRIGGER IF NOT EXISTS trg_tasks_roi_insert AFTER INSERT ON tasks BEGIN
+    UPDATE tasks SET roi = {_ROI_SQL} WHERE id = new.id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_tasks_roi_update AFTER UPDATE OF utility_score, cost_hours ON tasks BEGIN
+    UPDATE tasks SET roi = {_ROI_SQL} WHERE id = new.id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_tasks_depends_delete AFTER DELETE ON tasks BEGIN
+    UPDATE tasks SET extra = json_set(extra, '$.depends_on', json((
+        SELECT json_group_array(value) FROM json_each(tasks.extra, '$.depends_on') WHERE value != old.id
+    )))
+    WHERE extra IS NOT NULL AND EXISTS (SELECT 1 FROM json_each(tasks.extra, '$.depends_on') WHERE value = old.id);
+END;
+"""
+
+# Trigram tokens let a query word match inside longer words ("econ" in "microeconomics")
+FTS_SCHEMA = """
+DROP TRIGGER IF EXISTS trg_tasks_fts_insert;
+DROP TRIGGER IF EXISTS trg_tasks_fts_delete;
+DROP TRIGGER IF EXISTS trg_tasks_fts_update;
+DROP TABLE IF EXISTS tasks_fts;
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_trigram USING fts5 (
+    description, content='tasks', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS trg_tasks_trigram_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO tasks_trigram (rowid, description) VALUES (new.id, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_tasks_trigram_delete AFTER DELETE ON tasks BEGIN
+    INSERT INTO tasks_trigram (tasks_trigram, rowid, description) VALUES ('delete', old.id, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_tasks_trigram_update AFTER UPDATE OF description ON tasks BEGIN
+    INSERT INTO tasks_trigram (tasks_trigram, rowid, description) VALUES ('delete', old.id, old.description);
+    INSERT INTO tasks_trigram (rowid, description) VALUES (new.id, new.description);
+END;
+"""
+
+# SQLite limits the number of host parameters in one statement
+_IN_CHUNK = 500
+
+
+class SqliteTaskManager:
+    """
+    A TaskManager with the same public API, backed by a SQLite database.
+
+    Tasks are read on demand instead of being loaded into memory, so commands
+    that touch a few tasks (view, list with a limit, search) stay fast on large
+    stores. The database runs in WAL mode and has indexes on id, status,
+    deadline and ROI, with links kept in a separate join table. SQLite's own
+    locking makes it safe to share between processes; compare-and-swap edits
+    check the version column in the same UPDATE that bumps it.
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Open (and if needed create) the SQLite database.
+
+        :param file_path: Path to the database file.
+        """
+        self.file_path = file_path
+        self._conn = sqlite3.connect(file_path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+            if 'version' not in {row['name'] for row in self._conn.execute("PRAGMA table_info(tasks)")}:
+                self._conn.execute("ALTER TABLE tasks ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+            indexed = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'tasks_trigram'"
+            ).fetchone() is not None
+            try:
+                self._conn.executescript(FTS_SCHEMA)
+                self._has_fts = True
+            except sqlite3.OperationalError:  # SQLite without FTS5 or its trigram tokenizer (3.34+)
+                self._has_fts = False
+            if self._has_fts and not indexed:
+                # New table over existing rows: index them once
+                self._conn.execute("INSERT INTO tasks_trigram (tasks_trigram) VALUES ('rebuild')")
+
+    @property
+    def tasks(self) -> List[Dict[str, Any]]:
+        """
+        All tasks, in ID order. This reads the whole table; prefer the
+        targeted queries for large stores.
+        """
+        return self._fetch("SELECT * FROM tasks ORDER BY id")
+
+    def load_tasks(self) -> None:
+        """
+        Nothing to load; tasks are read from the database on demand.
+        """
+
+    def refresh(self) -> bool:
+        """
+        Nothing to refresh; every query reads the database.
+
+        :return: Always False.
+        """
+        return False
+
+    def save_tasks(self) -> None:
+        """
+        Commit any pending changes.
+        """
+        self._conn.commit()
+
+    def close(self) -> None:
+        """
+        Close the database connection.
+        """
+        self._conn.close()
+
+    @contextmanager
+    def batch(self) -> Iterator["SqliteTaskManager"]:
+        """
+        Present for parity with TaskManager.batch. Every change is already its
+        own transaction, and WAL mode keeps each commit cheap.
+        """
+        yield self
+
+    def _fetch(self, sql: str, params: Iterable[Any] = ()) -> List[Dict[str, Any]]:
+        """
+        Run a query over the tasks table and convert the rows to task dictionaries.
+
+        :param sql: A SELECT returning full task rows.
+        :param params: Query parameters.
+        :return: List of task dictionaries, in query order.
+        """
+        rows = self._conn.execute(sql, tuple(params)).fetchall()
+        links: Dict[int, List[int]] = {row['id']: [] for row in rows}
+        ids = list(links)
+        for start in range(0, len(ids), _IN_CHUNK):
+            chunk = ids[start:start + _IN_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            for task_id, linked_id in self._conn.execute(
+                f"SELECT task_id, linked_task_id FROM task_links WHERE task_id IN ({placeholders}) ORDER BY rowid",
+                chunk,
+            ):
+                links[task_id].append(linked_id)
+
+        tasks = []
+        for row in rows:
+            task = {column: row[column] for column in COLUMNS}
+            task['linked_tasks'] = links[row['id']]
+            if row['extra']:
+                task.update(json.loads(row['extra']))
+            tasks.append(task)
+        return tasks
+
+    def _insert(self, task: Dict[str, Any]) -> None:
+        """
+        Insert a task row without committing. Links are not inserted.
+
+        :param task: The task dictionary, including its ID.
+        """
+        extra = {k: v for k, v in task.items() if k not in COLUMNS and k != 'linked_tasks'}
+        self._conn.execute(
+            "INSERT INTO tasks (id, description, utility_score, cost_hours, status, deadline, version, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (task['id'], task['description'], task['utility_score'], task['cost_hours'],
+             task.get('status', 'pending'), task.get('deadline'), task.get('version', 1),
+             json.dumps(extra) if extra else None),
+        )
+
+    def add_task(self, description: str, utility_score: int, cost_hours: float, deadline: Optional[str] = None, links: Optional[List[int]] = None) -> int:
+        """
+        Add a new task to the database.
+
+        :param description: Description of the task.
+        :param utility_score: Utility score of the task (1-100).
+        :param cost_hours: Cost in hours to complete the task.
+        :param deadline: Optional deadline in YYYY-MM-DD format.
+        :param links: Optional list of task IDs this task is linked to.
+        :return: The ID of the newly created task.
+        """
+        with self._conn:
+            # Take the write lock before reading MAX(id) so concurrent adds get distinct IDs
+            self._conn.execute("BEGIN IMMEDIATE")
+            new_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM tasks").fetchone()[0]
+            self._insert({
+                'id': new_id,
+                'description': description,
+                'utility_score': utility_score,
+                'cost_hours': cost_hours,
+                'status': 'pending',
+                'deadline': deadline,
+            })
+            # Links to IDs that do not exist are dropped, as in TaskManager
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO task_links (task_id, linked_task_id) SELECT ?, id FROM tasks WHERE id = ?",
+                [(new_id, linked_id) for linked_id in dict.fromkeys(links or []) if linked_id != new_id],
+            )
+        return new_id
+
+    def search_tasks(self, keyword: str) -> List[Dict[str, Any]]:
+        """
+        Search for tasks whose descriptions contain every word of the keyword
+        (case-insensitive). A word also matches inside longer words, so "econ"
+        finds "microeconomics".
+
+        :param keyword: Keyword(s) to search for in task descriptions.
+        :return: List of matching tasks, best matches first.
+        """
+        tokens = list(dict.fromkeys(tokenize(keyword)))
+        if not tokens:
+            return self.tasks if not keyword.strip() else []
+        # The trigram index only answers words of three or more characters
+        indexed = [token for token in tokens if len(token) >= 3] if self._has_fts else []
+        short = [token for token in tokens if token not in indexed]
+        where = " AND ".join(["lower(tasks.description) LIKE ? ESCAPE '\\'"] * len(short))
+        # Words are letters, digits and underscores; only "_" needs escaping
+        params = ['%' + token.replace('_', '\\_') + '%' for token in short]
+        if indexed:
+            query = " AND ".join(f'"{token}"' for token in indexed)
+            return self._fetch(
+                "SELECT tasks.* FROM tasks_trigram JOIN tasks ON tasks.id = tasks_trigram.rowid "
+                f"WHERE tasks_trigram MATCH ?{' AND ' + where if where else ''} "
+                "ORDER BY bm25(tasks_trigram), tasks.id",
+                (query, *params),
+            )
+        return self._fetch(f"SELECT * FROM tasks WHERE {where} ORDER BY id", params)
+
+    def edit_task(self, task_id: int, expected_version: Optional[int] = None, **kwargs) -> bool:
+        """
+        Edit a task's fields by its ID.
+
+        :param task_id: ID of the task to edit.
+        :param expected_version: If given, only edit the task if it is still at this version.
+        :param kwargs: Fields to update (e.g., utility_score, status).
+        :return: True if the task was updated, False if not found.
+        :raises VersionConflictError: If the task is not at expected_version.
+        """
+        kwargs.pop('id', None)
+        kwargs.pop('version', None)
+        with self._conn:
+            # Bumping the version first starts the write transaction, so the
+            # check and the update cannot interleave with another writer
+            if not self._bump_version(task_id, expected_version):
+                return False
+            row = self._conn.execute("SELECT extra FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            columns = {k: v for k, v in kwargs.items() if k in COLUMNS}
+            if columns:
+                assignments = ", ".join(f"{column} = ?" for column in columns)
+                self._conn.execute(f"UPDATE tasks SET {assignments} WHERE id = ?", (*columns.values(), task_id))
+            if 'linked_tasks' in kwargs:
+                self._conn.execute("DELETE FROM task_links WHERE task_id = ?", (task_id,))
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO task_links (task_id, linked_task_id) SELECT ?, id FROM tasks WHERE id = ?",
+                    [(task_id, linked_id) for linked_id in dict.fromkeys(kwargs['linked_tasks']) if linked_id != task_id],
+                )
+            extra_updates = {k: v for k, v in kwargs.items() if k not in COLUMNS and k != 'linked_tasks'}
+            if extra_updates:
+                extra = json.loads(row['extra']) if row['extra'] else {}
+                extra.update(extra_updates)
+                self._conn.execute("UPDATE tasks SET extra = ? WHERE id = ?", (json.dumps(extra), task_id))
+        return True
+
+    def delete_task(self, task_id: int, expected_version: Optional[int] = None) -> bool:
+        """
+        Delete a task by its ID, along with its links. A trigger drops its ID
+        from the prerequisites of other tasks.
+
+        :param task_id: ID of the task to delete.
+        :param expected_version: If given, only delete the task if it is still at this version.
+        :return: True if the task was deleted, False if not found.
+        :raises VersionConflictError: If the task is not at expected_version.
+        """
+        with self._conn:
+            if expected_version is None:
+                return self._conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,)).rowcount > 0
+            if self._conn.execute("DELETE FROM tasks WHERE id = ? AND version = ?", (task_id, expected_version)).rowcount:
+                return True
+            self._raise_conflict(task_id, expected_version)
+            return False
+
+    def _bump_version(self, task_id: int, expected_version: Optional[int] = None) -> bool:
+        """
+        Increment a task's version, optionally only if it is at expected_version.
+
+        :return: True if bumped, False if the task does not exist.
+        :raises VersionConflictError: If the task is not at expected_version.
+        """
+        if expected_version is None:
+            return self._conn.execute("UPDATE tasks SET version = version + 1 WHERE id = ?", (task_id,)).rowcount > 0
+        if self._conn.execute(
+            "UPDATE tasks SET version = version + 1 WHERE id = ? AND version = ?", (task_id, expected_version)
+        ).rowcount:
+            return True
+        self._raise_conflict(task_id, expected_version)
+        return False
+
+    def _raise_conflict(self, task_id: int, expected_version: int) -> None:
+        """
+        Raise VersionConflictError if the task exists (at another version); return if it does not.
+        """
+        row = self._conn.execute("SELECT version FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        if row is not None:
+            raise VersionConflictError(task_id, expected_version, row['version'])
+
+    def get_best_tasks(self, k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get pending tasks sorted by utility-to-cost ratio in descending order.
+
+        :param k: Optional number of tasks to return.
+        :return: List of pending tasks sorted by (utility_score / cost_hours).
+        """
+        return self._fetch(
+            "SELECT * FROM tasks WHERE status = 'pending' ORDER BY roi DESC, id LIMIT ?",
+            (-1 if k is None else k,),
+        )
+
+    def get_tasks_by_roi(self, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get one page of all tasks sorted by utility-to-cost ratio in descending order.
+
+        :param offset: Number of tasks to skip.
+        :param limit: Optional maximum number of tasks to return.
+        :return: List of tasks sorted by (utility_score / cost_hours).
+        """
+        return self._fetch(
+            "SELECT * FROM tasks ORDER BY roi DESC, id LIMIT ? OFFSET ?",
+            (-1 if limit is None else limit, offset),
+        )
+
+    def get_task_by_id(self, task_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get a task by its ID.
+
+        :param task_id: ID of the task to retrieve.
+        :return: The task dictionary if found, None otherwise.
+        """
+        found = self._fetch("SELECT * FROM tasks WHERE id = ?", (task_id,))
+        return found[0] if found else None
+
+    def link_tasks(self, task_id: int, linked_task_id: int) -> bool:
+        """
+        Link two tasks together. Creates a bidirectional relationship.
+
+        :param task_id: ID of the first task.
+        :param linked_task_id: ID of the task to link to.
+        :return: True if successful, False if either task not found.
+        """
+        with self._conn:
+            if not self._both_exist(task_id, linked_task_id):
+                return False
+            for a, b in {(task_id, linked_task_id), (linked_task_id, task_id)}:
+                if self._conn.execute("INSERT OR IGNORE INTO task_links (task_id, linked_task_id) VALUES (?, ?)", (a, b)).rowcount:
+                    self._bump_version(a)
+        return True
+
+    def unlink_tasks(self, task_id: int, linked_task_id: int) -> bool:
+        """
+        Remove the link between two tasks. Removes bidirectional relationship.
+
+        :param task_id: ID of the first task.
+        :param linked_task_id: ID of the task to unlink from.
+        :return: True if successful, False if either task not found.
+        """
+        with self._conn:
+            if not self._both_exist(task_id, linked_task_id):
+                return False
+            for a, b in {(task_id, linked_task_id), (linked_task_id, task_id)}:
+                if self._conn.execute("DELETE FROM task_links WHERE task_id = ? AND linked_task_id = ?", (a, b)).rowcount:
+                    self._bump_version(a)
+        return True
+
+    def _both_exist(self, task_id: int, other_id: int) -> bool:
+        count = self._conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE id IN (?, ?)", (task_id, other_id)
+        ).fetchone()[0]
+        return count == len({task_id, other_id})
+
+    def get_linked_tasks(self, task_id: int) -> List[Dict[str, Any]]:
+        """
+        Get all tasks linked to a specific task.
+
+        :param task_id: ID of the task to get links for.
+        :return: List of linked task dictionaries.
+        """
+        return self._fetch(
+            "SELECT tasks.* FROM task_links JOIN tasks ON tasks.id = task_links.linked_task_id "
+            "WHERE task_links.task_id = ? ORDER BY task_links.rowid",
+            (task_id,),
+        )
+
+    def get_link_graph(self) -> LinkGraph:
+        """
+        Build the graph of task links for traversal queries. Only the ID and
+        link tables are read, not the task rows themselves.
+
+        :return: A snapshot of the link graph.
+        """
+        graph = LinkGraph()
+        for (task_id,) in self._conn.execute("SELECT id FROM tasks"):
+            graph.add_node(task_id)
+        for task_id, linked_id in self._conn.execute("SELECT task_id, linked_task_id FROM task_links"):
+            graph.add_edge(task_id, linked_id)
+        return graph
+
+    def get_stats(self, days: int = 7, top: int = 5, today: Optional[datetime.date] = None) -> Dict[str, Any]:
+        """
+        Get dashboard statistics (see TaskManager.get_stats). Only the numeric
+        and status columns are read, into a fresh columnar snapshot.
+
+        :param days: Size of the due-soon window in days.
+        :param top: Number of best-ROI pending tasks to list.
+        :param today: Reference date (defaults to today).
+        :return: The statistics dictionary.
+        """
+        today = today or datetime.date.today()
+        rows = [dict(row) for row in self._conn.execute("SELECT id, utility_score, cost_hours, status, deadline FROM tasks")]
+        if HAS_NUMPY:
+            return TaskColumns.from_tasks(rows).stats(today, days, top)
+        return task_stats_python(rows, today, days, top)
+
+    def import_tasks(self, tasks: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insert existing task dictionaries (keeping their IDs) in one transaction.
+        Links to tasks that are not part of the import are dropped.
+
+        :param tasks: Task dictionaries in the tasks.json shape.
+        :return: Number of tasks inserted.
+        """
+        pending_links = []
+        count = 0
+        with self._conn:
+            for task in tasks:
+                self._insert(task)
+                pending_links.extend((task['id'], linked_id) for linked_id in task.get('linked_tasks', []))
+                count += 1
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO task_links (task_id, linked_task_id) "
+                "SELECT ?, id FROM tasks WHERE id = ?",
+                pending_links,
+            )
+        return count
+
+    def add_tasks(self, tasks: Iterable[Dict[str, Any]], chunk_size: int = 1000) -> List[int]:
+        """
+        Add many tasks, committing them in transactions of chunk_size tasks.
+
+        IDs and references work as in TaskManager.add_tasks. Links and
+        dependencies are written in one last transaction, once every task in
+        the import has its ID.
+
+        :param tasks: Validated task dictionaries (see bulk.read_tasks); may be a generator.
+        :param chunk_size: Tasks per transaction.
+        :return: The new IDs, in input order.
+        """
+        new_ids: Dict[Any, int] = {}
+        pending_links = []
+        pending_deps = []
+        added: List[int] = []
+        tasks = iter(tasks)
+        while True:
+            with self._conn:
+                self._conn.execute("BEGIN IMMEDIATE")
+                next_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM tasks").fetchone()[0]
+                count = 0
+                for task in tasks:
+                    row = {field: value for field, value in task.items() if field not in ('linked_tasks', 'depends_on')}
+                    row['id'] = next_id
+                    row['version'] = 1
+                    self._insert(row)
+                    if task.get('id') is not None:
+                        new_ids[task['id']] = next_id
+                    pending_links.extend((next_id, key) for key in task.get('linked_tasks') or [])
+                    if task.get('depends_on') is not None:
+                        pending_deps.append((next_id, task['depends_on']))
+                    added.append(next_id)
+                    next_id += 1
+                    count += 1
+                    if count == chunk_size:
+                        break
+            if count < chunk_size:
+                break
+        links = []
+        for task_id, key in pending_links:
+            other_id = new_ids.get(key)
+            if other_id is not None and other_id != task_id:
+                links += [(task_id, other_id), (other_id, task_id)]
+        deps = [
+            (json.dumps([new_ids[key] for key in dict.fromkeys(keys) if new_ids.get(key, task_id) != task_id]), task_id)
+            for task_id, keys in pending_deps
+        ]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO task_links (task_id, linked_task_id) "
+                "SELECT ?, id FROM tasks WHERE id = ?",
+                links,
+            )
+            self._conn.executemany(
+                "UPDATE tasks SET extra = json_set(COALESCE(extra, '{}'), '$.depends_on', json(?)) WHERE id = ?",
+                deps,
+            )
+        return added
+
+    def iter_tasks(self, chunk_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every task in ID order, reading chunk_size rows at a time.
+        """
+        last_id = 0
+        while True:
+            chunk = self._fetch("SELECT * FROM tasks WHERE id > ? ORDER BY id LIMIT ?", (last_id, chunk_size))
+            yield from chunk
+            if len(chunk) < chunk_size:
+                return
+            last_id = chunk[-1]['id']
+
+def migrate_json_to_sqlite(json_path: str, db_path: str) -> int:
+    """
+    Copy every task from a tasks.json file into a SQLite database.
+
+    :param json_path: Path to the existing tasks.json file.
+    :param db_path: Path to the SQLite database to create or fill.
+    :return: Number of tasks migrated.
+    """
+    store = SqliteTaskManager(db_path)
+    try:
+        return store.import_tasks(iter_json_array(json_path))
+    finally:
+        store.close()
@@ -1,38 +1,491 @@
+import datetime
+import functools
+import heapq
+import io
 import json
-from typing import List, Dict, Any, Optional
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Set, Union
+
+from analytics import HAS_NUMPY, TaskColumns, task_stats_python
+from columnar import ColumnarFile, ColumnarReader, is_columnar, write_columnar
+from durable import atomic_write, atomic_write_json
+from journal import TaskJournal, DEFAULT_COMPACT_THRESHOLD
+from locking import FileLock, VersionConflictError, file_stamp
+from priority import RoiQueue, ratio, roi
+from json_stream import OffsetIndex, iter_json_array, write_json_array
+from link_graph import LinkGraph
+from records import PENDING, Task, json_default
+from search_index import SearchIndex
+
+# Files with these extensions are opened with the SQLite backend
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+# Lazy searches save their index beside the snapshot with this extension
+SEARCH_INDEX_SUFFIX = '.search'
+# How each task field is stored in a columnar snapshot
+TASK_COLUMNS = (
+    ('id', 'int'),
+    ('description', 'str'),
+    ('utility_score', 'int'),
+    ('cost_hours', 'float'),
+    ('status', 'status'),
+    ('deadline', 'date'),
+    ('linked_tasks', 'ints'),
+    ('version', 'int'),
+)
+
+
+def open_task_manager(file_path: str, **kwargs):
+    """
+    Open a task store with the backend that matches the file extension.
+
+    :param file_path: Path to tasks.json, to a columnar snapshot (.tcol), or to a
+        SQLite database (.db/.sqlite/.sqlite3).
+    :param kwargs: Extra options for the JSON TaskManager (e.g. journaled=True).
+    :return: A TaskManager, or a SqliteTaskManager with the same public API.
+    """
+    if file_path.lower().endswith(SQLITE_SUFFIXES):
+        from sqlite_store import SqliteTaskManager
+        return SqliteTaskManager(file_path)
+    return TaskManager(file_path, **kwargs)
+
+
+def read_snapshot(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the tasks of a snapshot file, JSON or columnar depending on its extension.
+
+    :param path: Path to the file.
+    :raises FileNotFoundError: If the file does not exist.
+    """
+    if is_columnar(path):
+        with ColumnarFile(path) as snapshot:
+            yield from snapshot
+    else:
+        yield from iter_json_array(path)
+
+
+def write_snapshot(path: str, tasks: Iterable[Dict[str, Any]]) -> int:
+    """
+    Atomically write tasks to a snapshot file, JSON or columnar depending on its extension.
+
+    :param path: Path to the file.
+    :param tasks: The tasks; they are written as they are read.
+    :return: Number of tasks written.
+    """
+    counts = []
+    if is_columnar(path):
+        atomic_write(path, lambda file: counts.append(write_columnar(file, tasks, TASK_COLUMNS)), binary=True)
+    else:
+        atomic_write(path, lambda file: counts.append(write_json_array(file, tasks, indent=4, default=json_default)))
+    return counts[0]
+
+
+def convert_snapshot(source: str, destination: str) -> int:
+    """
+    Copy a task store between tasks.json and the columnar format, one task at a time.
+
+    :param source: Snapshot to read (.json or .tcol).
+    :param destination: Snapshot to write (.json or .tcol).
+    :return: Number of tasks copied.
+    """
+    return write_snapshot(destination, read_snapshot(source))
+
+def _version(task: Dict[str, Any]) -> int:
+    """
+    Version of a task record; tasks saved before versioning count as version 1.
+    """
+    return task.get('version', 1)
+
+
+def _locked(method):
+    """
+    Run a mutating TaskManager method under the store lock, on the latest state.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._writing():
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class TaskManager:
     """
     A class to manage tasks stored in a local tasks.json file.
+
+    Several processes may share one store. Every mutation holds an advisory
+    lock on ``<file_path>.lock``, reloads the store if another process changed
+    it, and is saved before the lock is released, so no update is lost. Reads
+    take no lock: files are only ever replaced atomically. Each task carries a
+    ``version`` that every change increments, and edit_task/delete_task can
+    require an expected version (compare-and-swap).
     """
 
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, journaled: bool = False, compact_threshold: int = DEFAULT_COMPACT_THRESHOLD, lazy: bool = False):
         """
         Initialize the TaskManager with the path to the tasks.json file.
 
         :param file_path: Path to the tasks.json file.
+        :param journaled: If True, mutations are appended to ``<file_path>.journal``
+            instead of rewriting tasks.json, which is compacted in the background.
+        :param compact_threshold: Journal size in bytes that triggers compaction.
+        :param lazy: If True, tasks are only loaded when first needed. Until then,
+            get_task_by_id, get_linked_tasks and search_tasks read the file
+            directly through a sidecar offset index or a streaming scan.
+            A columnar snapshot (``.tcol``, see columnar.py) also serves
+            get_tasks_by_roi and get_best_tasks from its numeric columns.
         """
         self.file_path = file_path
-        self.tasks: List[Dict[str, Any]] = []
-        self.load_tasks()
+        self._columnar = is_columnar(file_path)
+        self._loaded = False
+        self._offsets = ColumnarReader(file_path) if self._columnar else OffsetIndex(file_path)
+        # id -> task, in the order tasks were added; the tasks are slotted Task
+        # records (see records.py), not dicts. Deleting keeps the order in O(1).
+        self._by_id: Dict[int, Task] = {}
+        self._max_id = 0
+        # Prerequisite id -> ids of the tasks whose depends_on lists it
+        self._dependents: Dict[int, Set[int]] = {}
+        # Inverted index for search_tasks, built on first search
+        self._search: Optional[SearchIndex] = None
+        # All tasks, and pending tasks only, ordered by ROI
+        self._by_roi = RoiQueue()
+        self._pending_by_roi = RoiQueue()
+        # Set-based adjacency with a reverse index, mirroring each task's linked_tasks
+        self._graph = LinkGraph()
+        # NumPy columnar snapshot for analytics, built on first use
+        self._columns: Optional[TaskColumns] = None
+        self._journal = TaskJournal(file_path + ".journal", compact_threshold) if journaled else None
+        self._compactor: Optional[threading.Thread] = None
+        self._lock = FileLock(file_path + ".lock")
+        # Stamps of the files the in-memory state was loaded from (see refresh)
+        self._stamp = None
+        # Group commit: inside batch(), mutations are persisted together on exit
+        self._batch_depth = 0
+        self._batched: List[Dict[str, Any]] = []
+        if not lazy:
+            self.load_tasks()
+
+    @property
+    def tasks(self) -> List[Task]:
+        """
+        All tasks in the order they were added, loading them first if needed.
+        The list is new on every call; the Task records in it are the stored
+        ones and can be read and changed like dicts.
+        """
+        self._ensure_loaded()
+        return list(self._by_id.values())
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.load_tasks()
+
+    def _can_read_file_directly(self) -> bool:
+        """
+        Return True if reads can bypass loading, i.e. nothing is loaded yet and
+        tasks.json is the complete state (no journal records to replay).
+        """
+        if self._loaded:
+            return False
+        return not self._journal or (self._journal.size() == 0 and not self._journal.has_rotated())
 
     def load_tasks(self) -> None:
         """
-        Load tasks from the JSON file. Handles FileNotFoundError.
+        Load tasks from the JSON file and replay the journal, if any. Handles FileNotFoundError.
+
+        The file is parsed incrementally, one task at a time, to keep peak memory low.
+        No lock is taken: if another process compacts the store while it is being
+        read, the read is simply retried.
+        """
+        while True:
+            stamp = self._disk_stamp()
+            tasks = self._read_state()
+            # Appends to the active journal are safe to race with; a replaced
+            # snapshot or rotated journal is not
+            if self._disk_stamp()[:2] == stamp[:2]:
+                break
+        self._by_id = {task.id: task for task in tasks}
+        self._stamp = stamp
+        self._loaded = True
+        self._rebuild_index()
+        # A rotated journal nobody is compacting means a compaction never finished
+        if self._journal and self._journal.has_rotated() and not self._compacting():
+            self._finish_compaction()
+
+    def _finish_compaction(self) -> None:
+        """
+        Under the store lock, fold a leftover rotated journal into a fresh snapshot.
+        """
+        with self._lock:
+            self.refresh()
+            if self._journal.has_rotated() and not self._compacting():
+                self.save_tasks()
+
+    def _read_state(self) -> List[Task]:
+        """
+        Read tasks.json and replay the journal on top of it.
+
+        :return: The tasks.
         """
         try:
-            with open(self.file_path, 'r') as file:
-                self.tasks = json.load(file)
+            # Each object becomes a record as soon as it is parsed, so the dicts never pile up
+            tasks = [Task.from_dict(task) for task in read_snapshot(self.file_path)]
         except FileNotFoundError:
-            self.tasks = []
+            tasks = []
+        if self._journal:
+            by_id = {task['id']: task for task in tasks}
+            for record in self._journal.replay():
+                self._apply_record(by_id, record)
+            tasks = list(by_id.values())
+        return tasks
+
+    def _disk_stamp(self) -> tuple:
+        """
+        Stamps of tasks.json, the rotated journal and the active journal.
+        """
+        if not self._journal:
+            return (file_stamp(self.file_path), None, None)
+        return (file_stamp(self.file_path), file_stamp(self._journal.rotated_path), file_stamp(self._journal.path))
+
+    def refresh(self) -> bool:
+        """
+        Reload the tasks if another process has changed the store since they were
+        loaded. This costs a few stat calls when nothing changed.
+
+        :return: True if the tasks were reloaded.
+        """
+        if not self._loaded or self._disk_stamp() == self._stamp:
+            return False
+        self.load_tasks()
+        return True
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """
+        Hold the store lock around a read-modify-write, starting from the latest
+        state on disk. The mutation must be saved before the block exits.
+        """
+        with self._lock:
+            if self._loaded:
+                self.refresh()
+            else:
+                self.load_tasks()
+            if self._journal and self._journal.has_rotated() and not self._compacting():
+                self._finish_compaction()
+            yield
+
+    def _rebuild_index(self) -> None:
+        """
+        Rebuild the ROI, link and dependency indexes from self._by_id; the
+        search index is rebuilt on the next search. Links and prerequisites
+        naming tasks that no longer exist are dropped.
+        """
+        # Hot loops over every task read the record attributes directly
+        tasks = list(self._by_id.values())
+        self._max_id = max(self._by_id, default=0)
+        self._search = None
+        scores = [(task.id, ratio(task.utility_score, task.cost_hours)) for task in tasks]
+        self._by_roi = RoiQueue()
+        self._by_roi.push_many(scores)
+        self._pending_by_roi = RoiQueue()
+        self._pending_by_roi.push_many(
+            item for item, task in zip(scores, tasks) if task.status_code == PENDING
+        )
+        self._graph = LinkGraph.from_links((task.id, task.get('linked_tasks', [])) for task in tasks)
+        self._columns = None
+        self._dependents = {}
+        for task in tasks:
+            links = task.get('linked_tasks')
+            if links and any(linked_id not in self._by_id for linked_id in links):
+                task['linked_tasks'] = [linked_id for linked_id in links if linked_id in self._by_id]
+            depends_on = task.get('depends_on')
+            if depends_on:
+                if any(dep not in self._by_id for dep in depends_on):
+                    task['depends_on'] = depends_on = [dep for dep in depends_on if dep in self._by_id]
+                self._add_dependent(task.id, depends_on)
+
+    def _add_dependent(self, task_id: int, depends_on: Iterable[int]) -> None:
+        for dep in depends_on:
+            dependents = self._dependents.get(dep)
+            if dependents is None:
+                dependents = self._dependents[dep] = set()
+            dependents.add(task_id)
+
+    def _remove_dependent(self, task_id: int, depends_on: Iterable[int]) -> None:
+        for dep in depends_on:
+            dependents = self._dependents.get(dep)
+            if dependents is not None:
+                dependents.discard(task_id)
+                if not dependents:
+                    del self._dependents[dep]
+
+    def _rank_task(self, task: Task) -> None:
+        """
+        Insert or move a task in the ROI indexes.
+
+        :param task: The task record.
+        """
+        score = ratio(task.utility_score, task.cost_hours)
+        self._by_roi.push(task.id, score)
+        if task.status_code == PENDING:
+            self._pending_by_roi.push(task.id, score)
+        else:
+            self._pending_by_roi.discard(task.id)
 
     def save_tasks(self) -> None:
         """
-        Save the current tasks to the JSON file.
+        Save the current tasks to the JSON file (or columnar snapshot). In
+        journaled mode this also compacts the journal into the snapshot.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            if self._columnar:
+                atomic_write(self.file_path, lambda file: write_columnar(file, self._by_id.values(), TASK_COLUMNS), binary=True)
+            else:
+                atomic_write_json(self.file_path, list(self._by_id.values()), indent=4, default=json_default)
+            if self._journal:
+                # A pending background compaction sees its rotated journal gone and skips
+                self._journal.clear()
+            self._stamp = self._disk_stamp()
+
+    def close(self) -> None:
+        """
+        Wait for any background compaction to finish. Must not be called inside batch().
+        """
+        if self._compactor:
+            self._compactor.join()
+            self._compactor = None
+
+    def _commit(self, record: Dict[str, Any]) -> None:
+        """
+        Persist a single mutation, either by appending it to the journal or by
+        rewriting the whole file.
+
+        :param record: The mutation record describing the change.
+        """
+        if self._batch_depth:
+            self._batched.append(record)
+            return
+        if not self._journal:
+            self.save_tasks()
+            return
+        self._journal.append(record)
+        self._maybe_compact()
+        self._stamp = self._disk_stamp()
+
+    @contextmanager
+    def batch(self) -> Iterator["TaskManager"]:
+        """
+        Group several mutations into one durable write (group commit).
+
+        Inside the block changes apply in memory as usual; on exit they are
+        persisted together with a single snapshot rewrite, or a single journal
+        append and fsync in journaled mode. Batches may be nested; only the
+        outermost one writes. Changes are written even if the block raises,
+        since they have already been applied in memory. The store lock is held
+        for the whole block, so other processes' writes wait until it ends.
+        """
+        with self._writing():
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if not self._batch_depth and self._batched:
+                    records, self._batched = self._batched, []
+                    if self._journal:
+                        self._journal.append_many(records)
+                        self._maybe_compact()
+                        self._stamp = self._disk_stamp()
+                    else:
+                        self.save_tasks()
+
+    def _maybe_compact(self) -> None:
+        """
+        Start a background compaction if the journal has grown past its threshold.
+        """
+        if self._journal.needs_compaction() and not self._compacting():
+            self._start_compaction()
+
+    def _compacting(self) -> bool:
+        return self._compactor is not None and self._compactor.is_alive()
+
+    def _start_compaction(self) -> None:
+        """
+        Rotate the journal and write a fresh snapshot on a background thread.
+        """
+        snapshot = [dict(task.to_dict(), linked_tasks=list(task.get('linked_tasks', []))) for task in self._by_id.values()]
+        self._journal.rotate()
+        rotated = file_stamp(self._journal.rotated_path)
+        self._compactor = threading.Thread(target=self._compact, args=(snapshot, rotated))
+        self._compactor.start()
+
+    def _compact(self, snapshot: List[Dict[str, Any]], rotated: Optional[tuple]) -> None:
+        """
+        Write the snapshot and drop the rotated journal it now contains.
+
+        The snapshot is serialised before taking the store lock, so writers
+        only wait for the file write itself.
+
+        :param snapshot: Copy of the tasks taken when the journal was rotated.
+        :param rotated: Stamp of the rotated journal the snapshot includes.
+        """
+        if self._columnar:
+            buffer = io.BytesIO()
+            write_columnar(buffer, snapshot, TASK_COLUMNS)
+            data = buffer.getvalue()
+        else:
+            data = json.dumps(snapshot, indent=4, default=json_default)
+        with self._lock:
+            # Another writer already saved a full snapshot over this rotation
+            if file_stamp(self._journal.rotated_path) != rotated:
+                return
+            current = self._disk_stamp() == self._stamp
+            self._write_snapshot(data)
+            self._journal.discard_rotated()
+            if current:
+                self._stamp = self._disk_stamp()
+
+    def _write_snapshot(self, data: Union[str, bytes]) -> None:
+        """
+        Atomically replace tasks.json (temporary file, fsync, rename, fsync directory).
+
+        :param data: The serialised tasks (bytes for a columnar snapshot).
+        """
+        atomic_write(self.file_path, lambda file: file.write(data), binary=isinstance(data, bytes))
+
+    @staticmethod
+    def _apply_record(by_id: Dict[int, Task], record: Dict[str, Any]) -> None:
         """
-        with open(self.file_path, 'w') as file:
-            json.dump(self.tasks, file, indent=4)
+        Apply a journal record to tasks keyed by ID. Every record describes the
+        resulting state, so replaying a record twice is harmless.
 
+        :param by_id: Tasks keyed by their ID.
+        :param record: The journal record to apply.
+        """
+        op = record['op']
+        if op == 'add':
+            by_id[record['task']['id']] = Task.from_dict(record['task'])
+        elif op == 'edit':
+            if record['id'] in by_id:
+                by_id[record['id']].update(record['fields'])
+        elif op == 'delete':
+            # Dangling links and prerequisites are dropped when the indexes are rebuilt
+            by_id.pop(record['id'], None)
+        elif op in ('link', 'unlink'):
+            task = by_id.get(record['id'])
+            other = by_id.get(record['other'])
+            if not task or not other:
+                return
+            for a, b in ((task, other), (other, task)):
+                links = a.setdefault('linked_tasks', [])
+                if op == 'link' and b['id'] not in links:
+                    links.append(b['id'])
+                elif op == 'unlink' and b['id'] in links:
+                    links.remove(b['id'])
+                else:
+                    continue
+                a['version'] = _version(a) + 1
+
+    @_locked
     def add_task(self, description: str, utility_score: int, cost_hours: float, deadline: Optional[str] = None, links: Optional[List[int]] = None) -> int:
         """
         Add a new task to the tasks list and save it to the file.
@@ -44,66 +497,297 @@ class TaskManager:
         :param links: Optional list of task IDs this task is linked to.
         :return: The ID of the newly created task.
         """
-        new_id = max((task['id'] for task in self.tasks), default=0) + 1
-        new_task = {
-            'id': new_id,
-            'description': description,
-            'utility_score': utility_score,
-            'cost_hours': cost_hours,
-            'status': 'pending',
-            'deadline': deadline,
-            'linked_tasks': links or []
-        }
-        self.tasks.append(new_task)
-        self.save_tasks()
+        self._ensure_loaded()
+        new_id = self._max_id + 1
+        links = [linked_id for linked_id in dict.fromkeys(links or []) if linked_id in self._by_id]
+        new_task = Task(
+            id=new_id,
+            description=description,
+            utility_score=utility_score,
+            cost_hours=cost_hours,
+            status='pending',
+            deadline=deadline,
+            linked_tasks=links or [],
+            version=1
+        )
+        self._append_task(new_task)
+        for linked_id in links:
+            self._graph.add_edge(new_id, linked_id)
+        self._commit({'op': 'add', 'task': new_task.to_dict()})
         return new_id
 
+    def _append_task(self, task: Task) -> None:
+        """
+        Add a new task (without links) to the task list and every index.
+
+        :param task: The task record, with an ID above all existing ones.
+        """
+        self._by_id[task.id] = task
+        self._max_id = task.id
+        if self._search is not None:
+            self._search.add(task.id, task.description)
+        self._rank_task(task)
+        self._graph.add_node(task.id)
+        if self._columns is not None:
+            self._columns.upsert(task)
+
+    @_locked
+    def add_tasks(self, tasks: Iterable[Dict[str, Any]]) -> List[int]:
+        """
+        Add many tasks with a single write (one snapshot save, or one journal
+        append in journaled mode).
+
+        New tasks get consecutive IDs after the current highest one. A task's
+        own 'id', if present, is only a key that the 'linked_tasks' and
+        'depends_on' of tasks in the same call refer to: those references are
+        rewritten to the new IDs, references to anything else are dropped, and
+        links are made bidirectional.
+
+        :param tasks: Validated task dictionaries (see bulk.read_tasks); may be a
+            generator, which is consumed once.
+        :return: The new IDs, in input order.
+        """
+        self._ensure_loaded()
+        new_ids: Dict[Any, int] = {}
+        added = []
+        with self.batch():
+            for task in tasks:
+                new_task = Task(
+                    id=self._max_id + 1,
+                    description=task['description'],
+                    utility_score=task['utility_score'],
+                    cost_hours=task['cost_hours'],
+                    status=task.get('status', 'pending'),
+                    deadline=task.get('deadline'),
+                    linked_tasks=[],
+                    version=1,
+                )
+                for field, value in task.items():
+                    if field not in ('linked_tasks', 'depends_on'):
+                        new_task.setdefault(field, value)
+                if task.get('id') is not None:
+                    new_ids[task['id']] = new_task.id
+                self._append_task(new_task)
+                added.append((new_task, task.get('linked_tasks') or [], task.get('depends_on')))
+            # References are resolved once every task has its ID, so rows may point forward
+            for new_task, links, depends_on in added:
+                task_id = new_task.id
+                for other_id in (new_ids.get(key) for key in links):
+                    if other_id is None or other_id == task_id:
+                        continue
+                    for a, b in ((task_id, other_id), (other_id, task_id)):
+                        if not self._graph.has_edge(a, b):
+                            self._by_id[a]['linked_tasks'].append(b)
+                            self._graph.add_edge(a, b)
+                if depends_on is not None:
+                    new_task['depends_on'] = [new_ids[key] for key in dict.fromkeys(depends_on) if new_ids.get(key, task_id) != task_id]
+                    self._add_dependent(task_id, new_task['depends_on'])
+            for new_task, _, _ in added:
+                self._commit({'op': 'add', 'task': new_task.to_dict()})
+        return [new_task.id for new_task, _, _ in added]
+
+    def iter_tasks(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every task. If nothing is loaded yet, tasks.json is streamed
+        instead of loaded, so memory stays bounded, and each task is a plain
+        dict. Once loaded, the stored Task records are yielded instead; they
+        read like dicts but are live, so use edit_task to change them.
+        """
+        if self._can_read_file_directly():
+            try:
+                yield from read_snapshot(self.file_path)
+            except FileNotFoundError:
+                return
+        else:
+            yield from list(self._by_id.values())
+
     def search_tasks(self, keyword: str) -> List[Dict[str, Any]]:
         """
-        Search for tasks containing the given keyword (case-insensitive).
+        Search for tasks whose descriptions contain every word of the keyword
+        (case-insensitive). A word also matches inside longer words, so "econ"
+        finds "microeconomics".
 
-        :param keyword: Keyword to search for in task descriptions.
-        :return: List of tasks containing the keyword.
+        :param keyword: Keyword(s) to search for in task descriptions.
+        :return: List of matching tasks, best matches first.
         """
-        return [task for task in self.tasks if keyword.lower() in task['description'].lower()]
+        if not keyword.strip():
+            return list(self.tasks)
+        if self._can_read_file_directly():
+            return self._search_file(keyword)
+        if self._search is None:
+            self._search = SearchIndex()
+            self._search.add_many((task.id, task.description) for task in self._by_id.values())
+        return [self._by_id[task_id] for task_id in self._search.search(keyword, infix=True)]
 
-    def edit_task(self, task_id: int, **kwargs) -> bool:
+    def _search_file(self, keyword: str) -> List[Dict[str, Any]]:
+        """
+        Search tasks.json through the search index saved beside it as
+        ``<file>.search``, then read only the matching tasks.
+
+        The saved index records the stamp of the file it was built from; if
+        the file has changed since, the index is rebuilt with one streaming
+        pass and saved again.
+
+        :param keyword: Keyword(s) to search for in task descriptions.
+        :return: List of matching tasks, best matches first.
+        """
+        stamp = file_stamp(self.file_path)
+        if stamp is None:
+            return []
+        index_path = self.file_path + SEARCH_INDEX_SUFFIX
+        index = SearchIndex.load(index_path, stamp)
+        if index is None:
+            index = SearchIndex()
+            try:
+                index.add_many((task['id'], task['description']) for task in read_snapshot(self.file_path))
+            except FileNotFoundError:
+                return []
+            index.save(index_path, stamp)
+        return self._offsets.get_many(index.search(keyword, infix=True))
+
+    @_locked
+    def edit_task(self, task_id: int, expected_version: Optional[int] = None, **kwargs) -> bool:
         """
         Edit a task's fields by its ID.
 
         :param task_id: ID of the task to edit.
+        :param expected_version: If given, only edit the task if it is still at this version.
         :param kwargs: Fields to update (e.g., utility_score, status).
         :return: True if the task was updated, False if not found.
+        :raises VersionConflictError: If the task is not at expected_version.
         """
-        for task in self.tasks:
-            if task['id'] == task_id:
-                task.update(kwargs)
-                self.save_tasks()
-                return True
-        return False
+        self._ensure_loaded()
+        task = self._by_id.get(task_id)
+        if task is None:
+            return False
+        self._check_version(task, expected_version)
+        kwargs.pop('id', None)
+        kwargs['version'] = _version(task) + 1
+        if 'linked_tasks' in kwargs:
+            for linked_id in task.get('linked_tasks', []):
+                self._graph.remove_edge(task_id, linked_id)
+            kwargs['linked_tasks'] = [linked_id for linked_id in dict.fromkeys(kwargs['linked_tasks']) if linked_id in self._by_id and linked_id != task_id]
+            for linked_id in kwargs['linked_tasks']:
+                self._graph.add_edge(task_id, linked_id)
+        if 'depends_on' in kwargs:
+            self._remove_dependent(task_id, task.get('depends_on') or [])
+            self._add_dependent(task_id, kwargs['depends_on'] or [])
+        task.update(kwargs)
+        if 'description' in kwargs and self._search is not None:
+            self._search.add(task_id, task['description'])
+        if kwargs.keys() & {'utility_score', 'cost_hours', 'status'}:
+            self._rank_task(task)
+        if self._columns is not None and kwargs.keys() & {'utility_score', 'cost_hours', 'status', 'deadline'}:
+            self._columns.upsert(task)
+        self._commit({'op': 'edit', 'id': task_id, 'fields': kwargs})
+        return True
 
-    def delete_task(self, task_id: int) -> bool:
+    @_locked
+    def delete_task(self, task_id: int, expected_version: Optional[int] = None) -> bool:
         """
         Delete a task by its ID.
 
         :param task_id: ID of the task to delete.
+        :param expected_version: If given, only delete the task if it is still at this version.
         :return: True if the task was deleted, False if not found.
+        :raises VersionConflictError: If the task is not at expected_version.
         """
-        for i, task in enumerate(self.tasks):
-            if task['id'] == task_id:
-                del self.tasks[i]
-                self.save_tasks()
-                return True
-        return False
+        self._ensure_loaded()
+        if task_id not in self._by_id:
+            return False
+        self._check_version(self._by_id[task_id], expected_version)
+        task = self._by_id.pop(task_id)
+        if self._search is not None:
+            self._search.remove(task_id)
+        self._by_roi.discard(task_id)
+        self._pending_by_roi.discard(task_id)
+        if self._columns is not None:
+            self._columns.remove(task_id)
+        # Scrub the deleted ID from the tasks that link to it, in O(degree)
+        for other_id in self._graph.remove_node(task_id):
+            other = self._by_id[other_id]
+            other['linked_tasks'] = [linked_id for linked_id in other['linked_tasks'] if linked_id != task_id]
+        # Scrub it from the prerequisites of its dependents, in O(dependents)
+        self._remove_dependent(task_id, task.get('depends_on') or [])
+        for dependent_id in self._dependents.pop(task_id, ()):
+            dependent = self._by_id[dependent_id]
+            dependent['depends_on'] = [dep for dep in dependent['depends_on'] if dep != task_id]
+        self._commit({'op': 'delete', 'id': task_id})
+        return True
+
+    @staticmethod
+    def _check_version(task: Dict[str, Any], expected_version: Optional[int]) -> None:
+        """
+        Raise VersionConflictError unless the task is at the expected version (None accepts any).
+        """
+        if expected_version is not None and _version(task) != expected_version:
+            raise VersionConflictError(task['id'], expected_version, _version(task))
 
-    def get_best_tasks(self) -> List[Dict[str, Any]]:
+    def get_best_tasks(self, k: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Get pending tasks sorted by utility-to-cost ratio in descending order.
 
+        :param k: Optional number of tasks to return; reads only the top k.
         :return: List of pending tasks sorted by (utility_score / cost_hours).
         """
-        pending_tasks = [task for task in self.tasks if task['status'] == 'pending']
-        return sorted(pending_tasks, key=lambda x: x['utility_score'] / x['cost_hours'], reverse=True)
+        if self._columnar and self._can_read_file_directly():
+            return self._roi_page_from_file(0, k, pending_only=True)
+        self._ensure_loaded()
+        ids = self._pending_by_roi.top_k(k) if k is not None else self._pending_by_roi
+        return [self._by_id[task_id] for task_id in ids]
+
+    def get_tasks_by_roi(self, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get one page of all tasks sorted by utility-to-cost ratio in descending order.
+
+        :param offset: Number of tasks to skip.
+        :param limit: Optional maximum number of tasks to return.
+        :return: List of tasks sorted by (utility_score / cost_hours).
+        """
+        if self._columnar and self._can_read_file_directly():
+            return self._roi_page_from_file(offset, limit)
+        self._ensure_loaded()
+        if limit is None:
+            limit = len(self._by_roi)
+        return [self._by_id[task_id] for task_id in self._by_roi.page(offset, limit)]
+
+    def _roi_page_from_file(self, offset: int, limit: Optional[int], pending_only: bool = False) -> List[Dict[str, Any]]:
+        """
+        Rank tasks by ROI straight from a columnar snapshot.
+
+        Only the id, utility, cost and status columns are scanned; the tasks on
+        the requested page are the only ones decoded. The order matches the
+        in-memory ROI queues (highest ROI first, ties by ID).
+
+        :param offset: Number of tasks to skip.
+        :param limit: Maximum number of tasks to return, or None for all.
+        :param pending_only: Only rank pending tasks.
+        :return: The tasks on the page.
+        """
+        snapshot = self._offsets.current()
+        if snapshot is None:
+            return []
+        columns = ('id', 'utility_score', 'cost_hours', 'status')
+        ids, utility, cost, status = (snapshot.values(column) for column in columns)
+        statuses = snapshot.table('status')
+        pending = statuses.index('pending') if 'pending' in statuses else -1
+        _, absent, null = snapshot.mask('id')
+        bits = sum(snapshot.mask(column)[0] for column in columns)
+        keys = []
+        for row in range(len(snapshot)):
+            if (absent[row] | null[row]) & bits:
+                # A field kept outside its column; decode this one task
+                task = snapshot.row(row)
+                if not pending_only or task.get('status') == 'pending':
+                    keys.append((-roi(task), task['id'], row))
+            elif not pending_only or status[row] == pending:
+                keys.append((-ratio(utility[row], cost[row]), ids[row], row))
+        if limit is None:
+            keys.sort()
+            page = keys[offset:]
+        else:
+            page = heapq.nsmallest(offset + limit, keys)[offset:]
+        return [snapshot.row(row) for _, _, row in page]
 
     def get_task_by_id(self, task_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -112,11 +796,11 @@ class TaskManager:
         :param task_id: ID of the task to retrieve.
         :return: The task dictionary if found, None otherwise.
         """
-        for task in self.tasks:
-            if task['id'] == task_id:
-                return task
-        return None
+        if self._can_read_file_directly():
+            return self._offsets.get(task_id)
+        return self._by_id.get(task_id)
 
+    @_locked
     def link_tasks(self, task_id: int, linked_task_id: int) -> bool:
         """
         Link two tasks together. Creates a bidirectional relationship.
@@ -125,6 +809,7 @@ class TaskManager:
         :param linked_task_id: ID of the task to link to.
         :return: True if successful, False if either task not found.
         """
+        self._ensure_loaded()
         task = self.get_task_by_id(task_id)
         linked_task = self.get_task_by_id(linked_task_id)
         
@@ -138,14 +823,19 @@ class TaskManager:
             linked_task['linked_tasks'] = []
         
         # Add bidirectional links (avoid duplicates)
-        if linked_task_id not in task['linked_tasks']:
+        if not self._graph.has_edge(task_id, linked_task_id):
             task['linked_tasks'].append(linked_task_id)
-        if task_id not in linked_task['linked_tasks']:
+            task['version'] = _version(task) + 1
+            self._graph.add_edge(task_id, linked_task_id)
+        if not self._graph.has_edge(linked_task_id, task_id):
             linked_task['linked_tasks'].append(task_id)
+            linked_task['version'] = _version(linked_task) + 1
+            self._graph.add_edge(linked_task_id, task_id)
         
-        self.save_tasks()
+        self._commit({'op': 'link', 'id': task_id, 'other': linked_task_id})
         return True
 
+    @_locked
     def unlink_tasks(self, task_id: int, linked_task_id: int) -> bool:
         """
         Remove the link between two tasks. Removes bidirectional relationship.
@@ -154,6 +844,7 @@ class TaskManager:
         :param linked_task_id: ID of the task to unlink from.
         :return: True if successful, False if either task not found.
         """
+        self._ensure_loaded()
         task = self.get_task_by_id(task_id)
         linked_task = self.get_task_by_id(linked_task_id)
         
@@ -161,12 +852,16 @@ class TaskManager:
             return False
         
         # Remove bidirectional links
-        if 'linked_tasks' in task and linked_task_id in task['linked_tasks']:
+        if self._graph.has_edge(task_id, linked_task_id):
             task['linked_tasks'].remove(linked_task_id)
-        if 'linked_tasks' in linked_task and task_id in linked_task['linked_tasks']:
+            task['version'] = _version(task) + 1
+            self._graph.remove_edge(task_id, linked_task_id)
+        if self._graph.has_edge(linked_task_id, task_id):
             linked_task['linked_tasks'].remove(task_id)
+            linked_task['version'] = _version(linked_task) + 1
+            self._graph.remove_edge(linked_task_id, task_id)
         
-        self.save_tasks()
+        self._commit({'op': 'unlink', 'id': task_id, 'other': linked_task_id})
         return True
 
     def get_linked_tasks(self, task_id: int) -> List[Dict[str, Any]]:
@@ -180,10 +875,45 @@ class TaskManager:
         if not task or 'linked_tasks' not in task:
             return []
         
-        linked_tasks = []
-        for linked_id in task['linked_tasks']:
-            linked_task = self.get_task_by_id(linked_id)
-            if linked_task:
-                linked_tasks.append(linked_task)
-        
-        return linked_tasks
\ No newline at end of file
+        if self._can_read_file_directly():
+            return self._offsets.get_many(task['linked_tasks'])
+        return [self._by_id[linked_id] for linked_id in task['linked_tasks'] if linked_id in self._by_id]
+
+    def get_link_graph(self) -> LinkGraph:
+        """
+        Get the graph of task links for traversal queries (BFS/DFS, k-hop
+        neighbourhoods, shortest paths and connected components).
+
+        :return: The live link graph; treat it as read-only.
+        """
+        self._ensure_loaded()
+        return self._graph
+
+    def get_columns(self) -> TaskColumns:
+        """
+        Get the columnar NumPy snapshot of the tasks, building it on first use.
+        It is kept up to date by every later mutation.
+
+        :return: The live snapshot; treat it as read-only.
+        :raises ImportError: If numpy is not installed.
+        """
+        self._ensure_loaded()
+        if self._columns is None:
+            self._columns = TaskColumns.from_tasks(self._by_id.values())
+        return self._columns
+
+    def get_stats(self, days: int = 7, top: int = 5, today: Optional[datetime.date] = None) -> Dict[str, Any]:
+        """
+        Get dashboard statistics: status counts, pending hours and utility,
+        ROI and cost percentiles, overdue and due-soon tasks, and the best-ROI
+        pending tasks. Vectorised with NumPy when it is installed.
+
+        :param days: Size of the due-soon window in days.
+        :param top: Number of best-ROI pending tasks to list.
+        :param today: Reference date (defaults to today).
+        :return: The statistics dictionary.
+        """
+        today = today or datetime.date.today()
+        if HAS_NUMPY:
+            return self.get_columns().stats(today, days, top)
+        return task_stats_python(self.tasks, today, days, top)
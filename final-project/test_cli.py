@@ -179,3 +179,129 @@ def test_deadline_display_with_and_without(test_task_file, monkeypatch):
     assert result.exit_code == 0
     assert "2025-12-01" in result.stdout
     assert "N/A" in result.stdout
+
+def test_list_command_pagination(test_task_file, monkeypatch):
+    """Test that list pages through tasks in ROI order."""
+    import main
+    manager = TaskManager(test_task_file)
+    manager.add_task("Third ROI Task", 10, 5.0)
+    manager.add_task("First ROI Task", 90, 1.0)
+    manager.add_task("Second ROI Task", 60, 2.0)
+    monkeypatch.setattr(main, 'task_manager', manager)
+
+    result = runner.invoke(app, ["list", "--limit", "2", "--page", "2"])
+    assert result.exit_code == 0
+    assert "Third ROI Task" in result.stdout
+    assert "First ROI Task" not in result.stdout
+    assert "Second ROI Task" not in result.stdout
+
+    for args in (["--page", "0"], ["--limit", "0"], ["--limit", "-2"]):
+        result = runner.invoke(app, ["list", *args])
+        assert result.exit_code == 2
+        assert "Invalid value" in result.output
+
+def test_graph_commands(test_task_file, monkeypatch):
+    """Test the graph neighbors, path and components commands."""
+    import main
+    manager = TaskManager(test_task_file)
+    for name in ("Read chapter", "Write notes", "Do exercises", "Unrelated"):
+        manager.add_task(name, 50, 1.0)
+    manager.link_tasks(1, 2)
+    manager.link_tasks(2, 3)
+    monkeypatch.setattr(main, 'task_manager', manager)
+
+    result = runner.invoke(app, ["graph", "neighbors", "1", "--depth", "2"])
+    assert result.exit_code == 0
+    assert "Do exercises" in result.stdout
+    assert "Unrelated" not in result.stdout
+
+    result = runner.invoke(app, ["graph", "path", "1", "3"])
+    assert "Task 1 → Task 2 → Task 3" in result.stdout
+
+    result = runner.invoke(app, ["graph", "path", "1", "4"])
+    assert "No link path" in result.stdout
+
+    result = runner.invoke(app, ["graph", "components"])
+    assert "1, 2, 3" in result.stdout
+
+def test_plan_command_respects_dependencies(test_task_file, monkeypatch):
+    """Test that plan picks the best tasks for the budget and schedules prerequisites first."""
+    import main
+    manager = TaskManager(test_task_file)
+    manager.add_task("Set up environment", 5, 1.0)
+    manager.add_task("Build feature", 90, 3.0)
+    manager.add_task("Polish slides", 40, 2.0)
+    monkeypatch.setattr(main, 'task_manager', manager)
+
+    result = runner.invoke(app, ["depend", "2", "1"])
+    assert "now depends on" in result.stdout
+    result = runner.invoke(app, ["depend", "1", "2"])
+    assert "cycle" in result.stdout
+
+    result = runner.invoke(app, ["plan", "--hours", "4"])
+    assert result.exit_code == 0
+    assert "Set up environment" in result.stdout
+    assert "Build feature" in result.stdout
+    assert "Polish slides" not in result.stdout
+    assert "optimal" in result.stdout
+    assert result.stdout.index("Set up environment") < result.stdout.index("Build feature")
+
+def test_edit_with_expected_version(task_manager_with_data, monkeypatch):
+    """Test that edit only applies when the task is still at the expected version."""
+    import main
+    monkeypatch.setattr(main, 'task_manager', task_manager_with_data)
+
+    result = runner.invoke(app, ["edit", "1", "--status", "complete", "--expected-version", "1"])
+    assert result.exit_code == 0
+    assert "updated successfully" in result.stdout
+
+    result = runner.invoke(app, ["edit", "1", "--status", "pending", "--expected-version", "1"])
+    assert result.exit_code == 1
+    assert "version 2" in result.stdout
+    assert task_manager_with_data.get_task_by_id(1)['status'] == "complete"
+
+def test_import_and_export_commands(task_manager_with_data, tmp_path, monkeypatch):
+    """Test that export writes every task and import adds them back with fresh IDs."""
+    import main
+    monkeypatch.setattr(main, 'task_manager', task_manager_with_data)
+    task_manager_with_data.link_tasks(1, 3)
+
+    out = tmp_path / "tasks.csv"
+    result = runner.invoke(app, ["export", str(out)])
+    assert result.exit_code == 0
+    assert "Exported 3 tasks" in result.stdout
+    with open(out, 'a') as file:
+        file.write("99,Broken,not a number,1,pending,,,,1\n")
+
+    result = runner.invoke(app, ["import", str(out)])
+    assert result.exit_code == 1
+    assert "Line 5: utility_score" in result.stdout
+    assert "Imported 3 tasks, skipped 1 invalid rows." in result.stdout
+    assert task_manager_with_data.get_task_by_id(4)['linked_tasks'] == [6]
+
+    result = runner.invoke(app, ["export", "--format", "ndjson"])
+    assert [json.loads(line)['id'] for line in result.stdout.splitlines()] == [1, 2, 3, 4, 5, 6]
+
+    notes = tmp_path / "tasks.txt"
+    notes.write_text('{"description": "Extra", "utility_score": 10, "cost_hours": 1}\n')
+    result = runner.invoke(app, ["import", str(notes)])
+    assert result.exit_code == 2
+    assert "pass --format" in result.stdout
+    assert runner.invoke(app, ["import", str(notes), "--format", "ndjson"]).exit_code == 0
+
+def test_main_defers_heavy_imports(tmp_path):
+    """Test that importing main loads neither the storage layer nor the AI, planner or numpy modules."""
+    import subprocess
+    import sys
+    here = os.path.dirname(os.path.abspath(__file__))
+    code = (
+        "import sys, main\n"
+        "heavy = ['openai', 'ai_summary', 'planner', 'numpy', 'task_manager', 'rich.table']\n"
+        "print([name for name in heavy if name in sys.modules])\n"
+        "manager = main.task_manager\n"
+        "print(type(manager).__name__, main.get_task_manager() is manager)\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, capture_output=True, text=True,
+                            env=dict(os.environ, PYTHONPATH=here, TASKS_FILE="tasks.json"))
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines() == ["[]", "TaskManager True"]
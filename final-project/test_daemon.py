@@ -0,0 +1,88 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import daemon
+
+pytestmark = pytest.mark.skipif(not daemon.HAS_UNIX_SOCKETS, reason="needs Unix domain sockets")
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+def wait_for(path, timeout=30.0):
+    """Wait until a daemon socket appears."""
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        assert time.monotonic() < deadline, "daemon did not start"
+        time.sleep(0.05)
+
+
+def test_forward_round_trip(tmp_path, monkeypatch, capsys):
+    """Test that commands, output and exit codes travel over the socket and shutdown works."""
+    tasks_file = str(tmp_path / "tasks.json")
+    path = daemon.socket_path(tasks_file)
+    seen = []
+
+    def run(argv, cwd, tty, width):
+        seen.append((argv, cwd))
+        return f"ran {' '.join(argv)}\n", "warning\n", 3
+
+    assert daemon.forward(["list"], tasks_file) is None
+    server = threading.Thread(target=daemon.serve, args=(path, run))
+    server.start()
+    wait_for(path)
+    try:
+        assert daemon.forward(["view", "1"], tasks_file) == 3
+        captured = capsys.readouterr()
+        assert (captured.out, captured.err) == ("ran view 1\n", "warning\n")
+        assert seen == [(["view", "1"], os.getcwd())]
+        assert daemon.forward(["serve"], tasks_file) == 2
+
+        with pytest.raises(RuntimeError):
+            daemon.serve(path, run)
+        monkeypatch.setenv(daemon.NO_DAEMON_ENV, "1")
+        assert daemon.forward(["list"], tasks_file) is None
+    finally:
+        assert daemon.stop(path)
+        server.join()
+    assert not os.path.exists(path)
+    assert not daemon.stop(path)
+
+
+def test_cli_uses_running_daemon(tmp_path):
+    """Test that main.py forwards to a daemon that keeps the store in memory and sees outside writes."""
+    env = dict(os.environ, TASKS_FILE="tasks.json")
+    env.pop(daemon.NO_DAEMON_ENV, None)
+
+    def cli(*args, **extra_env):
+        return subprocess.run([sys.executable, MAIN, *args], cwd=tmp_path, env=dict(env, **extra_env),
+                              capture_output=True, text=True)
+
+    server = subprocess.Popen([sys.executable, MAIN, "serve"], cwd=tmp_path, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    try:
+        wait_for(str(tmp_path / "tasks.json.sock"))
+        result = cli("add", "Through the daemon", "50", "2")
+        assert result.returncode == 0
+        assert "Task added successfully!" in result.stdout
+        assert (tmp_path / "tasks.json").exists()
+
+        # A write that bypasses the daemon is picked up on the next request
+        assert cli("add", "Direct", "10", "1", TASKS_NO_DAEMON="1").returncode == 0
+        result = cli("view", "2")
+        assert "Direct" in result.stdout
+
+        result = cli("edit", "1", "--status", "complete", "--expected-version", "9")
+        assert result.returncode == 1
+        assert "version 1" in result.stdout
+        assert cli("no-such-command").returncode == 2
+    finally:
+        stopped = cli("serve", "--stop")
+        server.wait(timeout=30)
+    assert stopped.returncode == 0
+    assert server.returncode == 0, server.stderr.read()
+    assert not (tmp_path / "tasks.json.sock").exists()
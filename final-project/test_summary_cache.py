@@ -0,0 +1,127 @@
+import ai_summary
+from summary_cache import SummaryCache, cache_key
+
+
+def test_cache_key_ignores_whitespace_but_not_settings():
+    """Test that formatting changes share a key while model settings do not."""
+    key = cache_key("m", "sys", 0.7, "Study  for\nexam")
+    assert key == cache_key("m", "sys", 0.7, "Study for exam")
+    assert key != cache_key("m", "sys", 0.2, "Study for exam")
+    assert key != cache_key("other", "sys", 0.7, "Study for exam")
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """Test that the cache drops the least recently used entry when full."""
+    cache = SummaryCache(str(tmp_path / "cache.db"), max_entries=2)
+    cache.put("a", "first")
+    cache.put("b", "second")
+    assert cache.get("a") == "first"
+    cache.put("c", "third")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "first"
+    assert cache.get("c") == "third"
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (3, 1, 2)
+    cache.close()
+
+
+def test_cache_expires_entries_after_ttl(tmp_path, monkeypatch):
+    """Test that entries older than the TTL count as misses."""
+    now = [1000.0]
+    monkeypatch.setattr("summary_cache.time.time", lambda: now[0])
+    cache = SummaryCache(str(tmp_path / "cache.db"), ttl=60)
+    cache.put("a", "first")
+    now[0] += 30
+    assert cache.get("a") == "first"
+    now[0] += 60
+    assert cache.get("a") is None
+    cache.close()
+
+
+def test_ai_summary_is_served_from_cache(tmp_path, monkeypatch):
+    """Test that a repeated summary request does not call the API again."""
+    calls = []
+
+    def fake_complete(prompt, max_tokens=300):
+        calls.append(prompt)
+        return "Do the cheap task first."
+
+    monkeypatch.setattr(ai_summary, "_complete", fake_complete)
+    cache = SummaryCache(str(tmp_path / "cache.db"))
+    tasks = [{'id': 1, 'description': "Read paper", 'utility_score': 60, 'cost_hours': 2.0, 'status': "pending"}]
+
+    first = ai_summary.get_ai_task_summary(tasks, cache=cache)
+    second = ai_summary.get_ai_task_summary(tasks, cache=cache)
+
+    assert first == second
+    assert "Do the cheap task first." in first
+    assert len(calls) == 1
+    cache.close()
+
+
+def test_ai_summary_does_not_cache_missing_key(tmp_path, monkeypatch):
+    """Test that a missing API key is reported and not cached."""
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    cache = SummaryCache(str(tmp_path / "cache.db"))
+    tasks = [{'id': 1, 'description': "Read paper", 'utility_score': 60, 'cost_hours': 2.0, 'status': "pending"}]
+
+    assert "OPENAI_API_KEY" in ai_summary.get_ai_task_summary(tasks, cache=cache)
+    assert cache.stats()['entries'] == 0
+    cache.close()
+
+
+def test_large_backlog_only_resends_changed_chunks(tmp_path, monkeypatch):
+    """Test that a re-run of a chunked summary only sends the edited task's chunk."""
+    prompts = []
+
+    def fake_complete(prompt, max_tokens=300):
+        prompts.append(prompt)
+        return f"summary {len(prompts)}"
+
+    monkeypatch.setattr(ai_summary, "_complete", fake_complete)
+    cache = SummaryCache(str(tmp_path / "cache.db"))
+    tasks = [
+        {'id': i, 'description': f"Task {i}", 'utility_score': i % 100, 'cost_hours': 1.0, 'status': "pending"}
+        for i in range(1, 121)
+    ]
+
+    first = ai_summary.get_ai_task_summary(tasks, cache=cache, chunk_size=50)
+    assert len(prompts) == 4  # three chunks plus the final combine
+    assert "120 changed" in first
+    assert all(prompt.count("\n#") <= 50 for prompt in prompts)
+
+    prompts.clear()
+    tasks[70]['status'] = "complete"
+    second = ai_summary.get_ai_task_summary(tasks, cache=cache, chunk_size=50)
+    assert len(prompts) == 2
+    assert "#71 " in prompts[0]
+    assert "1 changed" in second
+
+    prompts.clear()
+    ai_summary.get_ai_task_summary(tasks, cache=cache, chunk_size=50)
+    assert prompts == []
+    cache.close()
+
+
+def test_many_chunks_are_reduced_in_groups(tmp_path, monkeypatch):
+    """Test that chunk summaries are combined a bounded number at a time."""
+    prompts = []
+
+    def fake_complete(prompt, max_tokens=300):
+        prompts.append(prompt)
+        return "ok"
+
+    monkeypatch.setattr(ai_summary, "_complete", fake_complete)
+    monkeypatch.setattr(ai_summary, "REDUCE_FAN_IN", 3)
+    cache = SummaryCache(str(tmp_path / "cache.db"))
+    tasks = [
+        {'id': i, 'description': f"Task {i} {'x' * i}", 'utility_score': 50, 'cost_hours': 1.0, 'status': "pending"}
+        for i in range(20)
+    ]
+
+    ai_summary.get_ai_task_summary(tasks, cache=cache, chunk_size=2)
+    combines = [prompt for prompt in prompts if "Part 1:" in prompt]
+    assert all(prompt.count("Part ") <= 3 for prompt in combines)
+    assert "The backlog has 20 tasks" in prompts[-1]
+    cache.close()
@@ -0,0 +1,601 @@
+import json
+import os
+import pytest
+from link_graph import LinkGraph
+from locking import VersionConflictError
+from records import Task, json_default
+from sqlite_store import SqliteTaskManager, migrate_json_to_sqlite
+from task_manager import TaskManager, convert_snapshot, open_task_manager
+
+
+@pytest.fixture(params=["tasks.json", "tasks.db"])
+def store(request, tmp_path):
+    """Create an empty store for each backend."""
+    manager = open_task_manager(str(tmp_path / request.param))
+    yield manager
+    manager.close()
+
+
+def test_journaled_mutations_do_not_rewrite_snapshot(tmp_path):
+    """Test that journaled mode appends to the journal instead of rewriting tasks.json."""
+    task_file = str(tmp_path / "tasks.json")
+    manager = TaskManager(task_file, journaled=True)
+    first = manager.add_task("First", 50, 2.0)
+    second = manager.add_task("Second", 80, 4.0)
+    manager.edit_task(first, status="complete")
+    manager.link_tasks(first, second)
+    manager.delete_task(second)
+
+    assert not os.path.exists(task_file)
+    with open(task_file + ".journal") as f:
+        assert len(f.readlines()) == 5
+
+    reloaded = TaskManager(task_file, journaled=True)
+    assert [task['id'] for task in reloaded.tasks] == [first]
+    assert reloaded.tasks[0]['status'] == "complete"
+    assert reloaded.tasks[0]['linked_tasks'] == []
+
+
+def test_journal_compaction_writes_snapshot(tmp_path):
+    """Test that passing the size threshold compacts the journal into tasks.json."""
+    task_file = str(tmp_path / "tasks.json")
+    manager = TaskManager(task_file, journaled=True, compact_threshold=200)
+    for i in range(10):
+        manager.add_task(f"Task {i}", 10 + i, 1.0)
+    manager.close()
+
+    with open(task_file) as f:
+        snapshot = json.load(f)
+    assert len(snapshot) >= 1
+    assert not os.path.exists(task_file + ".journal.1")
+
+    reloaded = TaskManager(task_file, journaled=True)
+    assert [task['description'] for task in reloaded.tasks] == [f"Task {i}" for i in range(10)]
+
+
+def test_leftover_rotated_journal_is_replayed(tmp_path):
+    """Test that a rotated journal left by an interrupted compaction is not lost."""
+    task_file = str(tmp_path / "tasks.json")
+    manager = TaskManager(task_file, journaled=True)
+    manager.add_task("Before crash", 60, 3.0)
+    os.replace(task_file + ".journal", task_file + ".journal.1")
+
+    reloaded = TaskManager(task_file, journaled=True)
+    assert [task['description'] for task in reloaded.tasks] == ["Before crash"]
+    assert not os.path.exists(task_file + ".journal.1")
+    with open(task_file) as f:
+        assert json.load(f)[0]['description'] == "Before crash"
+
+
+def test_append_after_torn_journal_tail(tmp_path):
+    """Test that a partial last journal line is dropped before the next append."""
+    task_file = str(tmp_path / "tasks.json")
+    TaskManager(task_file, journaled=True).add_task("First", 60, 3.0)
+    with open(task_file + ".journal", "a") as f:
+        f.write('{"op":"add","ta')
+
+    manager = TaskManager(task_file, journaled=True)
+    assert [task['description'] for task in manager.tasks] == ["First"]
+    manager.add_task("Second", 50, 1.0)
+    reloaded = TaskManager(task_file, journaled=True)
+    assert [task['description'] for task in reloaded.tasks] == ["First", "Second"]
+
+
+def test_task_records_convert_losslessly(tmp_path):
+    """Test that slotted task records behave like dicts and round-trip through JSON unchanged."""
+    data = {'id': 1, 'description': "Essay", 'utility_score': 40, 'cost_hours': 2.5, 'status': 'someday',
+            'deadline': None, 'linked_tasks': [], 'version': 3, 'depends_on': [7], 'notes': {'a': 1}}
+    task = Task.from_dict(data)
+    assert task == data and task.to_dict() == data
+    assert task.status == 'someday' and task['depends_on'] == [7] and 'utility_score' in task
+    del task['deadline']
+    task.update(status='complete', owner="me")
+    assert 'deadline' not in task and task.get('deadline', 'none') == 'none'
+    assert json.loads(json.dumps(task, default=json_default)) == dict(task)
+    assert not hasattr(task, '__dict__')
+
+    task_file = str(tmp_path / "tasks.json")
+    with open(task_file, "w") as f:
+        json.dump([data, dict(data, id=7, depends_on=[])], f)
+    manager = TaskManager(task_file)
+    manager.add_task("Second", 50, 1.0)
+    assert isinstance(manager.tasks[0], Task)
+    with open(task_file) as f:
+        assert json.load(f)[0] == data
+
+
+def test_id_index_stays_in_sync_after_delete(tmp_path):
+    """Test that lookups, edits and links still resolve after deleting from the middle."""
+    manager = TaskManager(str(tmp_path / "tasks.json"))
+    ids = [manager.add_task(f"Task {i}", 10, 1.0) for i in range(5)]
+    manager.link_tasks(ids[0], ids[4])
+
+    assert manager.delete_task(ids[1])
+    assert manager.get_task_by_id(ids[1]) is None
+    assert not manager.delete_task(ids[1])
+    assert manager.edit_task(ids[4], utility_score=99)
+    assert manager.get_task_by_id(ids[4])['utility_score'] == 99
+    assert [t['id'] for t in manager.get_linked_tasks(ids[0])] == [ids[4]]
+    assert manager.add_task("New", 10, 1.0) == ids[4] + 1
+    # Deleting keeps the remaining tasks, in memory and on disk, in the order added
+    assert [t['id'] for t in manager.tasks] == [ids[0], ids[2], ids[3], ids[4], ids[4] + 1]
+    assert manager.delete_task(ids[2])
+    assert manager.edit_task(ids[3], cost_hours=2.0)
+    assert manager.delete_task(ids[4] + 1)
+    with open(manager.file_path) as file:
+        assert [t['id'] for t in json.load(file)] == [ids[0], ids[3], ids[4]]
+
+
+def test_search_index_multi_term_infix_and_updates(tmp_path):
+    """Test AND queries, matching inside words and incremental index updates."""
+    manager = TaskManager(str(tmp_path / "tasks.json"))
+    a = manager.add_task("Study Python programming", 85, 5.0)
+    b = manager.add_task("Python data analysis with python", 80, 4.0)
+    c = manager.add_task("Read microeconomics textbook", 70, 3.0)
+
+    assert [t['id'] for t in manager.search_tasks("python")] == [b, a]
+    assert [t['id'] for t in manager.search_tasks("PYTHON prog")] == [a]
+    assert [t['id'] for t in manager.search_tasks("econ")] == [c]
+    assert [t['id'] for t in manager.search_tasks("micro econ")] == [c]
+    assert [t['id'] for t in manager.search_tasks("gram")] == [a]
+    assert manager.search_tasks("python economics") == []
+
+    manager.edit_task(c, description="Read Python cookbook")
+    assert [t['id'] for t in manager.search_tasks("cook")] == [c]
+    assert manager.search_tasks("economics") == []
+    manager.delete_task(a)
+    assert [t['id'] for t in manager.search_tasks("python")] == [b, c]
+
+
+def test_roi_indexes_follow_edits_and_status(tmp_path):
+    """Test top-k and paging over the ROI indexes after edits, status changes and deletes."""
+    manager = TaskManager(str(tmp_path / "tasks.json"))
+    low = manager.add_task("Low", 10, 5.0)      # ROI 2
+    mid = manager.add_task("Mid", 30, 3.0)      # ROI 10
+    high = manager.add_task("High", 90, 3.0)    # ROI 30
+    free = manager.add_task("Free", 50, 0)      # ROI 0
+
+    assert [t['id'] for t in manager.get_best_tasks()] == [high, mid, low, free]
+    assert [t['id'] for t in manager.get_best_tasks(2)] == [high, mid]
+
+    manager.edit_task(low, utility_score=200)   # ROI 40
+    manager.edit_task(high, status="complete")
+    assert [t['id'] for t in manager.get_best_tasks(2)] == [low, mid]
+    assert [t['id'] for t in manager.get_tasks_by_roi()] == [low, high, mid, free]
+    assert [t['id'] for t in manager.get_tasks_by_roi(1, 2)] == [high, mid]
+
+    manager.delete_task(mid)
+    assert [t['id'] for t in manager.get_best_tasks()] == [low, free]
+
+
+def test_backends_share_behaviour(store):
+    """Test that the JSON and SQLite backends answer the same queries the same way."""
+    a = store.add_task("Study Python programming", 90, 3.0, "2025-12-01")
+    b = store.add_task("Python data analysis", 40, 4.0)
+    c = store.add_task("Read economics textbook", 60, 2.0)
+    store.link_tasks(a, c)
+    store.edit_task(b, status="complete", utility_score=120)
+
+    assert [t['id'] for t in store.get_tasks_by_roi()] == [a, b, c]
+    assert [t['id'] for t in store.get_best_tasks(1)] == [a]
+    assert [t['id'] for t in store.get_linked_tasks(c)] == [a]
+    assert {t['id'] for t in store.search_tasks("pyth")} == {a, b}
+    assert [t['id'] for t in store.search_tasks("conom")] == [c]
+    assert [t['id'] for t in store.search_tasks("ta analysis")] == [b]
+    assert store.get_task_by_id(a)['deadline'] == "2025-12-01"
+    assert store.get_task_by_id(a)['linked_tasks'] == [c]
+    assert store.unlink_tasks(a, c)
+    assert store.get_linked_tasks(c) == []
+    assert store.delete_task(b)
+    assert not store.delete_task(b)
+    assert store.get_task_by_id(b) is None
+    assert sorted(t['id'] for t in store.tasks) == [a, c]
+
+
+def test_migrate_json_to_sqlite(tmp_path):
+    """Test that migration keeps IDs, fields and links."""
+    json_path = str(tmp_path / "tasks.json")
+    manager = TaskManager(json_path)
+    a = manager.add_task("First", 50, 2.0, "2025-11-30")
+    b = manager.add_task("Second", 80, 4.0)
+    manager.link_tasks(a, b)
+
+    db_path = str(tmp_path / "tasks.db")
+    assert migrate_json_to_sqlite(json_path, db_path) == 2
+    db = SqliteTaskManager(db_path)
+    assert db.tasks == manager.tasks
+    assert db.add_task("Third", 10, 1.0) == b + 1
+    db.close()
+
+
+def test_add_tasks_assigns_ids_and_resolves_references(store):
+    """Test that bulk adds get fresh IDs, keep links within the import and drop the rest."""
+    existing = store.add_task("Existing", 10, 1.0)
+    rows = [
+        {'id': 'a', 'description': "Intro", 'utility_score': 80, 'cost_hours': 2.0, 'linked_tasks': ['b', 99]},
+        {'id': 'b', 'description': "Body", 'utility_score': 60, 'cost_hours': 4.0, 'depends_on': ['a', 'b'], 'deadline': "2025-12-01"},
+        {'description': "Loose", 'utility_score': 30, 'cost_hours': 1.0, 'status': 'complete'},
+    ]
+    a, b, c = store.add_tasks(iter(rows))
+
+    assert (a, b, c) == (existing + 1, existing + 2, existing + 3)
+    assert store.get_task_by_id(a)['linked_tasks'] == [b]
+    assert store.get_task_by_id(b)['linked_tasks'] == [a]
+    assert store.get_task_by_id(b)['depends_on'] == [a]
+    assert store.get_task_by_id(c)['status'] == 'complete'
+    assert [t['id'] for t in store.iter_tasks()] == [existing, a, b, c]
+
+
+def test_bulk_formats_round_trip(tmp_path):
+    """Test that every export format reads back to the same tasks."""
+    import io
+    import re
+    import bulk
+    manager = TaskManager(str(tmp_path / "tasks.json"))
+    a = manager.add_task("Study, then \"rest\"", 90, 1.5, "2025-12-01")
+    b = manager.add_task("x" * 600, 40, 4.0)
+    manager.link_tasks(a, b)
+    manager.edit_task(b, status='complete', depends_on=[a])
+
+    for fmt in bulk.FORMATS:
+        out = io.StringIO()
+        assert bulk.write_tasks(manager.iter_tasks(), out, fmt) == 2
+        if fmt == 'bundle':
+            bundle = json.loads(out.getvalue())
+            assert all(re.fullmatch(r"[0-9a-f]{8}-[0-9a-f]{4}-4[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}", t['id']) for t in bundle['entities']['tasks'])
+            assert bundle['entities']['links'][0]['type'] == 'depends-on'
+        errors = []
+        copy = TaskManager(str(tmp_path / f"{fmt}.json"))
+        copy.add_tasks(bulk.read_tasks(io.StringIO(out.getvalue()), fmt, errors))
+        assert errors == []
+        # Imported tasks start again at version 1
+        assert [dict(t, version=1) for t in copy.tasks] == [dict(t, version=1) for t in manager.tasks]
+
+
+def test_read_tasks_reports_invalid_rows():
+    """Test that invalid rows are skipped and reported with their line numbers."""
+    import io
+    import bulk
+    data = (
+        "description,utility_score,cost_hours,status,deadline\n"
+        "Good,50,2,,\n"
+        "Bad utility,high,2,,\n"
+        "Bad status,50,2,started,\n"
+        "Bad deadline,50,2,,tomorrow\n"
+    )
+    errors = []
+    tasks = list(bulk.read_tasks(io.StringIO(data), 'csv', errors))
+    assert [t['description'] for t in tasks] == ["Good"]
+    assert tasks[0]['utility_score'] == 50 and tasks[0]['cost_hours'] == 2.0
+    assert [line for line, _ in errors] == [3, 4, 5]
+    assert "utility_score" in errors[0][1]
+
+
+def test_lazy_reads_use_offset_index_and_streaming(tmp_path):
+    """Test that a lazy TaskManager answers reads without loading, then loads on mutation."""
+    task_file = str(tmp_path / "tasks.json")
+    manager = TaskManager(task_file)
+    a = manager.add_task("Study Python programming", 90, 3.0)
+    b = manager.add_task("Read economics textbook", 60, 2.0)
+    manager.link_tasks(a, b)
+
+    lazy = TaskManager(task_file, lazy=True)
+    assert lazy.get_task_by_id(b)['description'] == "Read economics textbook"
+    assert [t['id'] for t in lazy.get_linked_tasks(a)] == [b]
+    assert [t['id'] for t in lazy.search_tasks("pyth")] == [a]
+    assert lazy.get_task_by_id(999) is None
+    assert os.path.exists(task_file + ".idx")
+    assert not lazy._loaded
+
+    # The search index is saved beside the file and reused until the file changes
+    saved = os.stat(task_file + ".search").st_mtime_ns
+    assert [t['id'] for t in TaskManager(task_file, lazy=True).search_tasks("conom")] == [b]
+    assert os.stat(task_file + ".search").st_mtime_ns == saved
+
+    lazy.edit_task(a, description="Study Rust")
+    assert lazy._loaded
+    assert lazy.search_tasks("pyth") == []
+    assert TaskManager(task_file, lazy=True).get_task_by_id(a)['description'] == "Study Rust"
+
+
+def test_columnar_snapshot_round_trips_and_ranks_without_loading(tmp_path):
+    """Test that a .tcol snapshot converts losslessly and serves ROI pages from its columns."""
+    tasks = [
+        {'id': 1, 'description': "Essay ✍", 'utility_score': 40, 'cost_hours': 2.0, 'status': 'pending',
+         'deadline': '2024-12-15', 'linked_tasks': [3], 'version': 2},
+        {'id': 3, 'description': "Read", 'utility_score': 90, 'cost_hours': 1.5, 'status': 'complete',
+         'deadline': None, 'linked_tasks': [1], 'version': 1, 'notes': {'a': 1}},
+        {'id': 2, 'description': "Odd", 'utility_score': 7.5, 'cost_hours': 0.0, 'status': 'someday',
+         'deadline': "next week", 'linked_tasks': []},
+    ]
+    json_file, columnar_file = str(tmp_path / "tasks.json"), str(tmp_path / "tasks.tcol")
+    with open(json_file, "w") as f:
+        json.dump(tasks, f, indent=4)
+    assert convert_snapshot(json_file, columnar_file) == 3
+    assert [list(t.items()) for t in TaskManager(columnar_file).tasks] == [list(t.items()) for t in tasks]
+    convert_snapshot(columnar_file, str(tmp_path / "back.json"))
+    assert (tmp_path / "back.json").read_text() == (tmp_path / "tasks.json").read_text()
+
+    lazy = TaskManager(columnar_file, lazy=True)
+    assert [t['id'] for t in lazy.get_tasks_by_roi()] == [3, 1, 2]
+    assert lazy.get_tasks_by_roi(1, 1) == [tasks[0]]
+    assert lazy.get_best_tasks(5) == [tasks[0]]
+    assert lazy.get_task_by_id(2) == tasks[2] and lazy.get_task_by_id(4) is None
+    assert [t['id'] for t in lazy.get_linked_tasks(1)] == [3]
+    assert not lazy._loaded
+
+    new_id = lazy.add_task("Later", 10, 1.0, deadline="2025-01-01")
+    assert TaskManager(columnar_file, lazy=True).get_task_by_id(new_id)['deadline'] == "2025-01-01"
+
+
+def test_link_graph_traversals():
+    """Test BFS/DFS order, k-hop neighbourhoods, shortest paths and components."""
+    graph = LinkGraph.from_links([(1, [2, 3]), (2, [4]), (3, [4]), (4, [5]), (5, []), (6, [7]), (7, []), (8, [99])])
+
+    assert list(graph.bfs(1)) == [(1, 0), (2, 1), (3, 1), (4, 2), (5, 3)]
+    assert list(graph.dfs(1)) == [1, 2, 4, 3, 5]
+    assert graph.k_hop(4, 1) == {2: 1, 3: 1, 5: 1}
+    assert graph.shortest_path(1, 5) == [1, 2, 4, 5]
+    assert graph.shortest_path(5, 1) == [5, 4, 2, 1]
+    assert graph.shortest_path(1, 6) is None
+    assert graph.components() == [[1, 2, 3, 4, 5], [6, 7], [8]]
+
+    assert graph.remove_node(4) == {2, 3}
+    assert graph.neighbors(5) == set()
+    assert graph.shortest_path(1, 5) is None
+
+
+def test_shortest_path_matches_plain_bfs():
+    """Test that the bidirectional search finds paths as short as a plain BFS."""
+    import random
+    rng = random.Random(7)
+    graph = LinkGraph.from_links((i, rng.sample(range(300), 2)) for i in range(300))
+    for _ in range(50):
+        a, b = rng.randrange(300), rng.randrange(300)
+        hops = dict(graph.bfs(a)).get(b)
+        path = graph.shortest_path(a, b)
+        assert (path is None) == (hops is None)
+        if path:
+            assert len(path) - 1 == hops
+            assert path[0] == a and path[-1] == b
+            assert all(other in graph.neighbors(node) for node, other in zip(path, path[1:]))
+
+
+def test_delete_scrubs_links_in_both_backends(store):
+    """Test that deleting a task removes it from its neighbours' links and the graph."""
+    a = store.add_task("A", 10, 1.0)
+    b = store.add_task("B", 10, 1.0)
+    c = store.add_task("C", 10, 1.0)
+    store.link_tasks(a, b)
+    store.link_tasks(b, c)
+    assert store.get_link_graph().shortest_path(a, c) == [a, b, c]
+
+    store.delete_task(b)
+    assert store.get_task_by_id(a)['linked_tasks'] == []
+    assert store.get_task_by_id(c)['linked_tasks'] == []
+    assert store.get_link_graph().shortest_path(a, c) is None
+    assert store.get_link_graph().components() == [[a], [c]]
+
+
+def test_links_to_missing_tasks_are_dropped(store):
+    """Test that both backends drop links to IDs that do not exist instead of failing."""
+    a = store.add_task("A", 10, 1.0)
+    b = store.add_task("B", 10, 1.0, links=[a, 99, a])
+    assert store.get_task_by_id(b)['linked_tasks'] == [a]
+    assert store.edit_task(a, linked_tasks=[42, b, a])
+    assert store.get_task_by_id(a)['linked_tasks'] == [b]
+
+
+def test_delete_scrubs_prerequisites(store, tmp_path):
+    """Test that deleting a prerequisite removes it from depends_on, also on journal replay."""
+    a = store.add_task("A", 10, 1.0)
+    c = store.add_task("C", 10, 1.0)
+    b = store.add_task("B", 10, 1.0)
+    store.edit_task(c, depends_on=[b, a])
+    store.delete_task(b)
+    assert store.get_task_by_id(c)['depends_on'] == [a]
+    # SQLite reuses the freed ID; the new task must not become a prerequisite
+    store.add_task("D", 10, 1.0)
+    assert store.get_task_by_id(c)['depends_on'] == [a]
+
+    task_file = str(tmp_path / "journaled.json")
+    manager = TaskManager(task_file, journaled=True)
+    x = manager.add_task("X", 10, 1.0)
+    y = manager.add_task("Y", 10, 1.0)
+    manager.edit_task(y, depends_on=[x])
+    manager.delete_task(x)
+    assert TaskManager(task_file, journaled=True).get_task_by_id(y)['depends_on'] == []
+
+
+def test_dependents_index_follows_edits(tmp_path):
+    """Test that deleting a task only touches the tasks that currently depend on it."""
+    manager = TaskManager(str(tmp_path / "tasks.json"))
+    a, b, c, d = (manager.add_task(name, 10, 1.0) for name in "ABCD")
+    manager.edit_task(c, depends_on=[a, b])
+    manager.edit_task(d, depends_on=[a])
+    manager.edit_task(c, depends_on=[b])
+    manager.delete_task(a)
+    assert manager.get_task_by_id(c)['depends_on'] == [b]
+    assert manager.get_task_by_id(d)['depends_on'] == []
+    manager.delete_task(b)
+    assert manager.get_task_by_id(c)['depends_on'] == []
+    assert [task['description'] for task in manager.tasks] == ["C", "D"]
+
+
+def test_planner_exact_and_greedy_modes():
+    """Test the exact forest DP, the greedy fallback with its bound, and cycle handling."""
+    from planner import plan_tasks
+    tasks = [
+        {'id': 1, 'utility_score': 1, 'cost_hours': 1.0, 'status': 'pending'},
+        {'id': 2, 'utility_score': 100, 'cost_hours': 2.0, 'status': 'pending', 'depends_on': [1]},
+        {'id': 3, 'utility_score': 60, 'cost_hours': 2.0, 'status': 'pending'},
+        {'id': 4, 'utility_score': 50, 'cost_hours': 1.0, 'status': 'complete'},
+        {'id': 5, 'utility_score': 30, 'cost_hours': 1.0, 'status': 'pending', 'depends_on': [4]},
+        {'id': 6, 'utility_score': 99, 'cost_hours': 1.0, 'status': 'pending', 'depends_on': [7]},
+        {'id': 7, 'utility_score': 99, 'cost_hours': 1.0, 'status': 'pending', 'depends_on': [6]},
+    ]
+    exact = plan_tasks(tasks, 4)
+    assert exact.exact
+    assert [task['id'] for task in exact.tasks] == [1, 2, 5]
+    assert exact.utility == 131 and exact.hours == 4
+    assert exact.blocked == [6, 7]
+
+    greedy = plan_tasks(tasks, 4, cell_limit=0)
+    assert not greedy.exact
+    assert greedy.utility == 131
+    assert greedy.bound >= exact.utility
+
+
+def test_stats_columns_follow_mutations_and_match_python(tmp_path):
+    """Test that the columnar snapshot is updated incrementally and agrees with the pure-Python stats."""
+    import datetime
+    from analytics import HAS_NUMPY, task_stats_python
+    if not HAS_NUMPY:
+        pytest.skip("numpy not installed")
+    today = datetime.date(2025, 1, 10)
+    manager = TaskManager(str(tmp_path / "tasks.json"))
+    a = manager.add_task("Overdue", 40, 2.0, "2025-01-01")
+    b = manager.add_task("Due soon", 90, 1.0, "2025-01-12")
+    c = manager.add_task("Later", 30, 3.0, "2025-03-01")
+    manager.add_task("Free", 10, 0)
+    manager.get_columns()  # build the snapshot, then mutate
+    manager.edit_task(c, deadline="2025-01-11", utility_score=60)
+    manager.edit_task(a, status="complete")
+    manager.delete_task(b)
+    d = manager.add_task("New", 80, 4.0)
+
+    result = manager.get_stats(days=7, today=today)
+    assert result == task_stats_python(manager.tasks, today, days=7)
+    assert result['by_status'] == {'pending': 3, 'complete': 1}
+    assert result['due_soon'] == [c]
+    assert result['overdue'] == 0
+    assert result['top_roi'][:2] == [c, d]
+    assert result['pending_hours'] == 7.0
+
+
+def test_batch_groups_mutations_into_one_write(tmp_path, monkeypatch):
+    """Test that a batch persists all of its mutations with a single durable write."""
+    import task_manager as task_manager_module
+    writes = []
+    real_write = task_manager_module.atomic_write_json
+
+    def counting_write(path, data, **kwargs):
+        writes.append(path)
+        real_write(path, data, **kwargs)
+
+    monkeypatch.setattr(task_manager_module, "atomic_write_json", counting_write)
+    task_file = str(tmp_path / "tasks.json")
+    manager = TaskManager(task_file)
+    with manager.batch():
+        with manager.batch():
+            first = manager.add_task("First", 50, 2.0)
+        second = manager.add_task("Second", 60, 1.0)
+        manager.link_tasks(first, second)
+        assert writes == []
+    assert writes == [task_file]
+    assert [task['id'] for task in TaskManager(task_file).tasks] == [first, second]
+
+    journaled = TaskManager(str(tmp_path / "journaled.json"), journaled=True)
+    with journaled.batch():
+        for i in range(3):
+            journaled.add_task(f"Task {i}", 10, 1.0)
+        assert not os.path.exists(str(tmp_path / "journaled.json.journal"))
+    with open(str(tmp_path / "journaled.json.journal")) as f:
+        assert len(f.readlines()) == 3
+
+
+def test_atomic_write_keeps_old_file_on_failure(tmp_path):
+    """Test that a failed write leaves the previous contents and no temporary file."""
+    from durable import atomic_write, atomic_write_json
+    path = str(tmp_path / "tasks.json")
+    atomic_write_json(path, [{'id': 1}])
+
+    def failing_write(file):
+        file.write('[{"id": 2')
+        raise RuntimeError("crash mid-write")
+
+    with pytest.raises(RuntimeError):
+        atomic_write(path, failing_write)
+    with open(path) as f:
+        assert json.load(f) == [{'id': 1}]
+    assert os.listdir(tmp_path) == ["tasks.json"]
+
+
+def _concurrent_writer(task_file, journaled, worker, count):
+    manager = TaskManager(task_file, journaled=journaled, compact_threshold=2048, lazy=True)
+    for i in range(count):
+        manager.add_task(f"Worker {worker} task {i}", 10, 1.0)
+        # Compare-and-swap increment of a shared counter, retried on conflict
+        while True:
+            manager.refresh()
+            counter = manager.get_task_by_id(1)
+            try:
+                manager.edit_task(1, expected_version=counter['version'], utility_score=counter['utility_score'] + 1)
+                break
+            except VersionConflictError:
+                continue
+    manager.close()
+
+
+@pytest.mark.parametrize("journaled", [False, True])
+def test_concurrent_processes_do_not_lose_updates(tmp_path, journaled):
+    """Test that writers in several processes serialise without losing adds or CAS increments."""
+    import multiprocessing
+    task_file = str(tmp_path / "tasks.json")
+    manager = TaskManager(task_file, journaled=journaled)
+    manager.add_task("Counter", 0, 1.0)
+    manager.close()
+
+    workers = [multiprocessing.Process(target=_concurrent_writer, args=(task_file, journaled, w, 15)) for w in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+    assert all(process.exitcode == 0 for process in workers)
+
+    tasks = TaskManager(task_file, journaled=journaled).tasks
+    assert sorted(task['id'] for task in tasks) == list(range(1, 62))
+    counter = next(task for task in tasks if task['id'] == 1)
+    assert counter['utility_score'] == 60
+    assert counter['version'] == 61
+
+
+def test_versions_and_compare_and_swap(store):
+    """Test that every change bumps a task's version and stale expected versions are rejected."""
+    a = store.add_task("First", 50, 2.0)
+    b = store.add_task("Second", 60, 1.0)
+    assert store.get_task_by_id(a)['version'] == 1
+
+    assert store.edit_task(a, expected_version=1, status="complete")
+    assert store.get_task_by_id(a)['version'] == 2
+    with pytest.raises(VersionConflictError) as conflict:
+        store.edit_task(a, expected_version=1, status="pending")
+    assert (conflict.value.expected, conflict.value.actual) == (1, 2)
+    assert store.get_task_by_id(a)['status'] == "complete"
+    assert not store.edit_task(99, expected_version=1, status="complete")
+
+    store.link_tasks(a, b)
+    assert [store.get_task_by_id(i)['version'] for i in (a, b)] == [3, 2]
+    with pytest.raises(VersionConflictError):
+        store.delete_task(b, expected_version=1)
+    assert store.delete_task(b, expected_version=2)
+
+
+def test_refresh_picks_up_other_writers(tmp_path):
+    """Test that a manager reloads only when another writer changed the store, and writes on top of it."""
+    task_file = str(tmp_path / "tasks.json")
+    first = TaskManager(task_file, journaled=True)
+    second = TaskManager(task_file, journaled=True)
+    a = first.add_task("From first", 50, 2.0)
+    assert second.get_task_by_id(a) is None
+    assert second.refresh()
+    assert not second.refresh()
+    assert second.get_task_by_id(a)['description'] == "From first"
+
+    b = first.add_task("Also from first", 40, 1.0)
+    # Writes always start from the latest state on disk
+    assert second.add_task("From second", 30, 1.0) == b + 1
+    assert second.edit_task(b, status="complete")
+    assert first.refresh()
+    assert first.get_task_by_id(b)['status'] == "complete"
+    assert len(first.tasks) == 3
@@ -0,0 +1,209 @@
+import concurrent.futures
+import hashlib
+import mmap
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+try:  # package import
+    from .durable import fsync_dir
+except ImportError:  # fallback if executed directly inside package dir
+    from durable import fsync_dir
+
+CHUNK_SIZE = 1024 * 1024
+# Blobs at least this large are read through mmap instead of into memory
+MMAP_THRESHOLD = 1024 * 1024
+# Unreferenced blobs younger than this are kept by gc: another process may be
+# about to attach them
+GC_GRACE_SECONDS = 3600
+
+
+class BlobStore:
+    """
+    Content-addressed storage for attachment data.
+
+    Each blob is stored once, under its SHA-256 digest, in a directory sharded
+    by the first two hex digits (objects/ab/cdef...). Data is streamed in
+    chunks and hashed on the fly, so adding a file of any size uses constant
+    memory. Blobs are only ever created by an atomic rename, so a crash never
+    leaves a partial blob under its final name.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Initialize a store; directories are created on the first write.
+
+        :param directory: Root directory of the store.
+        """
+        self.directory = directory
+        self._objects = os.path.join(directory, "objects")
+
+    def path(self, checksum: str) -> str:
+        """
+        Location of a blob.
+
+        :param checksum: Hex SHA-256 digest of the blob.
+        :return: Path of the blob file (which may not exist).
+        """
+        if len(checksum) != 64 or any(c not in "0123456789abcdef" for c in checksum):
+            raise ValueError(f"Not a SHA-256 checksum: {checksum!r}")
+        return os.path.join(self._objects, checksum[:2], checksum[2:])
+
+    def __contains__(self, checksum: str) -> bool:
+        return os.path.exists(self.path(checksum))
+
+    def put(self, source: Union[str, IO[bytes]]) -> Tuple[str, int]:
+        """
+        Add data to the store, unless identical data is already there.
+
+        :param source: Path of a file, or a binary file object to read to its end.
+        :return: (checksum, size in bytes).
+        """
+        if isinstance(source, str):
+            with open(source, "rb") as file:
+                return self.put(file)
+        os.makedirs(self._objects, exist_ok=True)
+        tmp_path = os.path.join(self._objects, f"incoming.{os.getpid()}.{threading.get_ident()}.tmp")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(tmp_path, "xb") as out:
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+                out.flush()
+                os.fsync(out.fileno())
+            checksum = digest.hexdigest()
+            target = self.path(checksum)
+            if os.path.exists(target):
+                os.utime(target)  # fresh again as far as gc is concerned
+                os.remove(tmp_path)
+                return checksum, size
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(tmp_path, target)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        fsync_dir(os.path.dirname(target))
+        return checksum, size
+
+    @contextmanager
+    def open(self, checksum: str) -> Iterator[Union[bytes, mmap.mmap]]:
+        """
+        Read a blob: small ones as bytes, large ones as a read-only mmap.
+
+        :param checksum: Hex SHA-256 digest of the blob.
+        :return: Context manager giving a bytes-like object.
+        """
+        with open(self.path(checksum), "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < MMAP_THRESHOLD:
+                yield file.read()
+                return
+            view = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(view, "madvise"):  # readers go front to back; let the kernel read ahead and drop pages
+                view.madvise(mmap.MADV_SEQUENTIAL)
+            try:
+                yield view
+            finally:
+                view.close()
+
+    def copy_to(self, checksum: str, destination: IO[bytes]) -> int:
+        """
+        Write a blob to a binary file object, a chunk at a time.
+
+        :param checksum: Hex SHA-256 digest of the blob.
+        :param destination: File to write to.
+        :return: Number of bytes written.
+        """
+        with self.open(checksum) as data:
+            for start in range(0, len(data), CHUNK_SIZE):
+                destination.write(data[start:start + CHUNK_SIZE])
+            return len(data)
+
+    def check(self, checksum: str, size: Optional[int] = None) -> Optional[str]:
+        """
+        Re-hash one blob and compare it with its name.
+
+        :param checksum: Hex SHA-256 digest the blob should have.
+        :param size: Expected size, if known.
+        :return: None if the blob is intact, otherwise what is wrong with it.
+        """
+        try:
+            with self.open(checksum) as data:
+                if size is not None and len(data) != size:
+                    return f"size is {len(data)} bytes, expected {size}"
+                digest = hashlib.sha256()
+                view = memoryview(data)
+                try:
+                    # hashlib releases the GIL on large buffers, so threads hash in parallel
+                    for start in range(0, len(view), CHUNK_SIZE):
+                        digest.update(view[start:start + CHUNK_SIZE])
+                finally:
+                    view.release()
+        except FileNotFoundError:
+            return "blob is missing"
+        if digest.hexdigest() != checksum:
+            return f"content hashes to {digest.hexdigest()}"
+        return None
+
+    def verify(self, blobs: Iterable[Tuple[str, Optional[int]]], workers: Optional[int] = None) -> Dict[str, str]:
+        """
+        Check many blobs in parallel.
+
+        :param blobs: (checksum, expected size or None) pairs; duplicates are checked once.
+        :param workers: Number of threads (default: one per CPU).
+        :return: {checksum: problem} for every blob that is not intact.
+        """
+        unique = dict(blobs)
+        workers = workers or os.cpu_count() or 1
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(lambda item: self.check(*item), unique.items())
+            return {checksum: problem for checksum, problem in zip(unique, results) if problem}
+
+    def checksums(self) -> Iterator[str]:
+        """
+        Yield the checksum of every stored blob.
+        """
+        try:
+            shards = sorted(os.listdir(self._objects))
+        except FileNotFoundError:
+            return
+        for shard in shards:
+            shard_dir = os.path.join(self._objects, shard)
+            if len(shard) == 2 and os.path.isdir(shard_dir):
+                for name in sorted(os.listdir(shard_dir)):
+                    if len(name) == 62:
+                        yield shard + name
+
+    def gc(self, referenced: Iterable[str], grace_seconds: float = GC_GRACE_SECONDS) -> List[str]:
+        """
+        Delete blobs nothing refers to, keeping recently added ones.
+
+        :param referenced: Checksums still in use.
+        :param grace_seconds: Minimum age of a blob before it can be deleted.
+        :return: Checksums of the deleted blobs.
+        """
+        keep = set(referenced)
+        cutoff = time.time() - grace_seconds
+        removed = []
+        for checksum in list(self.checksums()):
+            path = self.path(checksum)
+            if checksum in keep or os.path.getmtime(path) > cutoff:
+                continue
+            os.remove(path)
+            removed.append(checksum)
+        # Drop incoming files left behind by crashed writers, once they are old
+        if os.path.isdir(self._objects):
+            for name in os.listdir(self._objects):
+                path = os.path.join(self._objects, name)
+                if name.startswith("incoming.") and os.path.getmtime(path) <= cutoff:
+                    os.remove(path)
+        return removed
+
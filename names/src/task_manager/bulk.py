@@ -0,0 +1,209 @@
+import csv
+import datetime
+import json
+import uuid
+from typing import IO, Any, Dict, Iterable, Iterator, List, Tuple
+
+try:  # package import
+    from .records import json_default
+    from .storage import VALID_STATUSES
+except ImportError:  # fallback if executed directly inside package dir
+    from records import json_default
+    from storage import VALID_STATUSES
+
+FORMATS = ("ndjson", "csv", "bundle")
+# List columns hold values joined with ";"
+CSV_FIELDS = ("id", "title", "description", "status", "tags", "links", "created_at", "updated_at", "version")
+
+# ExportBundle from task5/schema/v1.json
+BUNDLE_VERSION = "1.0.0"
+_TO_BUNDLE_STATUS = {"open": "todo"}
+_FROM_BUNDLE_STATUS = {"todo": "open", "archived": "done"}
+_MAX_TITLE = 500
+# Bundle ids are derived from task ids, so exporting the same file twice gives the same ids
+_UUID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "https://taskpkms.dev/schema/v1.json")
+
+
+def guess_format(path: str) -> str:
+    # .csv -> csv, .json -> bundle, .ndjson/.jsonl and "-" -> ndjson; anything else needs --format
+    lower = path.lower()
+    if lower.endswith(".csv"):
+        return "csv"
+    if lower.endswith(".json"):
+        return "bundle"
+    if path == "-" or lower.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    raise ValueError(f"cannot tell the format of {path!r} from its extension; pass --format")
+
+
+def task_uuid(task_id: int) -> str:
+    # Name-based, but laid out as a version 4 UUID as the schema requires
+    digest = uuid.uuid5(_UUID_NAMESPACE, f"task:{task_id}")
+    return str(uuid.UUID(bytes=digest.bytes, version=4))
+
+
+def _key(value: Any) -> Any:
+    # Task references from CSV arrive as digit strings
+    if isinstance(value, str):
+        value = value.strip()
+        if value.isdigit():
+            return int(value)
+    return value
+
+
+def _list(value: Any, field: str) -> List[Any]:
+    if isinstance(value, str):
+        value = [part.strip() for part in value.split(";") if part.strip()]
+    if not isinstance(value, list):
+        raise ValueError(f"{field} must be a list")
+    return value
+
+
+def _timestamp(value: Any, field: str) -> str:
+    try:
+        datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        raise ValueError(f"{field} must be an ISO 8601 timestamp, not {value!r}")
+    return value
+
+
+def validate_task(row: Any) -> Dict[str, Any]:
+    # One imported row -> task fields for TaskRepository.add_many. Empty CSV cells
+    # count as missing; "id" is only a key for "links" within the same import.
+    if not isinstance(row, dict):
+        raise ValueError("expected an object")
+    row = {k: v for k, v in row.items() if v not in (None, "")}
+    title = row.get("title")
+    if not isinstance(title, str) or not title.strip():
+        raise ValueError("title is required")
+    description = row.get("description", "")
+    if not isinstance(description, str):
+        raise ValueError("description must be a string")
+    status = row.get("status", "open")
+    if status not in VALID_STATUSES:
+        raise ValueError(f"Invalid status '{status}'. Valid: {', '.join(VALID_STATUSES)}")
+    tags = _list(row.get("tags", []), "tags")
+    if not all(isinstance(tag, str) and tag for tag in tags):
+        raise ValueError("tags must be non-empty strings")
+    links = [_key(link) for link in _list(row.get("links", []), "links")]
+    if any(isinstance(link, (bool, float, list, dict)) for link in links):
+        raise ValueError("links must be task ids")
+    task = {
+        "title": title.strip(),
+        "description": description.strip(),
+        "status": status,
+        "tags": list(dict.fromkeys(tags)),
+        "links": links,
+    }
+    if "id" in row:
+        task["id"] = _key(row["id"])
+        if isinstance(task["id"], (bool, float, list, dict)):
+            raise ValueError("id must be an integer or a string")
+    for field in ("created_at", "updated_at"):
+        if field in row:
+            task[field] = _timestamp(row[field], field)
+    return task
+
+
+def _bundle_row(entity: Any, links: Dict[str, List[str]]) -> Dict[str, Any]:
+    if not isinstance(entity, dict) or entity.get("type", "task") != "task":
+        raise ValueError("expected a task entity")
+    if not isinstance(entity.get("id"), str):
+        raise ValueError("id must be a UUID string")
+    status = entity.get("status")
+    return {
+        "id": entity["id"],
+        "title": entity.get("title"),
+        "description": entity.get("body", ""),
+        "status": _FROM_BUNDLE_STATUS.get(status, status),
+        "tags": entity.get("tags") or [],
+        "links": (entity.get("links") or []) + links.get(entity["id"], []),
+        "created_at": entity.get("created"),
+        "updated_at": entity.get("modified"),
+    }
+
+
+def _iter_rows(file: IO[str], fmt: str) -> Iterator[Tuple[int, Any]]:
+    # (line number, row); rows that fail to parse come through as ValueError
+    if fmt == "ndjson":
+        for number, line in enumerate(file, 1):
+            if line.strip():
+                try:
+                    yield number, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield number, ValueError(f"invalid JSON ({e.msg})")
+    elif fmt == "csv":
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, ValueError("too many cells") if None in row else row
+    elif fmt == "bundle":
+        # One JSON document with the links after the tasks, so it is read whole
+        bundle = json.load(file)
+        if not isinstance(bundle, dict) or bundle.get("version") != BUNDLE_VERSION:
+            raise ValueError(f"not an ExportBundle version {BUNDLE_VERSION}")
+        entities = bundle.get("entities") or {}
+        links: Dict[str, List[str]] = {}
+        for link in entities.get("links") or []:
+            if isinstance(link, dict):
+                links.setdefault(link.get("from"), []).append(link.get("to"))
+        for number, entity in enumerate(entities.get("tasks") or [], 1):
+            try:
+                yield number, _bundle_row(entity, links)
+            except ValueError as e:
+                yield number, e
+    else:
+        raise ValueError(f"Unknown format '{fmt}'. Valid: {', '.join(FORMATS)}")
+
+
+def read_tasks(file: IO[str], fmt: str, errors: List[Tuple[int, str]]) -> Iterator[Dict[str, Any]]:
+    # Streams valid rows; invalid ones are skipped and recorded as (line, message)
+    for number, row in _iter_rows(file, fmt):
+        try:
+            if isinstance(row, ValueError):
+                raise row
+            yield validate_task(row)
+        except ValueError as e:
+            errors.append((number, str(e)))
+
+
+def _bundle_task(task: Dict[str, Any]) -> Dict[str, Any]:
+    entity = {
+        "id": task_uuid(task["id"]),
+        "type": "task",
+        "title": task["title"][:_MAX_TITLE] or f"Task {task['id']}",
+        "status": _TO_BUNDLE_STATUS.get(task["status"], task["status"]),
+        "tags": list(dict.fromkeys(task.get("tags", []))),
+        "links": [task_uuid(link) for link in task.get("links", [])],
+        "created": task["created_at"],
+        "modified": task["updated_at"],
+        "version": task.get("version", 1),
+        "metadata": {"task_id": task["id"]},
+    }
+    if task["description"]:
+        entity["body"] = task["description"]
+    return entity
+
+
+def write_tasks(tasks: Iterable[Dict[str, Any]], file: IO[str], fmt: str) -> int:
+    # One task at a time, so memory does not grow with the number of tasks
+    count = 0
+    if fmt == "ndjson":
+        for task in tasks:
+            file.write(json.dumps(task, default=json_default) + "\n")
+            count += 1
+    elif fmt == "csv":
+        writer = csv.writer(file, lineterminator="\n")
+        writer.writerow(CSV_FIELDS)
+        for task in tasks:
+            writer.writerow([";".join(map(str, v)) if isinstance(v, list) else v for v in (task.get(f, "") for f in CSV_FIELDS)])
+            count += 1
+    elif fmt == "bundle":
+        now = datetime.datetime.utcnow().isoformat(timespec="seconds") + "Z"
+        file.write(f'{{"version": "{BUNDLE_VERSION}", "exported": "{now}", "entities": {{"notes": [], "tasks": [')
+        for task in tasks:
+            file.write((",\n" if count else "\n") + json.dumps(_bundle_task(task)))
+            count += 1
+        file.write('\n], "projects": [], "tags": [], "links": [], "attachments": [], "revisions": []}}\n')
+    else:
+        raise ValueError(f"Unknown format '{fmt}'. Valid: {', '.join(FORMATS)}")
+    return count
@@ -11,9 +11,13 @@ if _PARENT not in sys.path:
     sys.path.insert(0, _PARENT)
 
 try:  # prefer absolute import
-    from task_manager.storage import TaskRepository, VALID_STATUSES
+    from task_manager.bulk import FORMATS, guess_format, read_tasks, write_tasks
+    from task_manager.durable import atomic_write
+    from task_manager.storage import TaskRepository, VALID_STATUSES, convert_snapshot
 except ImportError:  # fallback if executed directly inside package dir
-    from storage import TaskRepository, VALID_STATUSES
+    from bulk import FORMATS, guess_format, read_tasks, write_tasks
+    from durable import atomic_write
+    from storage import TaskRepository, VALID_STATUSES, convert_snapshot
 
 
 def format_task(task: dict) -> str:
@@ -24,8 +28,8 @@ def format_task(task: dict) -> str:
         f"  desc: {task['description'] or '-'}\n"
         f"  tags: {tags}\n"
         f"  links: {links}\n"
-        f"  created: {task['created_at']} updated: {task['updated_at']}"
-    )
+        f"  created: {task['created_at']} updated: {task['updated_at']} version: {task.get('version', 1)}"
+    ) + "".join(f"\n  attachment: {a['filename']} ({a['size']} bytes, {a['id']})" for a in task.get("attachments", []))
 
 
 def cmd_add(repo: TaskRepository, args: argparse.Namespace) -> None:
@@ -42,7 +46,7 @@ def cmd_list(repo: TaskRepository, args: argparse.Namespace) -> None:
 
 
 def cmd_search(repo: TaskRepository, args: argparse.Namespace) -> None:
-    tasks = repo.search(text=args.text or "", tag=args.tag, status=args.status)
+    tasks = repo.search(text=args.text or "", tag=args.tag, status=args.status, since=args.since, until=args.until)
     for t in tasks:
         print(format_task(t))
     print(f"Matched: {len(tasks)}")
@@ -55,12 +59,13 @@ def cmd_edit(repo: TaskRepository, args: argparse.Namespace) -> None:
         description=args.description,
         status=args.status,
         tags=args.tags,
+        expected_version=args.expected_version,
     )
     print(format_task(task))
 
 
 def cmd_delete(repo: TaskRepository, args: argparse.Namespace) -> None:
-    if repo.delete(args.id):
+    if repo.delete(args.id, expected_version=args.expected_version):
         print(f"Deleted task {args.id}")
     else:
         print(f"Task {args.id} not found")
@@ -77,18 +82,117 @@ def cmd_unlink(repo: TaskRepository, args: argparse.Namespace) -> None:
 
 
 def cmd_show(repo: TaskRepository, args: argparse.Namespace) -> None:
-    task = repo.get(args.id)
+    if args.version is not None:
+        task = repo.get_version(args.id, args.version)
+        if not task and repo.get(args.id):
+            raise KeyError(f"Version {args.version} of task {args.id} is not in its history")
+    else:
+        task = repo.get(args.id)
     if not task:
         print(f"Task {args.id} not found")
         return
     print(format_task(task))
 
 
+def cmd_history(repo: TaskRepository, args: argparse.Namespace) -> None:
+    for rev in repo.history(args.id):
+        print(f"v{rev['version']} {rev['timestamp']} {', '.join(rev['fields']) or '-'}")
+
+
+def cmd_gc(repo: TaskRepository, args: argparse.Namespace) -> None:
+    result = repo.gc_revisions(keep=args.keep)
+    print(f"Removed {result['histories_removed']} histories of deleted tasks, dropped {result['revisions_dropped']} old revisions")
+    print(f"Removed {repo.gc_attachments()} unused attachment blobs")
+
+
+def cmd_import(repo: TaskRepository, args: argparse.Namespace) -> None:
+    fmt = args.format or guess_format(args.file)
+    errors = []
+    src = sys.stdin if args.file == "-" else open(args.file, newline="", encoding="utf-8")
+    try:
+        rows = read_tasks(src, fmt, errors)
+        count = sum(1 for _ in rows) if args.dry_run else len(repo.add_many(rows))
+    finally:
+        if src is not sys.stdin:
+            src.close()
+    for line, message in errors[:20]:
+        print(f"line {line}: {message}")
+    if len(errors) > 20:
+        print(f"... and {len(errors) - 20} more invalid rows")
+    skipped = f", skipped {len(errors)} invalid rows" if errors else ""
+    print(f"{'Validated' if args.dry_run else 'Imported'} {count} tasks{skipped}")
+    if errors:
+        raise SystemExit(1)
+
+
+def cmd_export(repo: TaskRepository, args: argparse.Namespace) -> None:
+    fmt = args.format or guess_format(args.file)
+    if args.file == "-":
+        write_tasks(repo.iter_tasks(), sys.stdout, fmt)
+        return
+    written = []
+    atomic_write(args.file, lambda f: written.append(write_tasks(repo.iter_tasks(), f, fmt)))
+    print(f"Exported {written[0]} tasks to {args.file}")
+
+
+def cmd_convert(repo: TaskRepository, args: argparse.Namespace) -> None:
+    count = convert_snapshot(args.source, args.destination)
+    print(f"Converted {count} tasks to {args.destination}")
+
+
+def cmd_attach(repo: TaskRepository, args: argparse.Namespace) -> None:
+    attachment = repo.attach(args.id, args.file, filename=args.name)
+    print(f"Attached {attachment['filename']} ({attachment['size']} bytes, sha256 {attachment['checksum']}) to task {args.id}")
+
+
+def cmd_extract(repo: TaskRepository, args: argparse.Namespace) -> None:
+    if args.output == "-":
+        repo.read_attachment(args.id, args.attachment, sys.stdout.buffer)
+        sys.stdout.buffer.flush()
+        return
+    with open(args.output or repo.find_attachment(args.id, args.attachment)["filename"], "xb") as out:
+        written = repo.read_attachment(args.id, args.attachment, out)
+    print(f"Wrote {written} bytes to {out.name}")
+
+
+def cmd_verify(repo: TaskRepository, args: argparse.Namespace) -> None:
+    problems = repo.verify_attachments(workers=args.workers)
+    for task_id, attachment, problem in problems:
+        print(f"#{task_id} {attachment['filename']} ({attachment['checksum']}): {problem}")
+    if problems:
+        raise SystemExit(1)
+    print("All attachments intact")
+
+
 def cmd_summary(repo: TaskRepository, args: argparse.Namespace) -> None:
     summary = repo.summary()
     print(json.dumps(summary, indent=2))
 
 
+def cmd_graph(repo: TaskRepository, args: argparse.Namespace) -> None:
+    graph = repo.graph()
+    if args.graph_command == "neighbors":
+        if args.id not in graph:
+            raise KeyError(f"Task {args.id} not found")
+        hops = graph.k_hop(args.id, args.depth)
+        for tid, hop in sorted(hops.items(), key=lambda item: (item[1], item[0])):
+            print(f"#{tid} ({hop} hop{'s' if hop != 1 else ''}) {repo.get(tid)['title']}")
+        if not hops:
+            print("(no linked tasks)")
+    elif args.graph_command == "path":
+        path = graph.shortest_path(args.source, args.target)
+        if path is None:
+            print(f"No path between {args.source} and {args.target}")
+        else:
+            print(" -> ".join(f"#{tid}" for tid in path))
+    elif args.graph_command == "components":
+        groups = [g for g in graph.components() if len(g) >= args.min_size]
+        for g in groups:
+            print(f"{len(g)} tasks: " + ",".join(str(tid) for tid in g))
+        if not groups:
+            print("(no linked groups)")
+
+
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(description="CLI Task Manager")
     sub = p.add_subparsers(dest="command", required=True)
@@ -107,6 +211,8 @@ def build_parser() -> argparse.ArgumentParser:
     ps.add_argument("-q", "--text", help="Search text")
     ps.add_argument("-t", "--tag", help="Tag filter")
     ps.add_argument("-s", "--status", choices=VALID_STATUSES)
+    ps.add_argument("--since", help="Only tasks created at or after this date/time (ISO 8601, e.g. 2025-11-01)")
+    ps.add_argument("--until", help="Only tasks created before this date/time (ISO 8601)")
     ps.set_defaults(func=cmd_search)
 
     pe = sub.add_parser("edit", help="Edit task")
@@ -115,10 +221,12 @@ def build_parser() -> argparse.ArgumentParser:
     pe.add_argument("-d", "--description")
     pe.add_argument("-s", "--status", choices=VALID_STATUSES)
     pe.add_argument("-g", "--tags", nargs="*")
+    pe.add_argument("--expected-version", type=int, help="Only edit if the task is still at this version")
     pe.set_defaults(func=cmd_edit)
 
     pd = sub.add_parser("delete", help="Delete task")
     pd.add_argument("id", type=int)
+    pd.add_argument("--expected-version", type=int, help="Only delete if the task is still at this version")
     pd.set_defaults(func=cmd_delete)
 
     pli = sub.add_parser("link", help="Link two tasks")
@@ -133,8 +241,61 @@ def build_parser() -> argparse.ArgumentParser:
 
     psw = sub.add_parser("show", help="Show single task")
     psw.add_argument("id", type=int)
+    psw.add_argument("-V", "--version", type=int, help="Show the task as it was at this version")
     psw.set_defaults(func=cmd_show)
 
+    ph = sub.add_parser("history", help="List a task's versions and what changed in each")
+    ph.add_argument("id", type=int)
+    ph.set_defaults(func=cmd_history)
+
+    pat = sub.add_parser("attach", help="Attach a file to a task")
+    pat.add_argument("id", type=int)
+    pat.add_argument("file")
+    pat.add_argument("-n", "--name", help="Attachment name (default: the file's name)")
+    pat.set_defaults(func=cmd_attach)
+
+    pxt = sub.add_parser("extract", help="Write an attachment out to a file")
+    pxt.add_argument("id", type=int)
+    pxt.add_argument("attachment", help="Attachment name or id")
+    pxt.add_argument("-o", "--output", help="File to create, or - for stdout (default: the attachment's name)")
+    pxt.set_defaults(func=cmd_extract)
+
+    pvf = sub.add_parser("verify", help="Check every attachment against its SHA-256 checksum")
+    pvf.add_argument("-j", "--workers", type=int, help="Files hashed at once (default: one per CPU)")
+    pvf.set_defaults(func=cmd_verify)
+
+    prg = sub.add_parser("gc", help="Prune revision history and unused attachment data")
+    prg.add_argument("--keep", type=int, help="Revisions to keep per task (default 100)")
+    prg.set_defaults(func=cmd_gc)
+
+    pg = sub.add_parser("graph", help="Explore links between tasks")
+    gsub = pg.add_subparsers(dest="graph_command", required=True)
+    pgn = gsub.add_parser("neighbors", help="Tasks within N links of a task")
+    pgn.add_argument("id", type=int)
+    pgn.add_argument("-k", "--depth", type=int, default=1)
+    pgp = gsub.add_parser("path", help="Shortest chain of links between two tasks")
+    pgp.add_argument("source", type=int)
+    pgp.add_argument("target", type=int)
+    pgc = gsub.add_parser("components", help="Groups of linked tasks, largest first")
+    pgc.add_argument("--min-size", type=int, default=2)
+    pg.set_defaults(func=cmd_graph)
+
+    pim = sub.add_parser("import", help="Add tasks from an NDJSON, CSV or ExportBundle file")
+    pim.add_argument("file", help="File to read, or - for stdin")
+    pim.add_argument("-f", "--format", choices=FORMATS, help="Default: from the file extension")
+    pim.add_argument("--dry-run", action="store_true", help="Only validate the rows")
+    pim.set_defaults(func=cmd_import)
+
+    pex = sub.add_parser("export", help="Write all tasks as NDJSON, CSV or an ExportBundle")
+    pex.add_argument("file", nargs="?", default="-", help="File to write, or - for stdout (default)")
+    pex.add_argument("-f", "--format", choices=FORMATS, help="Default: from the file extension")
+    pex.set_defaults(func=cmd_export)
+
+    pcv = sub.add_parser("convert", help="Convert a task file between JSON and the columnar format (.tcol)")
+    pcv.add_argument("source")
+    pcv.add_argument("destination")
+    pcv.set_defaults(func=cmd_convert)
+
     psu = sub.add_parser("summary", help="Show status counts")
     psu.set_defaults(func=cmd_summary)
 
@@ -147,7 +308,7 @@ def main(argv: List[str] | None = None) -> None:
     repo = TaskRepository()
     try:
         args.func(repo, args)
-    except (ValueError, KeyError) as e:
+    except (ValueError, KeyError, OSError) as e:
         print(f"Error: {e}")
         raise SystemExit(1)
 
@@ -0,0 +1,535 @@
+# Kept identical in final-project and names/src/task_manager; see "Shared modules" in the top-level README.md
+import datetime
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Layout: a fixed preamble, the sections (each 8-byte aligned), then a JSON
+# header describing them. The header comes last so sections can be streamed
+# out as they are built; the preamble says where it is.
+# Task files with this extension are stored in this format
+COLUMNAR_SUFFIX = ".tcol"
+_MAGIC = b"TASKCOL1"
+_PREAMBLE = struct.Struct("<8sQQ")  # magic, header offset, header length
+_ALIGN = 8
+
+# Column kinds and the array typecode of their fixed-width values.
+# Variable-length kinds also get a uint64 "offsets" section with count + 1 entries.
+KINDS = {
+    "int": "q",        # int64
+    "float": "d",      # float64
+    "status": "I",     # code into a table of strings kept in the header
+    "date": "i",       # days since 1970-01-01, for "YYYY-MM-DD" strings
+    "timestamp": "q",  # seconds since 1970-01-01, for "YYYY-MM-DDTHH:MM:SSZ" strings
+    "str": "B",        # UTF-8 heap
+    "ints": "q",       # int64 values, one list per row
+    "strs": "I",       # codes into a header table, one list per row
+}
+_VARIABLE = ("str", "ints", "strs")
+_TABLES = ("status", "strs")
+
+_EPOCH_DAY = datetime.date(1970, 1, 1).toordinal()
+_EPOCH = datetime.datetime(1970, 1, 1)
+_INT64 = (-2 ** 63, 2 ** 63)
+_MISSING = object()
+# Rows decoded per slice when iterating
+_CHUNK_ROWS = 4096
+
+
+def _encode_date(value: Any) -> Any:
+    if type(value) is str and len(value) == 10:
+        try:
+            day = datetime.date.fromisoformat(value)
+        except ValueError:
+            return _MISSING
+        if day.isoformat() == value:
+            return day.toordinal() - _EPOCH_DAY
+    return _MISSING
+
+
+def _encode_timestamp(value: Any) -> Any:
+    if type(value) is str and len(value) == 20 and value[-1] == "Z":
+        try:
+            moment = datetime.datetime.fromisoformat(value[:-1])
+        except ValueError:
+            return _MISSING
+        if moment.isoformat() == value[:-1]:
+            delta = moment - _EPOCH
+            return delta.days * 86400 + delta.seconds
+    return _MISSING
+
+
+class _ColumnWriter:
+    """
+    Accumulates one column: fixed-width values in memory, string bytes in a
+    temporary file.
+    """
+
+    def __init__(self, name: str, kind: str):
+        if kind not in KINDS:
+            raise ValueError(f"Unknown column kind '{kind}' for '{name}'")
+        self.name = name
+        self.kind = kind
+        self.table: Dict[Any, int] = {}
+        self.offsets = array("Q", [0]) if kind in _VARIABLE else None
+        if kind == "str":
+            self.heap: Optional[IO[bytes]] = tempfile.TemporaryFile()
+            self.size = 0
+            self.values = None
+        else:
+            self.heap = None
+            self.values = array(KINDS[kind])
+
+    def add(self, value: Any) -> bool:
+        """
+        Append a value; False (and nothing appended) if it does not fit the column.
+        """
+        kind = self.kind
+        if kind == "int":
+            if type(value) is not int or not _INT64[0] <= value < _INT64[1]:
+                return False
+            self.values.append(value)
+        elif kind == "float":
+            if type(value) is not float:
+                return False
+            self.values.append(value)
+        elif kind == "status":
+            if type(value) is not str:
+                return False
+            self.values.append(self._code(value))
+        elif kind in ("date", "timestamp"):
+            encoded = _encode_date(value) if kind == "date" else _encode_timestamp(value)
+            if encoded is _MISSING:
+                return False
+            self.values.append(encoded)
+        elif kind == "str":
+            if type(value) is not str:
+                return False
+            data = value.encode("utf-8", "surrogatepass")
+            self.heap.write(data)
+            self.size += len(data)
+            self.offsets.append(self.size)
+        elif kind == "ints":
+            if type(value) is not list or any(type(v) is not int or not _INT64[0] <= v < _INT64[1] for v in value):
+                return False
+            self.values.extend(value)
+            self.offsets.append(len(self.values))
+        else:  # strs
+            if type(value) is not list or any(type(v) is not str for v in value):
+                return False
+            self.values.extend(self._code(v) for v in value)
+            self.offsets.append(len(self.values))
+        return True
+
+    def skip(self) -> None:
+        """
+        Append a placeholder for a row without a value in this column.
+        """
+        if self.offsets is not None:
+            self.offsets.append(self.offsets[-1])
+        else:
+            self.values.append(0)
+
+    def _code(self, value: str) -> int:
+        code = self.table.get(value)
+        if code is None:
+            code = self.table[value] = len(self.table)
+        return code
+
+    def sections(self) -> Iterator[Tuple[str, str, Any]]:
+        if self.offsets is not None:
+            yield f"{self.name}.offsets", "Q", self.offsets
+        if self.heap is not None:
+            yield f"{self.name}.heap", "B", self.heap
+        else:
+            yield f"{self.name}.values", self.values.typecode, self.values
+
+
+def write_columnar(file: IO[bytes], rows: Iterable[Dict[str, Any]], columns: Sequence[Tuple[str, str]], key: str = "id") -> int:
+    """
+    Write records in the columnar snapshot format, in one pass over them.
+
+    Each (name, kind) column stores that field in a fixed-width array (see
+    KINDS), so readers can scan numbers without decoding any strings. Values
+    that do not fit their column (e.g. a deadline that is not a date) and keys
+    without a column are kept as JSON in a per-row "rest" heap, and per-row
+    bit masks record absent and null fields, so reading the file back gives
+    exactly the records that were written.
+
+    :param file: Binary file open for writing; it must be seekable.
+    :param rows: The records (dicts or anything with .get and iteration over keys).
+    :param columns: (field name, kind) pairs; at most 64.
+    :param key: Integer field the file is indexed by for lookups.
+    :return: Number of records written.
+    """
+    if len(columns) > 64:
+        raise ValueError("At most 64 columns are supported")
+    writers = [_ColumnWriter(name, kind) for name, kind in columns]
+    named = {writer.name: writer for writer in writers}
+    absent, null = array("Q"), array("Q")
+    rest_offsets = array("Q", [0])
+    rest_heap = tempfile.TemporaryFile()
+    rest_size = 0
+    count = 0
+    try:
+        for row in rows:
+            absent_bits = null_bits = 0
+            rest = None
+            for bit, writer in enumerate(writers):
+                value = row.get(writer.name, _MISSING)
+                if value is None:
+                    null_bits |= 1 << bit
+                    writer.skip()
+                elif value is _MISSING or not writer.add(value):
+                    absent_bits |= 1 << bit
+                    writer.skip()
+                    if value is not _MISSING:
+                        rest = rest or {}
+                        rest[writer.name] = value
+            for field in row:
+                if field not in named:
+                    rest = rest or {}
+                    rest[field] = row[field]
+            if rest:
+                data = json.dumps(rest, separators=(",", ":")).encode("utf-8")
+                rest_heap.write(data)
+                rest_size += len(data)
+            rest_offsets.append(rest_size)
+            absent.append(absent_bits)
+            null.append(null_bits)
+            count += 1
+
+        sections: List[Tuple[str, str, Any]] = [("absent", "Q", absent), ("null", "Q", null)]
+        for writer in writers:
+            sections.extend(writer.sections())
+        sections += [("rest.offsets", "Q", rest_offsets), ("rest.heap", "B", rest_heap)]
+        if key in named and named[key].kind == "int":
+            # Rows by key, for binary-search lookups; rows without an integer key are left out
+            keys = named[key].values
+            bit = 1 << [writer.name for writer in writers].index(key)
+            order = array("Q", sorted((i for i in range(count) if not (absent[i] | null[i]) & bit), key=keys.__getitem__))
+            sections.append(("order", "Q", order))
+
+        file.write(_PREAMBLE.pack(_MAGIC, 0, 0))
+        position = _PREAMBLE.size
+        layout = {}
+        for name, typecode, data in sections:
+            padding = -position % _ALIGN
+            file.write(b"\0" * padding)
+            position += padding
+            if isinstance(data, array):
+                if sys.byteorder != "little":
+                    data = array(data.typecode, data)
+                    data.byteswap()
+                file.write(data.tobytes())
+                length = len(data) * data.itemsize
+            else:
+                data.seek(0)
+                shutil.copyfileobj(data, file)
+                length = data.tell()
+            layout[name] = [position, length, typecode]
+            position += length
+        header = json.dumps({
+            "count": count,
+            "key": key,
+            "columns": [[writer.name, writer.kind] for writer in writers],
+            "tables": {writer.name: list(writer.table) for writer in writers if writer.kind in _TABLES},
+            "sections": layout,
+        }).encode("utf-8")
+        file.write(header)
+        file.seek(0)
+        file.write(_PREAMBLE.pack(_MAGIC, position, len(header)))
+        file.seek(0, os.SEEK_END)
+    finally:
+        rest_heap.close()
+        for writer in writers:
+            if writer.heap is not None:
+                writer.heap.close()
+    return count
+
+
+def is_columnar(path: str) -> bool:
+    """
+    Check whether a task file is (or, if it does not exist yet, will be)
+    stored in the columnar format, going by its extension.
+
+    :param path: Path to the file.
+    :return: True if it ends with COLUMNAR_SUFFIX.
+    """
+    return path.lower().endswith(COLUMNAR_SUFFIX)
+
+
+class ColumnarFile:
+    """
+    Read-only, memory-mapped view of a columnar snapshot.
+
+    Opening reads only the small header. Column values are memoryviews over
+    the mapping, so scanning numeric columns (or wrapping them with
+    numpy.frombuffer) decodes nothing else, and a record is only built from
+    its columns when row() is called.
+    """
+
+    def __init__(self, path: str):
+        """
+        Map a snapshot file.
+
+        :param path: Path to the file.
+        :raises ValueError: If the file is not a columnar snapshot.
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._file.close()
+            raise ValueError(f"{path} is not a columnar task snapshot")
+        self._view = memoryview(self._mmap)
+        self._sections: Dict[str, memoryview] = {}
+        try:
+            magic, offset, length = _PREAMBLE.unpack_from(self._mmap, 0)
+            if magic != _MAGIC:
+                raise ValueError(f"{path} is not a columnar task snapshot")
+            header = json.loads(self._mmap[offset:offset + length])
+            if sys.byteorder != "little":
+                raise ValueError(f"{path} can only be read on little-endian machines; convert it to JSON instead")
+        except (struct.error, json.JSONDecodeError, UnicodeDecodeError) as e:
+            self.close()
+            raise ValueError(f"{path} is not a columnar task snapshot ({e})")
+        except ValueError:
+            self.close()
+            raise
+        self.count: int = header["count"]
+        self.key: str = header["key"]
+        self.columns: List[Tuple[str, str]] = [tuple(column) for column in header["columns"]]
+        self._tables: Dict[str, List[str]] = header["tables"]
+        self._layout: Dict[str, List[Any]] = header["sections"]
+        self._bits = {name: 1 << i for i, (name, _) in enumerate(self.columns)}
+
+    def __enter__(self) -> "ColumnarFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Unmap the file. Views handed out by values() must not be used afterwards.
+        """
+        for view in self._sections.values():
+            view.release()
+        self._sections = {}
+        if getattr(self, "_view", None) is not None:
+            self._view.release()
+            self._view = None
+        try:
+            self._mmap.close()
+        except (AttributeError, BufferError):
+            pass  # a caller still holds a view; the mapping goes when it does
+        self._file.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _section(self, name: str) -> memoryview:
+        view = self._sections.get(name)
+        if view is None:
+            offset, length, typecode = self._layout[name]
+            view = self._sections[name] = self._view[offset:offset + length].cast(typecode)
+        return view
+
+    def values(self, column: str) -> memoryview:
+        """
+        Fixed-width values of a column, one per row (lists: all rows' items back to back).
+
+        Rows where the field is absent, null or kept in the rest heap hold 0;
+        see mask(). Status and strs columns hold codes into table().
+
+        :param column: Column name.
+        :return: A read-only memoryview over the mapped file.
+        """
+        kind = dict(self.columns)[column]
+        return self._section(f"{column}.heap" if kind == "str" else f"{column}.values")
+
+    def mask(self, column: str) -> Tuple[int, memoryview, memoryview]:
+        """
+        Where a column holds no value.
+
+        :param column: Column name.
+        :return: (bit, absent masks, null masks); row i has no value in the
+            column if (absent[i] | null[i]) & bit, and is None if null[i] & bit.
+        """
+        return self._bits[column], self._section("absent"), self._section("null")
+
+    def table(self, column: str) -> List[str]:
+        """
+        The strings that a status or strs column's codes stand for.
+        """
+        return self._tables[column]
+
+    def _decode(self, name: str, kind: str, start: int, stop: int) -> List[Any]:
+        """
+        Values of one column for rows start..stop-1, decoded a slice at a time.
+        """
+        if kind in ("int", "float"):
+            return self._section(f"{name}.values")[start:stop].tolist()
+        if kind in ("status", "date", "timestamp"):
+            codes = self._section(f"{name}.values")[start:stop].tolist()
+            if kind == "status":
+                table = self._tables[name]
+            elif kind == "date":
+                table = {day: datetime.date.fromordinal(day + _EPOCH_DAY).isoformat() for day in set(codes)}
+            else:
+                table = {second: (_EPOCH + datetime.timedelta(seconds=second)).isoformat() + "Z" for second in set(codes)}
+            return [table[code] for code in codes]
+        offsets = self._section(f"{name}.offsets")[start:stop + 1].tolist()
+        base = offsets[0]
+        spans = [(begin - base, end - base) for begin, end in zip(offsets, offsets[1:])]
+        if kind == "str":
+            data = bytes(self._section(f"{name}.heap")[base:offsets[-1]])
+            if data.isascii():
+                text = data.decode("ascii")
+                return [text[begin:end] for begin, end in spans]
+            return [data[begin:end].decode("utf-8", "surrogatepass") for begin, end in spans]
+        values = self._section(f"{name}.values")[base:offsets[-1]].tolist()
+        if kind == "strs":
+            table = self._tables[name]
+            values = [table[code] for code in values]
+        return [values[begin:end] for begin, end in spans]
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Build the records of a range of rows, decoding each column in chunks.
+
+        :param start: First row.
+        :param stop: Row to stop before (default: the end).
+        :return: The records, fields in column order followed by any others.
+        """
+        stop = self.count if stop is None else min(stop, self.count)
+        names = [name for name, _ in self.columns]
+        bits = [1 << bit for bit in range(len(names))]
+        absent_masks, null_masks = self._section("absent"), self._section("null")
+        rest_offsets, rest_heap = self._section("rest.offsets"), self._section("rest.heap")
+        for chunk in range(start, stop, _CHUNK_ROWS):
+            end = min(chunk + _CHUNK_ROWS, stop)
+            columns = [self._decode(name, kind, chunk, end) for name, kind in self.columns]
+            absent = absent_masks[chunk:end].tolist()
+            null = null_masks[chunk:end].tolist()
+            rests = rest_offsets[chunk:end + 1].tolist()
+            for i, values in enumerate(zip(*columns)):
+                if not (absent[i] | null[i]) and rests[i] == rests[i + 1]:
+                    yield dict(zip(names, values))
+                    continue
+                # Fields outside their columns: absent, null, or kept as JSON
+                rest = json.loads(str(rest_heap[rests[i]:rests[i + 1]], "utf-8")) if rests[i + 1] > rests[i] else None
+                record = {}
+                for name, bit, value in zip(names, bits, values):
+                    if absent[i] & bit:
+                        if rest and name in rest:
+                            record[name] = rest.pop(name)
+                    elif null[i] & bit:
+                        record[name] = None
+                    else:
+                        record[name] = value
+                if rest:
+                    record.update(rest)
+                yield record
+
+    def row(self, i: int) -> Dict[str, Any]:
+        """
+        Build one record.
+
+        :param i: Row number, from 0.
+        :return: The record, fields in column order followed by any others.
+        """
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return next(self.rows(i, i + 1))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.rows()
+
+    def find(self, key: Any) -> Optional[int]:
+        """
+        Row number of the record with a key, by binary search.
+
+        :param key: Value of the key field.
+        :return: The row, or None if there is no such record.
+        """
+        if "order" not in self._layout or type(key) is not int:
+            return None
+        order = self._section("order")
+        keys = self._section(f"{self.key}.values")
+        i = bisect_left(order, key, key=keys.__getitem__)
+        if i < len(order) and keys[order[i]] == key:
+            return order[i]
+        return None
+
+
+class ColumnarReader:
+    """
+    Looks up records in a columnar snapshot that may be replaced at any time.
+
+    Offers the get/get_many interface of json_stream.OffsetIndex. The file is
+    mapped on first use and remapped when it has been replaced since.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: Path to the snapshot file.
+        """
+        self.path = path
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        self._file: Optional[ColumnarFile] = None
+
+    def current(self) -> Optional[ColumnarFile]:
+        """
+        The snapshot as it is now on disk.
+
+        :return: The mapped file, or None if it does not exist.
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self.close()
+            return None
+        stamp = (st.st_size, st.st_mtime_ns, st.st_ino)
+        if stamp != self._stamp:
+            self.close()
+            self._file = ColumnarFile(self.path)
+            self._stamp = stamp
+        return self._file
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._file, self._stamp = None, None
+
+    def get(self, record_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Read a single record by its key.
+
+        :param record_id: The record's key.
+        :return: The record, or None if it does not exist.
+        """
+        found = self.get_many([record_id])
+        return found[0] if found else None
+
+    def get_many(self, record_ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """
+        Read several records by key, skipping keys that do not exist.
+
+        :param record_ids: Keys to read.
+        :return: The records found, in the order requested.
+        """
+        snapshot = self.current()
+        if snapshot is None:
+            return []
+        rows = (snapshot.find(record_id) for record_id in record_ids)
+        return [snapshot.row(row) for row in rows if row is not None]
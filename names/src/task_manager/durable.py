@@ -0,0 +1,69 @@
+# Kept identical in final-project and names/src/task_manager; see "Shared modules" in the top-level README.md
+import json
+import os
+import stat
+import threading
+from typing import IO, Any, Callable
+
+
+def fsync_dir(directory: str) -> None:
+    """
+    Flush a directory entry to disk so a rename inside it survives a crash.
+    A no-op on platforms that cannot open directories (e.g. Windows).
+
+    :param directory: Path to the directory.
+    """
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path: str, write: Callable[[IO], None], binary: bool = False) -> None:
+    """
+    Replace a file so readers and crashes only ever see the old or the new contents.
+
+    The data is written to a temporary file in the same directory, flushed and
+    fsynced, renamed over the target, and the directory is fsynced so the
+    rename itself is durable. An existing file's permissions are kept.
+
+    :param path: File to replace.
+    :param write: Called with the open temporary file to write the new contents.
+    :param binary: Open the temporary file in binary instead of text mode.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'xb' if binary else 'x', **({} if binary else {'encoding': 'utf-8'})) as file:
+            write(file)
+            file.flush()
+            os.fsync(file.fileno())
+        try:
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(path).st_mode))
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    fsync_dir(directory)
+
+
+def atomic_write_json(path: str, data: Any, **dump_kwargs) -> None:
+    """
+    Atomically replace a file with data serialized as JSON.
+
+    :param path: File to replace.
+    :param data: JSON-serializable data.
+    :param dump_kwargs: Extra arguments for json.dump (e.g. indent=4).
+    """
+    atomic_write(path, lambda file: json.dump(data, file, **dump_kwargs))
@@ -0,0 +1,154 @@
+from bisect import bisect_left, insort
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+_EMPTY: frozenset = frozenset()
+
+
+class FilterIndex:
+    """
+    Secondary indexes for the exact-match and range filters of a task search.
+
+    Keeps status -> task IDs and tag -> task IDs sets, and the tasks sorted by
+    created_at for range queries. Sets double as counters, so counting the
+    tasks with a status is O(1). The index stores no copy of the tasks: callers
+    remove a task before changing its status, tags or created_at and add it
+    back afterwards.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty index.
+        """
+        self._by_status: Dict[Any, Set[int]] = {}
+        self._by_tag: Dict[str, Set[int]] = {}
+        # (created_at, id), sorted; tasks without a string created_at are left out
+        self._created: List[Tuple[str, int]] = []
+
+    def add(self, task: Dict[str, Any]) -> None:
+        """
+        Index a task that is not in the index yet.
+
+        :param task: The task.
+        """
+        task_id = task["id"]
+        self._by_status.setdefault(task.get("status"), set()).add(task_id)
+        for tag in self._tags(task):
+            self._by_tag.setdefault(tag, set()).add(task_id)
+        created = task.get("created_at")
+        if type(created) is str:
+            insort(self._created, (created, task_id))
+
+    def add_many(self, tasks: Iterable[Dict[str, Any]]) -> None:
+        """
+        Index many new tasks, sorting the created_at index only once.
+
+        :param tasks: Tasks not yet in the index.
+        """
+        by_status, by_tag, created = self._by_status, self._by_tag, self._created
+        for task in tasks:
+            task_id = task["id"]
+            status = task.get("status")
+            ids = by_status.get(status)
+            if ids is None:
+                ids = by_status[status] = set()
+            ids.add(task_id)
+            tags = task.get("tags")
+            if type(tags) is list:
+                for tag in tags:
+                    if type(tag) is str:
+                        ids = by_tag.get(tag)
+                        if ids is None:
+                            ids = by_tag[tag] = set()
+                        ids.add(task_id)
+            value = task.get("created_at")
+            if type(value) is str:
+                created.append((value, task_id))
+        created.sort()
+
+    def remove(self, task: Dict[str, Any]) -> None:
+        """
+        Remove a task, as it currently is, from the index.
+
+        :param task: The task, with the values it was indexed with.
+        """
+        task_id = task["id"]
+        self._discard(self._by_status, task.get("status"), task_id)
+        for tag in self._tags(task):
+            self._discard(self._by_tag, tag, task_id)
+        created = task.get("created_at")
+        if type(created) is str:
+            i = bisect_left(self._created, (created, task_id))
+            if i < len(self._created) and self._created[i] == (created, task_id):
+                del self._created[i]
+
+    @staticmethod
+    def _tags(task: Dict[str, Any]) -> Iterable[str]:
+        tags = task.get("tags")
+        if type(tags) is not list:
+            return ()
+        return {tag for tag in tags if type(tag) is str}
+
+    @staticmethod
+    def _discard(index: Dict[Any, Set[int]], key: Any, task_id: int) -> None:
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(task_id)
+            if not ids:
+                del index[key]
+
+    def status_counts(self) -> Dict[Any, int]:
+        """
+        Number of tasks with each status, without looking at any task.
+
+        :return: Status -> count, for statuses with at least one task.
+        """
+        return {status: len(ids) for status, ids in self._by_status.items()}
+
+    def _created_between(self, since: Optional[str], until: Optional[str]) -> Tuple[int, int]:
+        lo = bisect_left(self._created, (since,)) if since is not None else 0
+        hi = bisect_left(self._created, (until,)) if until is not None else len(self._created)
+        return lo, max(lo, hi)
+
+    def ids(self, status: Optional[str] = None, tag: Optional[str] = None, since: Optional[str] = None,
+            until: Optional[str] = None, created_at: Optional[Callable[[int], Any]] = None) -> Optional[Set[int]]:
+        """
+        IDs of the tasks that pass every given filter.
+
+        The candidate sets are intersected smallest first, so the cost is
+        bounded by the most selective filter. A created_at range is only
+        turned into a set when it is the smallest candidate; otherwise the
+        survivors of the other filters are checked against it one by one.
+
+        :param status: Only tasks with this status.
+        :param tag: Only tasks with this tag.
+        :param since: Only tasks created at or after this ISO 8601 string.
+        :param until: Only tasks created before this ISO 8601 string.
+        :param created_at: Looks up a task's created_at by ID, for checking
+            survivors against the range; without it the range is always a set.
+        :return: The IDs, or None if no filter was given (every task passes).
+        """
+        sets = []
+        if status is not None:
+            sets.append(self._by_status.get(status, _EMPTY))
+        if tag is not None:
+            sets.append(self._by_tag.get(tag, _EMPTY))
+        ranged = since is not None or until is not None
+        if not sets and not ranged:
+            return None
+        sets.sort(key=len)
+        if ranged:
+            lo, hi = self._created_between(since, until)
+            if not sets or created_at is None or hi - lo <= len(sets[0]):
+                sets.insert(0, {task_id for _, task_id in self._created[lo:hi]})
+            else:
+                sets[0] = {task_id for task_id in sets[0] if self._in_range(created_at(task_id), since, until)}
+        result = set(sets[0])
+        for ids in sets[1:]:
+            if not result:
+                break
+            result.intersection_update(ids)
+        return result
+
+    @staticmethod
+    def _in_range(value: Any, since: Optional[str], until: Optional[str]) -> bool:
+        return type(value) is str and (since is None or value >= since) and (until is None or value < until)
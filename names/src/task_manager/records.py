@@ -0,0 +1,227 @@
+import functools
+import sys
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple, Union
+
+# Statuses are stored as small integers. Known ones get fixed codes; any other
+# status found in the data is appended, so nothing is lost when it is saved.
+STATUS_NAMES: List[str] = ["open", "in-progress", "done", "blocked"]
+_STATUS_CODES: Dict[str, int] = {status: code for code, status in enumerate(STATUS_NAMES)}
+
+
+def status_code(status: str) -> int:
+    """
+    Integer code of a status, assigning a new one to statuses not seen before.
+
+    :param status: The status string.
+    :return: Its code; STATUS_NAMES[code] is the (interned) string.
+    """
+    code = _STATUS_CODES.get(status)
+    if code is None:
+        code = _STATUS_CODES[status] = len(STATUS_NAMES)
+        STATUS_NAMES.append(sys.intern(status) if type(status) is str else status)
+    return code
+
+
+# Value of an unset slot in getattr lookups
+_MISSING = object()
+
+
+def _intern(value: Any) -> Any:
+    """
+    Intern a string value, or every string in a list, so repeated values share one object.
+    """
+    if type(value) is str:
+        return sys.intern(value)
+    if type(value) is list:
+        return [sys.intern(item) if type(item) is str else item for item in value]
+    return value
+
+
+def _set_status(record: "Record", value: str) -> None:
+    record.status_code = status_code(value)
+
+
+def _set_interned(set_slot: Callable[["Record", Any], None], record: "Record", value: Any) -> None:
+    set_slot(record, _intern(value))
+
+
+class Record(MutableMapping):
+    """
+    A JSON object stored in __slots__ instead of a per-object dict.
+
+    Subclasses list their usual keys in FIELDS (in JSON order) and declare a
+    slot for each, except "status", which is stored as an integer code in the
+    status_code slot. Any other key goes to a small dict that only exists when
+    needed. Unset slots stand for absent keys, so converting to and from a
+    dict is lossless. Records behave like dicts (task["status"], .get,
+    .update, ...); hot loops can read the attributes directly instead.
+    """
+
+    __slots__ = ("status_code", "_extra")
+    FIELDS: Tuple[str, ...] = ()
+    # Fields whose string values (or list items) are interned
+    INTERNED: Tuple[str, ...] = ()
+    _field_set = frozenset()
+
+    _setters: Dict[str, Callable[["Record", Any], None]] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._field_set = frozenset(cls.FIELDS)
+        # One setter per field, so from_dict does a single lookup per key
+        cls._setters = {}
+        for field in cls.FIELDS:
+            if field == "status":
+                cls._setters[field] = _set_status
+            elif field in cls.INTERNED:
+                cls._setters[field] = functools.partial(_set_interned, getattr(cls, field).__set__)
+            else:
+                cls._setters[field] = getattr(cls, field).__set__
+
+    def __init__(self, data: Union[Dict[str, Any], Iterable[Tuple[str, Any]]] = (), **fields: Any):
+        """
+        Initialize a record like a dict.
+
+        :param data: A mapping, or (key, value) pairs.
+        :param fields: More keys and values.
+        """
+        self._extra = None
+        self.update(data, **fields)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Record":
+        """
+        Build a record from its JSON object.
+
+        :param data: The decoded JSON object; its values are used, not copied.
+        :return: The record.
+        """
+        record = cls.__new__(cls)
+        record._extra = None
+        setters = cls._setters
+        for key, value in data.items():
+            setter = setters.get(key)
+            if setter is not None:
+                setter(record, value)
+            else:
+                if record._extra is None:
+                    record._extra = {}
+                record._extra[key] = value
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert back to the JSON object, FIELDS first, then any other keys.
+
+        :return: A new dict sharing the record's values.
+        """
+        out = {}
+        for key in self.FIELDS:
+            value = getattr(self, key, _MISSING)
+            if value is not _MISSING:
+                out[key] = value
+        if self._extra:
+            out.update(self._extra)
+        return out
+
+    def copy(self) -> "Record":
+        """
+        A shallow copy, like dict.copy.
+        """
+        return self.from_dict(self.to_dict())
+
+    @property
+    def status(self) -> str:
+        return STATUS_NAMES[self.status_code]
+
+    @status.setter
+    def status(self, value: str) -> None:
+        self.status_code = status_code(value)
+
+    @status.deleter
+    def status(self) -> None:
+        del self.status_code
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._field_set:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._field_set:
+            return getattr(self, key, default)
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def __contains__(self, key: Any) -> bool:
+        if key in self._field_set:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        setter = self._setters.get(key)
+        if setter is not None:
+            setter(self, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key in self._field_set:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self.FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self._extra:
+            yield from list(self._extra)
+
+    def __len__(self) -> int:
+        return sum(1 for key in self.FIELDS if hasattr(self, key)) + len(self._extra or ())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __reduce__(self):
+        # For pickle and copy.deepcopy
+        return (type(self).from_dict, (self.to_dict(),))
+
+
+class Task(Record):
+    """
+    A task of a TaskRepository (see the package docstring for the fields).
+    Attachments and any other keys live in the record's extra dict.
+    """
+
+    __slots__ = ("id", "title", "description", "tags", "links", "created_at", "updated_at", "version")
+    FIELDS = ("id", "title", "description", "status", "tags", "links", "created_at", "updated_at", "version")
+    INTERNED = ("tags",)
+
+
+def json_default(value: Any) -> Any:
+    """
+    ``default`` hook for json.dump/json.dumps that writes records as objects.
+
+    :param value: An object the json module cannot serialise itself.
+    :return: The record's dict.
+    :raises TypeError: If the object is not a record.
+    """
+    if isinstance(value, Record):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
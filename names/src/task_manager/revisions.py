@@ -0,0 +1,311 @@
+import copy
+import json
+import os
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:  # package import
+    from .durable import atomic_write, fsync_dir
+except ImportError:  # fallback if executed directly inside package dir
+    from durable import atomic_write, fsync_dir
+
+# A full snapshot is written at least every this many revisions, bounding replay
+KEYFRAME_INTERVAL = 16
+# A task's history is compacted to its newest KEEP_REVISIONS once it holds twice as many
+KEEP_REVISIONS = 100
+
+# Records start with their version and delta-chain length, so lines can be
+# skipped without parsing the rest of them
+_PREFIX_RE = re.compile(r'\{"version": (\d+), "chain": (\d+),')
+# Fields that change with every revision and say nothing about what was edited
+_BOOKKEEPING = ("version", "updated_at")
+
+
+def _escape(key: str) -> str:
+    return key.replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def make_patch(old: Dict[str, Any], new: Dict[str, Any], prefix: str = "") -> List[Dict[str, Any]]:
+    """
+    Compute a JSON Patch (RFC 6902) turning one object into another.
+
+    Nested objects are diffed key by key; any other changed value, including
+    a list, is replaced whole.
+
+    :param old: The earlier object.
+    :param new: The later object.
+    :param prefix: JSON pointer of the objects within a larger document.
+    :return: add, remove and replace operations.
+    """
+    ops = []
+    for key, value in old.items():
+        path = f"{prefix}/{_escape(key)}"
+        if key not in new:
+            ops.append({"op": "remove", "path": path})
+        elif isinstance(value, dict) and isinstance(new[key], dict):
+            ops.extend(make_patch(value, new[key], path))
+        elif value != new[key] or type(value) is not type(new[key]):
+            ops.append({"op": "replace", "path": path, "value": new[key]})
+    for key, value in new.items():
+        if key not in old:
+            ops.append({"op": "add", "path": f"{prefix}/{_escape(key)}", "value": value})
+    return ops
+
+
+def apply_patch(document: Dict[str, Any], patch: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Apply a JSON Patch made by make_patch to a document, in place.
+
+    :param document: Object to change.
+    :param patch: add, remove and replace operations on object members.
+    :return: The changed document.
+    """
+    for op in patch:
+        *parents, key = [_unescape(token) for token in op["path"].split("/")[1:]]
+        target = document
+        for token in parents:
+            target = target[token]
+        if op["op"] == "remove":
+            del target[key]
+        elif op["op"] in ("add", "replace"):
+            target[key] = copy.deepcopy(op["value"])
+        else:
+            raise ValueError(f"Unsupported patch operation '{op['op']}'")
+    return document
+
+
+class RevisionStore:
+    """
+    Per-task revision history as keyframes plus JSON Patch deltas.
+
+    Each task has an append-only file of one JSON record per line. A record
+    is either a keyframe holding the full task snapshot or a patch against
+    the previous revision. A keyframe is written every KEYFRAME_INTERVAL
+    revisions, and whenever the patch would be larger than the snapshot, so
+    rebuilding any version replays at most that many patches. Callers are
+    expected to hold the repository's write lock while recording.
+    """
+
+    def __init__(self, directory: str, keyframe_interval: int = KEYFRAME_INTERVAL, keep: int = KEEP_REVISIONS):
+        """
+        Initialize a store; the directory is created on the first write.
+
+        :param directory: Directory holding one <task id>.jsonl file per task.
+        :param keyframe_interval: Maximum number of patches between keyframes.
+        :param keep: Revisions kept per task when its history is compacted.
+        """
+        self.directory = directory
+        self.keyframe_interval = keyframe_interval
+        self.keep = keep
+
+    def _path(self, task_id: int) -> str:
+        return os.path.join(self.directory, f"{int(task_id)}.jsonl")
+
+    def _records(self, task_id: int) -> Iterator[Tuple[int, int, str]]:
+        """
+        Yield (version, chain length, raw line) for each complete record, oldest first.
+        """
+        try:
+            file = open(self._path(task_id), "r", encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with file:
+            for line in file:
+                match = _PREFIX_RE.match(line)
+                if not match or not line.endswith("\n"):
+                    break  # a torn final append; everything before it is intact
+                yield int(match.group(1)), int(match.group(2)), line
+
+    def _last(self, task_id: int) -> Optional[Tuple[int, int, int]]:
+        """
+        (version, chain length, record count) of the newest record, or None without history.
+        Compaction keeps the file short, so this scan is bounded.
+        """
+        last = None
+        count = 0
+        for version, chain, _ in self._records(task_id):
+            last = (version, chain)
+            count += 1
+        return last + (count,) if last else None
+
+    @staticmethod
+    def _drop_torn_record(file) -> None:
+        # A crash mid-append can leave a partial last line; cut it off before appending
+        size = file.seek(0, os.SEEK_END)
+        if not size:
+            return
+        with open(file.name, "rb") as reader:
+            end = size
+            while end > 0:
+                start = max(0, end - 4096)
+                reader.seek(start)
+                block = reader.read(end - start)
+                if end == size and block.endswith(b"\n"):
+                    return
+                newline = block.rfind(b"\n")
+                if newline >= 0:
+                    file.truncate(start + newline + 1)
+                    return
+                end = start
+        file.truncate(0)
+
+    @staticmethod
+    def _line(version: int, chain: int, timestamp: str, fields: List[str], **body: Any) -> str:
+        record = {"version": version, "chain": chain, "timestamp": timestamp, "fields": fields}
+        record.update(body)
+        return json.dumps(record) + "\n"
+
+    def record(self, before: Optional[Dict[str, Any]], after: Dict[str, Any]) -> None:
+        """
+        Append the revision that turned `before` into `after`.
+
+        If the history does not already end at `before`'s version (the task
+        was never edited, or was changed without recording), `before` is
+        written as a keyframe first so every recorded version can be rebuilt.
+
+        :param before: The task as it was, or None for a new task.
+        :param after: The task as it is now, with its new version.
+        """
+        task_id = after["id"]
+        last = self._last(task_id)
+        lines = []
+        chain = last[1] if last else 0
+        count = last[2] if last else 0
+        if before is not None and (last is None or last[0] != before.get("version", 1)):
+            lines.append(self._line(before.get("version", 1), 0, before.get("updated_at", ""), [], snapshot=before))
+            chain = 0
+            count += 1
+        fields = sorted(k for k in after if k not in _BOOKKEEPING and (before is None or before.get(k) != after[k]))
+        patch = None
+        if before is not None and chain < self.keyframe_interval:
+            patch = make_patch(before, after)
+            if len(json.dumps(patch)) >= len(json.dumps(after)):
+                patch = None  # a keyframe is smaller
+        if patch is not None:
+            lines.append(self._line(after["version"], chain + 1, after.get("updated_at", ""), fields, patch=patch))
+        else:
+            lines.append(self._line(after.get("version", 1), 0, after.get("updated_at", ""), fields, snapshot=after))
+        os.makedirs(self.directory, exist_ok=True)
+        created = not os.path.exists(self._path(task_id))
+        with open(self._path(task_id), "ab") as file:
+            self._drop_torn_record(file)
+            file.write("".join(lines).encode("utf-8"))
+            file.flush()
+            os.fsync(file.fileno())
+        if created:
+            fsync_dir(self.directory)
+        if count + 1 >= 2 * self.keep:
+            self.compact(task_id)
+
+    def history(self, task_id: int) -> List[Dict[str, Any]]:
+        """
+        Summaries of a task's recorded revisions, oldest first.
+
+        :param task_id: Task ID.
+        :return: {"version", "timestamp", "fields"} dicts; fields lists what changed.
+        """
+        out = []
+        for _, _, line in self._records(task_id):
+            record = json.loads(line)
+            out.append({key: record[key] for key in ("version", "timestamp", "fields")})
+        return out
+
+    def get(self, task_id: int, version: int) -> Optional[Dict[str, Any]]:
+        """
+        Rebuild a task as it was at one version.
+
+        Only the nearest keyframe at or before the version and the patches
+        after it are parsed; other records are skipped by their prefix.
+
+        :param task_id: Task ID.
+        :param version: Version to rebuild.
+        :return: The task snapshot, or None if that version was not recorded.
+        """
+        chain: List[str] = []
+        for record_version, length, line in self._records(task_id):
+            if record_version > version:
+                break
+            if length == 0:
+                chain = []
+            chain.append(line)
+            if record_version == version:
+                snapshot = json.loads(chain[0])["snapshot"]
+                for raw in chain[1:]:
+                    apply_patch(snapshot, json.loads(raw)["patch"])
+                return snapshot
+        return None
+
+    def compact(self, task_id: int, keep: Optional[int] = None) -> int:
+        """
+        Drop all but the newest revisions of a task.
+
+        The oldest kept revision is rewritten as a keyframe; the file is
+        replaced atomically.
+
+        :param task_id: Task ID.
+        :param keep: Revisions to keep (default: the store's keep setting).
+        :return: Number of revisions removed.
+        """
+        keep = self.keep if keep is None else keep
+        records = list(self._records(task_id))
+        if len(records) <= keep:
+            return 0
+        if keep <= 0:
+            self.remove(task_id)
+            return len(records)
+        kept = records[-keep:]
+        first = json.loads(kept[0][2])
+        if kept[0][1]:
+            first.pop("patch")
+            first["snapshot"] = self.get(task_id, kept[0][0])
+        lines = [self._line(first["version"], 0, first["timestamp"], first["fields"], snapshot=first["snapshot"])]
+        # Chain lengths restart at the new keyframe
+        base = kept[0][1]
+        for version, length, line in kept[1:]:
+            if length == 0:
+                base = 0
+            elif base:
+                record = json.loads(line)
+                line = self._line(version, length - base, record["timestamp"], record["fields"], patch=record["patch"])
+            lines.append(line)
+        atomic_write(self._path(task_id), lambda f: f.write("".join(lines)))
+        return len(records) - keep
+
+    def remove(self, task_id: int) -> None:
+        """
+        Delete a task's whole history.
+
+        :param task_id: Task ID.
+        """
+        try:
+            os.remove(self._path(task_id))
+        except FileNotFoundError:
+            pass
+
+    def gc(self, live_ids: Any, keep: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Remove the histories of tasks that no longer exist and trim the rest.
+
+        :param live_ids: Container of IDs of tasks that still exist.
+        :param keep: Revisions to keep per task (default: the store's keep setting).
+        :return: (histories removed, revisions dropped from the remaining ones).
+        """
+        removed = dropped = 0
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return 0, 0
+        for name in names:
+            stem, ext = os.path.splitext(name)
+            if ext != ".jsonl" or not stem.isdigit():
+                continue
+            if int(stem) not in live_ids:
+                self.remove(int(stem))
+                removed += 1
+            else:
+                dropped += self.compact(int(stem), keep)
+        return removed, dropped
@@ -0,0 +1,268 @@
+# Kept identical in final-project and names/src/task_manager; see "Shared modules" in the top-level README.md
+import marshal
+import math
+import re
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:  # package import (names)
+    from .durable import atomic_write
+except ImportError:  # flat layout (final-project) or run from inside the package
+    from durable import atomic_write
+
+_TOKEN_RE = re.compile(r"\w+")
+# Header of a saved index (see SearchIndex.save); bump when the layout changes
+_SAVED_FORMAT = "search-index-1"
+# Posting lists are saved as int64 arrays of interleaved (document ID, count)
+_PACKED = "q"
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lower-cased word tokens.
+
+    :param text: Text to tokenize.
+    :return: List of tokens in order of appearance.
+    """
+    return _TOKEN_RE.findall(text.lower())
+
+
+class SearchIndex:
+    """
+    An inverted index from tokens to the documents that contain them.
+
+    Each posting list maps a document ID to the number of times the term occurs
+    in it. A sorted vocabulary allows prefix queries via binary search, and a
+    map from trigrams to the terms containing them (built on the first infix
+    query) finds terms that contain a token anywhere. The index is updated
+    incrementally as documents are added, changed or removed.
+
+    An index can be saved to a file and loaded again. A loaded index keeps its
+    posting lists packed and decodes only those a query reads, so loading costs
+    little more than reading the file; the first change unpacks the rest.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty index.
+        """
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._doc_terms: Dict[int, Dict[str, int]] = {}
+        self._vocab: List[str] = []
+        # Trigram -> terms containing it, for infix queries; None until first needed
+        self._grams: Optional[Dict[str, Set[str]]] = None
+        # Posting lists of a loaded index not decoded yet, and its document count
+        self._packed: Dict[str, bytes] = {}
+        self._packed_docs = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_terms) or self._packed_docs
+
+    def _posting(self, term: str) -> Dict[int, int]:
+        posting = self._postings.get(term)
+        if posting is None:
+            values = array(_PACKED)
+            values.frombytes(self._packed.pop(term))
+            posting = self._postings[term] = dict(zip(values[::2], values[1::2]))
+        return posting
+
+    def _unpack(self) -> None:
+        """
+        Decode every packed posting list and rebuild the per-document terms,
+        so the index can be changed.
+        """
+        if not self._packed_docs:
+            return
+        for term in list(self._packed):
+            self._posting(term)
+        for term, posting in self._postings.items():
+            for doc_id, tf in posting.items():
+                terms = self._doc_terms.get(doc_id)
+                if terms is None:
+                    terms = self._doc_terms[doc_id] = {}
+                terms[term] = tf
+        self._packed_docs = 0
+
+    def add(self, doc_id: int, text: str) -> None:
+        """
+        Index a document, replacing any previous version of it.
+
+        :param doc_id: ID of the document.
+        :param text: Text to index.
+        """
+        self._unpack()
+        if doc_id in self._doc_terms:
+            self.remove(doc_id)
+        counts: Dict[str, int] = {}
+        for token in tokenize(text):
+            counts[token] = counts.get(token, 0) + 1
+        self._doc_terms[doc_id] = counts
+        for term, tf in counts.items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = {}
+                insort(self._vocab, term)
+                self._add_grams(term)
+            posting[doc_id] = tf
+
+    def add_many(self, docs: Iterable[Tuple[int, str]]) -> None:
+        """
+        Index many new documents at once, sorting the vocabulary only once.
+
+        :param docs: (document ID, text) pairs for IDs not yet in the index.
+        """
+        self._unpack()
+        for doc_id, text in docs:
+            counts = Counter(tokenize(text))
+            self._doc_terms[doc_id] = counts
+            for term, tf in counts.items():
+                posting = self._postings.get(term)
+                if posting is None:
+                    posting = self._postings[term] = {}
+                posting[doc_id] = tf
+        self._vocab = sorted(self._postings)
+        self._grams = None
+
+    def remove(self, doc_id: int) -> None:
+        """
+        Remove a document from the index. Unknown IDs are ignored.
+
+        :param doc_id: ID of the document.
+        """
+        self._unpack()
+        counts = self._doc_terms.pop(doc_id, None)
+        if not counts:
+            return
+        for term in counts:
+            posting = self._postings[term]
+            del posting[doc_id]
+            if not posting:
+                del self._postings[term]
+                del self._vocab[bisect_left(self._vocab, term)]
+                if self._grams is not None:
+                    for gram in _trigrams(term):
+                        self._grams[gram].discard(term)
+
+    def _add_grams(self, term: str) -> None:
+        if self._grams is not None:
+            for gram in _trigrams(term):
+                self._grams.setdefault(gram, set()).add(term)
+
+    def _infix_terms(self, token: str) -> List[str]:
+        """
+        Every term of the vocabulary that contains the token.
+        """
+        if len(token) < 3:
+            return [term for term in self._vocab if token in term]
+        if self._grams is None:
+            self._grams = {}
+            for term in self._vocab:
+                for gram in _trigrams(term):
+                    self._grams.setdefault(gram, set()).add(term)
+        candidates = sorted((self._grams.get(gram, set()) for gram in _trigrams(token)), key=len)
+        return [term for term in candidates[0].intersection(*candidates[1:]) if token in term]
+
+    def _matches(self, token: str, prefix: bool, infix: bool = False) -> Dict[int, float]:
+        """
+        Score every document matching a single query token.
+
+        :param token: The query token.
+        :param prefix: If True, match every term starting with the token.
+        :param infix: If True, match every term containing the token.
+        :return: Mapping of document ID to its tf-idf score for this token.
+        """
+        if infix:
+            terms = sorted(self._infix_terms(token))
+        elif prefix:
+            terms = []
+            i = bisect_left(self._vocab, token)
+            while i < len(self._vocab) and self._vocab[i].startswith(token):
+                terms.append(self._vocab[i])
+                i += 1
+        else:
+            terms = [token] if token in self._postings or token in self._packed else []
+
+        n_docs = len(self)
+        scores: Dict[int, float] = {}
+        for term in terms:
+            posting = self._posting(term)
+            idf = math.log(1 + n_docs / len(posting))
+            for doc_id, tf in posting.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + tf * idf
+        return scores
+
+    def search(self, query: str, prefix: bool = True, limit: Optional[int] = None, infix: bool = False) -> List[int]:
+        """
+        Find documents containing every query token, best matches first.
+
+        :param query: Free-text query; all of its tokens must match (AND).
+        :param prefix: If True, each token also matches longer terms it prefixes.
+        :param limit: Optional maximum number of results.
+        :param infix: If True, each token matches any term containing it
+            ("econ" finds "microeconomics").
+        :return: Matching document IDs ranked by tf-idf score, ties by ID.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        per_token = [self._matches(token, prefix, infix) for token in tokens]
+        # Intersect starting from the smallest candidate set
+        by_size = sorted(per_token, key=len)
+        candidates = set(by_size[0])
+        for other in by_size[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(other)
+        scores = {doc_id: sum(matches[doc_id] for matches in per_token) for doc_id in candidates}
+        ranked = sorted(scores, key=lambda doc_id: (-scores[doc_id], doc_id))
+        return ranked[:limit] if limit is not None else ranked
+
+    def save(self, path: str, stamp: Tuple) -> None:
+        """
+        Write the index to a file, tagged with a stamp of the data it was built from.
+
+        :param path: File to write (replaced atomically).
+        :param stamp: Identifies the source data, e.g. its (size, mtime_ns, inode).
+        """
+        packed = {term: self._pack(posting) for term, posting in self._postings.items()}
+        packed.update(self._packed)
+        try:
+            atomic_write(path, lambda file: marshal.dump((_SAVED_FORMAT, tuple(stamp), len(self), packed), file), binary=True)
+        except OSError:
+            pass  # the saved index is only a cache; failing to write it is harmless
+
+    @classmethod
+    def load(cls, path: str, stamp: Tuple) -> Optional["SearchIndex"]:
+        """
+        Read an index written by save, if it was built from the same data.
+
+        :param path: File to read.
+        :param stamp: Stamp of the current source data.
+        :return: The index, or None if the file is missing, unreadable or stale.
+        """
+        try:
+            with open(path, 'rb') as file:
+                saved_format, saved_stamp, n_docs, packed = marshal.load(file)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if saved_format != _SAVED_FORMAT or saved_stamp != tuple(stamp):
+            return None
+        index = cls()
+        index._packed, index._packed_docs = packed, n_docs
+        index._vocab = sorted(packed)
+        return index
+
+    @staticmethod
+    def _pack(posting: Dict[int, int]) -> bytes:
+        values = array(_PACKED)
+        for doc_id, tf in posting.items():
+            values.append(doc_id)
+            values.append(tf)
+        return values.tobytes()
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
@@ -1,159 +1,580 @@
-import json
+import collections
+import copy
+import functools
+import mimetypes
 import os
 import datetime
-from typing import Any, Dict, List, Optional
+import uuid
+import warnings
+from contextlib import contextmanager
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-TASK_FILE = os.path.join(os.getcwd(), ".tasks.json")
+try:  # package import
+    from .attachments import BlobStore
+    from .columnar import ColumnarFile, ColumnarReader, is_columnar, write_columnar
+    from .durable import atomic_write, atomic_write_json
+    from .filter_index import FilterIndex
+    from .json_stream import OffsetIndex, iter_json_array, write_json_array
+    from .link_graph import LinkGraph
+    from .locking import FileLock, VersionConflictError, file_stamp
+    from .records import Task, json_default
+    from .revisions import RevisionStore
+    from .search_index import SearchIndex
+except ImportError:  # fallback if executed directly inside package dir
+    from attachments import BlobStore
+    from columnar import ColumnarFile, ColumnarReader, is_columnar, write_columnar
+    from durable import atomic_write, atomic_write_json
+    from filter_index import FilterIndex
+    from json_stream import OffsetIndex, iter_json_array, write_json_array
+    from link_graph import LinkGraph
+    from locking import FileLock, VersionConflictError, file_stamp
+    from records import Task, json_default
+    from revisions import RevisionStore
+    from search_index import SearchIndex
+
+TASK_FILE = os.environ.get("TASKS_FILE") or os.path.join(os.getcwd(), ".tasks.json")
 VALID_STATUSES = ["open", "in-progress", "done", "blocked"]
+# Searches before a full load save their index beside the task file with this extension
+SEARCH_INDEX_SUFFIX = ".search"
+TASK_COLUMNS = (
+    ("id", "int"),
+    ("title", "str"),
+    ("description", "str"),
+    ("status", "status"),
+    ("tags", "strs"),
+    ("links", "ints"),
+    ("created_at", "timestamp"),
+    ("updated_at", "timestamp"),
+    ("version", "int"),
+)
+
+
+def read_snapshot(path: str) -> Iterator[Dict[str, Any]]:
+    # Stream the tasks of a JSON or columnar task file, one at a time
+    if is_columnar(path):
+        with ColumnarFile(path) as snapshot:
+            yield from snapshot
+    else:
+        yield from iter_json_array(path)
+
+
+def write_snapshot(path: str, tasks: Iterable[Dict[str, Any]]) -> int:
+    # Atomically write tasks as JSON or columnar, depending on the extension
+    counts = []
+    if is_columnar(path):
+        atomic_write(path, lambda f: counts.append(write_columnar(f, tasks, TASK_COLUMNS)), binary=True)
+    else:
+        atomic_write(path, lambda f: counts.append(write_json_array(f, tasks, indent=2, default=json_default)))
+    return counts[0]
+
+
+def convert_snapshot(source: str, destination: str) -> int:
+    # Copy a task file between JSON and columnar (by extension) without loading it
+    return write_snapshot(destination, read_snapshot(source))
+
+
+def _locked(method):
+    # Mutations run under the file lock, on the latest state on disk, and save before releasing it
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._writing():
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class TaskRepository:
     def __init__(self, path: str = TASK_FILE):
         self.path = path
-        self._tasks: List[Dict[str, Any]] = []
+        # Keyed by id; dicts keep insertion order, so listing stays in id order
+        # while lookups and deletes are O(1). Tasks are slotted records that
+        # read like dicts (see records.py).
+        self._tasks: Dict[int, Task] = {}
+        self._max_id = 0
+        self._search = SearchIndex()
+        # status -> ids, tag -> ids and created_at order, for search filters and
+        # summary; built on first use, then kept in step with every change
+        self._filters: Optional[FilterIndex] = None
+        # Set adjacency plus reverse index mirroring each task's "links"
+        self._graph = LinkGraph()
+        # Lets get/search read single records before (or without) a full load.
+        # A columnar file is its own index (and answers summary from its status column).
+        self._columnar = is_columnar(path)
+        self._offsets = ColumnarReader(path) if self._columnar else OffsetIndex(path)
         self._loaded = False
+        # Group commit: inside batch(), save() is deferred to the end
+        self._batch_depth = 0
+        self._dirty = False
+        # Writers in any process serialise on this lock; readers never take it
+        self._lock = FileLock(path + ".lock")
+        # Stamp of the file the in-memory tasks were loaded from (see refresh)
+        self._stamp = None
+        # Earlier versions of edited tasks, as keyframes plus patches
+        self._revisions = RevisionStore(path + ".revisions")
+        # Attachment data, stored once per distinct content
+        self._blobs = BlobStore(path + ".blobs")
 
     def load(self) -> None:
         if self._loaded:
             return
-        if os.path.exists(self.path):
-            with open(self.path, "r", encoding="utf-8") as f:
+        self._stamp = file_stamp(self.path)
+        # An empty file (e.g. freshly created) simply holds no tasks
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            try:
+                # Parse incrementally to keep peak memory close to the data itself
+                self._tasks = {t["id"]: Task.from_dict(t) for t in read_snapshot(self.path)}
+            except ValueError as e:  # includes json.JSONDecodeError
+                # Corrupted file (saves are atomic, so this should not come from
+                # a crash); start fresh but keep a backup and say so loudly
+                backup = self._backup_path()
                 try:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        self._tasks = data
-                except json.JSONDecodeError:
-                    # Corrupted file; start fresh but preserve a backup
-                    backup = self.path + ".bak"
-                    try:
-                        os.replace(self.path, backup)
-                    except OSError:
-                        pass
-                    self._tasks = []
+                    os.replace(self.path, backup)
+                except OSError:
+                    backup = None
+                warnings.warn(
+                    f"{self.path} is not valid {'columnar data' if self._columnar else 'JSON'} ({e}); "
+                    + (f"moved it to {backup} and started an empty task list" if backup else "starting an empty task list"),
+                    RuntimeWarning,
+                    stacklevel=2,
+                )
+                self._tasks = {}
+        self._max_id = max(self._tasks, default=0)
+        self._search.add_many((t.id, self._search_text(t)) for t in self._tasks.values())
+        self._filters = None
+        self._graph = LinkGraph.from_links((t.id, t.get("links", [])) for t in self._tasks.values())
         self._loaded = True
 
+    def refresh(self) -> bool:
+        # Reload if another process replaced the file since it was loaded; one stat otherwise
+        if not self._loaded or file_stamp(self.path) == self._stamp:
+            return False
+        self._tasks = {}
+        self._search = SearchIndex()
+        self._loaded = False
+        self.load()
+        return True
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        # Read-modify-write under the lock, starting from what is on disk now
+        with self._lock:
+            if not self.refresh():
+                self.load()
+            yield
+
     def save(self) -> None:
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(self._tasks, f, indent=2)
+        if self._batch_depth:
+            self._dirty = True
+            return
+        # Temp file + fsync + rename: a crash leaves either the old or the new file,
+        # and readers in other processes always see a complete one
+        with self._lock:
+            if self._columnar:
+                atomic_write(self.path, lambda f: write_columnar(f, self._tasks.values(), TASK_COLUMNS), binary=True)
+            else:
+                atomic_write_json(self.path, list(self._tasks.values()), indent=2, default=json_default)
+            self._stamp = file_stamp(self.path)
+
+    @contextmanager
+    def batch(self) -> Iterator["TaskRepository"]:
+        # Group commit: mutations inside the block are saved once, on exit.
+        # Other processes' writes wait until the block ends.
+        with self._writing():
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if not self._batch_depth and self._dirty:
+                    self._dirty = False
+                    self.save()
+
+    def _backup_path(self) -> str:
+        # Never overwrite an earlier backup
+        backup = self.path + ".bak"
+        n = 1
+        while os.path.exists(backup):
+            backup = f"{self.path}.bak{n}"
+            n += 1
+        return backup
+
+    @staticmethod
+    def _search_text(task: Dict[str, Any]) -> str:
+        return task["title"] + " " + task["description"]
 
     def _now(self) -> str:
         return datetime.datetime.utcnow().isoformat(timespec="seconds") + "Z"
 
     def _next_id(self) -> int:
-        if not self._tasks:
-            return 1
-        return max(t["id"] for t in self._tasks) + 1
+        return self._max_id + 1
+
+    @staticmethod
+    def _check_version(task: Dict[str, Any], expected_version: Optional[int]) -> None:
+        # Compare-and-swap: refuse to change a task someone else changed since it was read
+        if expected_version is not None and task.get("version", 1) != expected_version:
+            raise VersionConflictError(task["id"], expected_version, task.get("version", 1))
+
+    def _touch(self, task: Dict[str, Any]) -> None:
+        task["updated_at"] = self._now()
+        task["version"] = task.get("version", 1) + 1
 
     def list(self) -> List[Dict[str, Any]]:
         self.load()
-        return list(self._tasks)
+        return list(self._tasks.values())
 
     def get(self, task_id: int) -> Optional[Dict[str, Any]]:
+        if not self._loaded:
+            # Read-only lookup: seek straight to the record instead of loading everything
+            try:
+                return self._offsets.get(task_id)
+            except (ValueError, KeyError, TypeError):
+                pass  # not a valid task list; let load() deal with it
+        return self._get(task_id)
+
+    def _get(self, task_id: int) -> Optional[Dict[str, Any]]:
         self.load()
-        for t in self._tasks:
-            if t["id"] == task_id:
-                return t
-        return None
+        return self._tasks.get(task_id)
 
-    def add(self, title: str, description: str = "", status: str = "open", tags: Optional[List[str]] = None) -> Dict[str, Any]:
+    @_locked
+    def add(self, title: str, description: str = "", status: str = "open", tags: Optional[List[str]] = None) -> Task:
         self.load()
         if status not in VALID_STATUSES:
             raise ValueError(f"Invalid status '{status}'. Valid: {', '.join(VALID_STATUSES)}")
         now = self._now()
-        task = {
-            "id": self._next_id(),
-            "title": title.strip(),
-            "description": description.strip(),
-            "status": status,
-            "tags": tags or [],
-            "links": [],
-            "created_at": now,
-            "updated_at": now,
-        }
-        self._tasks.append(task)
+        task = Task(
+            id=self._next_id(),
+            title=title.strip(),
+            description=description.strip(),
+            status=status,
+            tags=tags or [],
+            links=[],
+            created_at=now,
+            updated_at=now,
+            version=1,
+        )
+        self._tasks[task.id] = task
+        self._max_id = task.id
+        self._search.add(task.id, self._search_text(task))
+        if self._filters is not None:
+            self._filters.add(task)
+        self._graph.add_node(task.id)
         self.save()
         return task
 
-    def edit(self, task_id: int, title: Optional[str] = None, description: Optional[str] = None, status: Optional[str] = None, tags: Optional[List[str]] = None) -> Dict[str, Any]:
-        task = self.get(task_id)
+    @_locked
+    def add_many(self, rows: Iterable[Dict[str, Any]]) -> List[Task]:
+        # Bulk insert with a single save. Rows come from bulk.read_tasks; a row's "id"
+        # is only a key its "links" (and other rows') refer to, remapped to the new ids.
+        self.load()
+        now = self._now()
+        new_ids: Dict[Any, int] = {}
+        added = []
+        with self.batch():
+            for row in rows:
+                task = Task(
+                    id=self._next_id(),
+                    title=row["title"],
+                    description=row.get("description", ""),
+                    status=row.get("status", "open"),
+                    tags=row.get("tags", []),
+                    links=[],
+                    created_at=row.get("created_at", now),
+                    updated_at=row.get("updated_at", now),
+                    version=1,
+                )
+                if row.get("id") is not None:
+                    new_ids[row["id"]] = task.id
+                self._tasks[task.id] = task
+                self._max_id = task.id
+                self._search.add(task.id, self._search_text(task))
+                if self._filters is not None:
+                    self._filters.add(task)
+                self._graph.add_node(task.id)
+                added.append((task, row.get("links", [])))
+            # Resolve links once every row has its id, so rows may point forward
+            for task, links in added:
+                for other_id in (new_ids.get(key) for key in links):
+                    if other_id is None or other_id == task.id:
+                        continue
+                    for a, b in ((task.id, other_id), (other_id, task.id)):
+                        if not self._graph.has_edge(a, b):
+                            self._tasks[a]["links"].append(b)
+                            self._graph.add_edge(a, b)
+            if added:
+                self.save()
+        return [task for task, _ in added]
+
+    def iter_tasks(self) -> Iterator[Dict[str, Any]]:
+        # Before a load, stream the file instead of loading it (bounded memory for exports).
+        # Streamed tasks are dicts; once loaded, the live Task records are yielded instead
+        if not self._loaded:
+            if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                yield from read_snapshot(self.path)
+            return
+        yield from list(self._tasks.values())
+
+    @_locked
+    def edit(self, task_id: int, title: Optional[str] = None, description: Optional[str] = None, status: Optional[str] = None, tags: Optional[List[str]] = None,
+             expected_version: Optional[int] = None) -> Dict[str, Any]:
+        task = self._get(task_id)
         if not task:
             raise KeyError(f"Task {task_id} not found")
+        self._check_version(task, expected_version)
+        if status is not None and status not in VALID_STATUSES:
+            raise ValueError(f"Invalid status '{status}'. Valid: {', '.join(VALID_STATUSES)}")
+        before = copy.deepcopy(task.to_dict())
         changed = False
+        reindex = self._filters is not None and (status is not None or tags is not None)
+        if reindex:
+            self._filters.remove(task)
         if title is not None:
             task["title"] = title.strip(); changed = True
         if description is not None:
             task["description"] = description.strip(); changed = True
         if status is not None:
-            if status not in VALID_STATUSES:
-                raise ValueError(f"Invalid status '{status}'. Valid: {', '.join(VALID_STATUSES)}")
             task["status"] = status; changed = True
         if tags is not None:
             task["tags"] = tags; changed = True
+        if reindex:
+            self._filters.add(task)
+        if title is not None or description is not None:
+            self._search.add(task_id, self._search_text(task))
         if changed:
-            task["updated_at"] = self._now()
+            self._touch(task)
             self.save()
+            self._revisions.record(before, task.to_dict())
         return task
 
-    def delete(self, task_id: int) -> bool:
+    @_locked
+    def delete(self, task_id: int, expected_version: Optional[int] = None) -> bool:
         self.load()
-        for i, t in enumerate(self._tasks):
-            if t["id"] == task_id:
-                # Remove links pointing to this task
-                for other in self._tasks:
-                    if task_id in other.get("links", []):
-                        other["links"] = [lid for lid in other["links"] if lid != task_id]
-                del self._tasks[i]
-                self.save()
-                return True
-        return False
+        if task_id not in self._tasks:
+            return False
+        self._check_version(self._tasks[task_id], expected_version)
+        # Remove links pointing to this task; the reverse index names exactly those tasks
+        for other_id in self._graph.remove_node(task_id):
+            other = self._tasks[other_id]
+            other["links"] = [lid for lid in other["links"] if lid != task_id]
+        if self._filters is not None:
+            self._filters.remove(self._tasks[task_id])
+        del self._tasks[task_id]
+        self._search.remove(task_id)
+        self.save()
+        self._revisions.remove(task_id)
+        return True
 
+    @_locked
     def link(self, source_id: int, target_id: int) -> None:
         if source_id == target_id:
             raise ValueError("Cannot link a task to itself")
-        source = self.get(source_id)
-        target = self.get(target_id)
+        source = self._get(source_id)
+        target = self._get(target_id)
         if not source or not target:
             raise KeyError("Both tasks must exist to create a link")
-        if target_id not in source["links"]:
+        before = [copy.deepcopy(source.to_dict()), copy.deepcopy(target.to_dict())]
+        if not self._graph.has_edge(source_id, target_id):
             source["links"].append(target_id)
-            source["updated_at"] = self._now()
-        if source_id not in target["links"]:
+            self._touch(source)
+            self._graph.add_edge(source_id, target_id)
+        if not self._graph.has_edge(target_id, source_id):
             target["links"].append(source_id)
-            target["updated_at"] = self._now()
+            self._touch(target)
+            self._graph.add_edge(target_id, source_id)
         self.save()
+        self._record_changes(before, [source, target])
 
+    @_locked
     def unlink(self, source_id: int, target_id: int) -> None:
-        source = self.get(source_id)
-        target = self.get(target_id)
+        source = self._get(source_id)
+        target = self._get(target_id)
         if not source or not target:
             raise KeyError("Both tasks must exist to remove a link")
-        if target_id in source["links"]:
+        before = [copy.deepcopy(source.to_dict()), copy.deepcopy(target.to_dict())]
+        if self._graph.has_edge(source_id, target_id):
             source["links"] = [lid for lid in source["links"] if lid != target_id]
-            source["updated_at"] = self._now()
-        if source_id in target["links"]:
+            self._touch(source)
+            self._graph.remove_edge(source_id, target_id)
+        if self._graph.has_edge(target_id, source_id):
             target["links"] = [lid for lid in target["links"] if lid != source_id]
-            target["updated_at"] = self._now()
+            self._touch(target)
+            self._graph.remove_edge(target_id, source_id)
         self.save()
+        self._record_changes(before, [source, target])
+
+    def _record_changes(self, before: List[Dict[str, Any]], after: List[Task]) -> None:
+        for old, new in zip(before, after):
+            if old["version"] != new.version:
+                self._revisions.record(old, new.to_dict())
+
+    def history(self, task_id: int) -> List[Dict[str, Any]]:
+        # Recorded revisions, oldest first, ending with the current version
+        task = self._get(task_id)
+        if not task:
+            raise KeyError(f"Task {task_id} not found")
+        revisions = self._revisions.history(task_id)
+        if not revisions or revisions[-1]["version"] != task.get("version", 1):
+            revisions.append({"version": task.get("version", 1), "timestamp": task["updated_at"], "fields": []})
+        return revisions
+
+    def get_version(self, task_id: int, version: int) -> Optional[Dict[str, Any]]:
+        # The task as it was at that version; replays patches from the nearest keyframe
+        task = self.get(task_id)
+        if task and task.get("version", 1) == version:
+            return task
+        return self._revisions.get(task_id, version) if task else None
+
+    @_locked
+    def gc_revisions(self, keep: Optional[int] = None) -> Dict[str, int]:
+        # Drop histories of deleted tasks and all but the newest `keep` revisions of the rest
+        self.load()
+        removed, dropped = self._revisions.gc(self._tasks, keep)
+        return {"histories_removed": removed, "revisions_dropped": dropped}
+
+    def attach(self, task_id: int, source: Union[str, IO[bytes]], filename: Optional[str] = None) -> Dict[str, Any]:
+        # The data is streamed into the blob store before taking the lock, so
+        # large files do not hold up other writers
+        if not self.get(task_id):
+            raise KeyError(f"Task {task_id} not found")
+        if filename is None:
+            filename = os.path.basename(source) if isinstance(source, str) else getattr(source, "name", "")
+        if not filename:
+            raise ValueError("An attachment needs a file name")
+        checksum, size = self._blobs.put(source)
+        return self._add_attachment(task_id, {
+            "id": str(uuid.uuid4()),
+            "filename": filename,
+            "checksum": checksum,
+            "size": size,
+            "mime_type": mimetypes.guess_type(filename)[0] or "application/octet-stream",
+            "created_at": self._now(),
+        })
+
+    @_locked
+    def _add_attachment(self, task_id: int, attachment: Dict[str, Any]) -> Dict[str, Any]:
+        task = self._get(task_id)
+        if not task:
+            raise KeyError(f"Task {task_id} not found")
+        before = copy.deepcopy(task.to_dict())
+        task["attachments"] = task.get("attachments", []) + [attachment]
+        self._touch(task)
+        self.save()
+        self._revisions.record(before, task.to_dict())
+        return attachment
+
+    def find_attachment(self, task_id: int, key: str) -> Dict[str, Any]:
+        # By attachment id or file name; the newest one wins when names repeat
+        task = self.get(task_id)
+        if not task:
+            raise KeyError(f"Task {task_id} not found")
+        for attachment in reversed(task.get("attachments", [])):
+            if key in (attachment["id"], attachment["filename"]):
+                return attachment
+        raise KeyError(f"Task {task_id} has no attachment '{key}'")
+
+    def read_attachment(self, task_id: int, key: str, destination: IO[bytes]) -> int:
+        # Copies the data out in chunks (through mmap for large blobs)
+        return self._blobs.copy_to(self.find_attachment(task_id, key)["checksum"], destination)
+
+    def verify_attachments(self, workers: Optional[int] = None) -> List[Tuple[int, Dict[str, Any], str]]:
+        # Re-hash every attached blob in parallel; (task id, attachment, problem) for each bad one
+        self.load()
+        attached = [(t["id"], a) for t in self._tasks.values() for a in t.get("attachments", [])]
+        problems = self._blobs.verify(((a["checksum"], a["size"]) for _, a in attached), workers)
+        return [(tid, a, problems[a["checksum"]]) for tid, a in attached if a["checksum"] in problems]
+
+    @_locked
+    def gc_attachments(self) -> int:
+        # Delete blobs no task refers to any more (e.g. after deleting the task)
+        self.load()
+        return len(self._blobs.gc(a["checksum"] for t in self._tasks.values() for a in t.get("attachments", [])))
+
+    def graph(self) -> LinkGraph:
+        # Read-only view for traversal queries (BFS/DFS, k-hop, paths, components)
+        self.load()
+        return self._graph
+
+    def search(self, text: str = "", tag: Optional[str] = None, status: Optional[str] = None,
+               since: Optional[str] = None, until: Optional[str] = None) -> List[Dict[str, Any]]:
+        # since/until bound created_at (ISO 8601 strings compare in time order): since <= created_at < until
+        tag, status, since, until = tag or None, status or None, since or None, until or None
+        if not self._loaded and text and text.strip() and os.path.exists(self.path):
+            try:
+                return self._search_file(text, tag, status, since, until)
+            except (ValueError, KeyError, TypeError):
+                pass  # not a valid task list; let load() deal with it
+        self.load()
+        # Filters come from the secondary indexes, smallest candidate set first
+        allowed = None
+        if status or tag or since or until:
+            allowed = self._filter_index().ids(status, tag, since, until, created_at=lambda tid: self._tasks[tid].get("created_at"))
+        if text and text.strip():
+            # Ranked candidates from the inverted index (all words must match)
+            return [self._tasks[tid] for tid in self._search.search(text, infix=True) if allowed is None or tid in allowed]
+        if allowed is None:
+            return list(self._tasks.values())
+        return [self._tasks[tid] for tid in sorted(allowed)]
+
+    def _search_file(self, text: str, tag: Optional[str], status: Optional[str],
+                     since: Optional[str] = None, until: Optional[str] = None) -> List[Dict[str, Any]]:
+        # Rank through the index saved beside the file, rebuilt with one streaming
+        # pass when the file has changed since, then read only the matching tasks
+        stamp = file_stamp(self.path)
+        if stamp is None:
+            return []
+        index_path = self.path + SEARCH_INDEX_SUFFIX
+        index = SearchIndex.load(index_path, stamp)
+        if index is None:
+            index = SearchIndex()
+            try:
+                index.add_many((t["id"], self._search_text(t)) for t in read_snapshot(self.path))
+            except FileNotFoundError:
+                return []
+            index.save(index_path, stamp)
+
+        def passes(t: Dict[str, Any]) -> bool:
+            if (status and t["status"] != status) or (tag and tag not in t.get("tags", [])):
+                return False
+            if since or until:
+                created = t.get("created_at")
+                return type(created) is str and (not since or created >= since) and (not until or created < until)
+            return True
+
+        return [t for t in self._offsets.get_many(index.search(text, infix=True)) if passes(t)]
 
-    def search(self, text: str = "", tag: Optional[str] = None, status: Optional[str] = None) -> List[Dict[str, Any]]:
+    def _filter_index(self) -> FilterIndex:
         self.load()
-        terms = text.lower().split() if text else []
-        result = []
-        for t in self._tasks:
-            if status and t["status"] != status:
-                continue
-            if tag and tag not in t.get("tags", []):
-                continue
-            if terms:
-                hay = (t["title"] + " " + t["description"]).lower()
-                if not all(term in hay for term in terms):
-                    continue
-            result.append(t)
-        return result
+        if self._filters is None:
+            self._filters = FilterIndex()
+            self._filters.add_many(self._tasks.values())
+        return self._filters
 
     def summary(self) -> Dict[str, int]:
+        if not self._loaded and self._columnar:
+            # Count the status column without decoding any task
+            try:
+                snapshot = self._offsets.current()
+            except ValueError:
+                snapshot = None  # not a valid task file; let load() deal with it
+            if snapshot is not None:
+                counts = collections.Counter(snapshot.values("status"))
+                # Rows whose status is not in the column hold code 0 there
+                bit, absent, null = snapshot.mask("status")
+                masked = [i for i, (a, z) in enumerate(zip(absent, null)) if (a | z) & bit]
+                counts[0] -= len(masked)
+                table = snapshot.table("status")
+                out = {s: 0 for s in VALID_STATUSES}
+                for code, n in counts.items():
+                    if n:
+                        out[table[code]] = out.get(table[code], 0) + n
+                for i in masked:
+                    t = snapshot.row(i)
+                    if "status" in t:
+                        out[t["status"]] = out.get(t["status"], 0) + 1
+                out["total"] = len(snapshot)
+                return out
         self.load()
-        out: Dict[str, int] = {s: 0 for s in VALID_STATUSES}
-        for t in self._tasks:
-            out[t["status"]] = out.get(t["status"], 0) + 1
+        # Maintained counters: the status sets of the filter index
+        counts = self._filter_index().status_counts()
+        out = {s: counts.get(s, 0) for s in VALID_STATUSES}
+        out.update((s, n) for s, n in counts.items() if s not in out)
         out["total"] = len(self._tasks)
         return out
@@ -33,6 +33,10 @@ def test_search_cli():
         run_cli(["add", "Docs"], os.path.join(tmpdir.name, ".tasks.json"))
         r_search = run_cli(["search", "-q", "Parser"], os.path.join(tmpdir.name, ".tasks.json"))
         assert "Parser" in r_search.stdout
+        run_cli(["add", "Homework task", "-d", "microeconomics problem set"], os.path.join(tmpdir.name, ".tasks.json"))
+        for query in ("econ", "ask"):
+            r_search = run_cli(["search", "-q", query], os.path.join(tmpdir.name, ".tasks.json"))
+            assert "Homework task" in r_search.stdout
     finally:
         tmpdir.cleanup()
 
@@ -52,3 +56,110 @@ def test_link_unlink_cli():
         assert "links: -" in show2.stdout
     finally:
         tmpdir.cleanup()
+
+
+def test_graph_cli():
+    tmpdir = tempfile.TemporaryDirectory()
+    try:
+        task_file = os.path.join(tmpdir.name, ".tasks.json")
+        for name in ("A", "B", "C"):
+            run_cli(["add", name], task_file)
+        run_cli(["link", "1", "2"], task_file)
+        run_cli(["link", "2", "3"], task_file)
+        path = run_cli(["graph", "path", "1", "3"], task_file)
+        assert "#1 -> #2 -> #3" in path.stdout
+        near = run_cli(["graph", "neighbors", "1", "-k", "2"], task_file)
+        assert "#3 (2 hops) C" in near.stdout
+        groups = run_cli(["graph", "components"], task_file)
+        assert "3 tasks: 1,2,3" in groups.stdout
+    finally:
+        tmpdir.cleanup()
+
+
+def test_concurrent_cli_writers():
+    tmpdir = tempfile.TemporaryDirectory()
+    try:
+        procs = [
+            subprocess.Popen([sys.executable, CLI_PATH, "add", f"Task {i}"], cwd=tmpdir.name, stdout=subprocess.DEVNULL)
+            for i in range(8)
+        ]
+        assert all(p.wait() == 0 for p in procs)
+        with open(os.path.join(tmpdir.name, ".tasks.json"), encoding="utf-8") as f:
+            tasks = json.load(f)
+        assert sorted(t["id"] for t in tasks) == list(range(1, 9))
+        assert sorted(t["title"] for t in tasks) == sorted(f"Task {i}" for i in range(8))
+    finally:
+        tmpdir.cleanup()
+
+
+def test_import_export_cli():
+    tmpdir = tempfile.TemporaryDirectory()
+    try:
+        task_file = os.path.join(tmpdir.name, ".tasks.json")
+        run_cli(["add", "A", "-t", "x", "y"], task_file)
+        run_cli(["add", "B"], task_file)
+        run_cli(["link", "1", "2"], task_file)
+        for name in ("out.csv", "out.ndjson", "out.json"):
+            assert run_cli(["export", name], task_file).returncode == 0
+        with open(os.path.join(tmpdir.name, "out.ndjson"), "a", encoding="utf-8") as f:
+            f.write('{"title": "C", "status": "later"}\n')
+        with open(os.path.join(tmpdir.name, "out.json"), encoding="utf-8") as f:
+            bundle = json.load(f)
+        assert bundle["entities"]["tasks"][0]["status"] == "todo"
+
+        r = run_cli(["import", "out.ndjson"], task_file)
+        assert r.returncode == 1
+        assert "line 3: Invalid status 'later'" in r.stdout
+        assert run_cli(["import", "out.csv"], task_file).returncode == 0
+        assert run_cli(["import", "out.json"], task_file).returncode == 0
+        r = run_cli(["export", "-f", "ndjson"], task_file)
+        tasks = [json.loads(line) for line in r.stdout.splitlines()]
+        assert [t["title"] for t in tasks] == ["A", "B"] * 4
+        assert [t["links"] for t in tasks[6:]] == [[8], [7]]
+        assert tasks[6]["tags"] == ["x", "y"]
+
+        with open(os.path.join(tmpdir.name, "more.txt"), "w", encoding="utf-8") as f:
+            f.write('{"title": "D"}\n')
+        r = run_cli(["import", "more.txt"], task_file)
+        assert r.returncode == 1
+        assert "pass --format" in r.stdout
+        assert run_cli(["import", "more.txt", "-f", "ndjson"], task_file).returncode == 0
+    finally:
+        tmpdir.cleanup()
+
+
+def test_history_and_show_version_cli():
+    tmpdir = tempfile.TemporaryDirectory()
+    try:
+        task_file = os.path.join(tmpdir.name, ".tasks.json")
+        run_cli(["add", "Draft", "-d", "Outline"], task_file)
+        run_cli(["edit", "1", "-t", "Final"], task_file)
+        run_cli(["edit", "1", "-s", "done"], task_file)
+        r_hist = run_cli(["history", "1"], task_file)
+        assert r_hist.returncode == 0
+        assert [line.split()[0] for line in r_hist.stdout.splitlines()] == ["v1", "v2", "v3"]
+        assert r_hist.stdout.splitlines()[2].endswith("status")
+        r_old = run_cli(["show", "1", "--version", "1"], task_file)
+        assert "#1 [open] Draft" in r_old.stdout
+        r_missing = run_cli(["show", "1", "--version", "9"], task_file)
+        assert r_missing.returncode == 1
+    finally:
+        tmpdir.cleanup()
+
+
+def test_attach_and_verify_cli():
+    tmpdir = tempfile.TemporaryDirectory()
+    try:
+        task_file = os.path.join(tmpdir.name, ".tasks.json")
+        notes = os.path.join(tmpdir.name, "notes.txt")
+        with open(notes, "w") as f:
+            f.write("meeting notes")
+        run_cli(["add", "Review"], task_file)
+        r_attach = run_cli(["attach", "1", notes], task_file)
+        assert r_attach.returncode == 0
+        assert "Attached notes.txt (13 bytes" in r_attach.stdout
+        assert run_cli(["verify"], task_file).stdout.strip() == "All attachments intact"
+        r_extract = run_cli(["extract", "1", "notes.txt", "-o", "-"], task_file)
+        assert r_extract.stdout == "meeting notes"
+    finally:
+        tmpdir.cleanup()
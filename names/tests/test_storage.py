@@ -1,6 +1,10 @@
+import hashlib
+import json
 import os
+import shutil
 import tempfile
-from src.task_manager.storage import TaskRepository
+from src.task_manager.records import Task
+from src.task_manager.storage import TaskRepository, convert_snapshot
 
 
 def make_repo():
@@ -15,6 +19,7 @@ def cleanup(path):
         os.remove(path)
     except OSError:
         pass
+    shutil.rmtree(path + ".revisions", ignore_errors=True)
 
 
 def test_add_and_list():
@@ -83,3 +88,312 @@ def test_link_and_unlink():
         assert b["id"] not in repo.get(a["id"])["links"]
     finally:
         cleanup(path)
+
+
+def test_search_uses_ranked_infix_index():
+    repo, path = make_repo()
+    try:
+        a = repo.add("Implement parser", "tokenizer and parser tests", tags=["core"])
+        b = repo.add("Parse config", "", tags=["core"])
+        repo.add("Write docs", "")
+        assert [t["id"] for t in repo.search(text="parser")] == [a["id"]]
+        assert [t["id"] for t in repo.search(text="pars")] == [a["id"], b["id"]]
+        assert [t["id"] for t in repo.search(text="pars token")] == [a["id"]]
+        # Words also match in the middle of longer words
+        assert [t["id"] for t in repo.search(text="kenize")] == [a["id"]]
+        assert [t["id"] for t in repo.search(text="arse")] == [a["id"], b["id"]]
+        repo.edit(b["id"], title="Tokenizer config")
+        assert [t["id"] for t in repo.search(text="token", tag="core")] == [a["id"], b["id"]]
+        repo.delete(a["id"])
+        assert [t["id"] for t in repo.search(text="token")] == [b["id"]]
+    finally:
+        cleanup(path)
+
+
+def test_fresh_repo_reads_without_loading():
+    repo, path = make_repo()
+    try:
+        a = repo.add("Implement parser", "", tags=["core"])
+        b = repo.add("Parser docs", "", tags=["docs"])
+        fresh = TaskRepository(path=path)
+        assert fresh.get(b["id"])["title"] == "Parser docs"
+        assert fresh.get(99) is None
+        assert [t["id"] for t in fresh.search(text="parser", tag="core")] == [a["id"]]
+        assert [t["id"] for t in fresh.search(text="lement")] == [a["id"]]
+        assert not fresh._loaded
+        assert os.path.exists(path + ".search")
+        fresh.edit(a["id"], title="Implement lexer")
+        assert fresh._loaded
+        assert TaskRepository(path=path).get(a["id"])["title"] == "Implement lexer"
+        # The saved search index is stale now and gets rebuilt
+        assert [t["id"] for t in TaskRepository(path=path).search(text="lexer")] == [a["id"]]
+    finally:
+        cleanup(path)
+        cleanup(path + ".idx")
+        cleanup(path + ".search")
+
+
+def test_graph_queries_follow_links():
+    repo, path = make_repo()
+    try:
+        ids = [repo.add(name)["id"] for name in ("A", "B", "C", "D", "E")]
+        repo.link(ids[0], ids[1])
+        repo.link(ids[1], ids[2])
+        repo.link(ids[3], ids[4])
+        graph = repo.graph()
+        assert graph.k_hop(ids[0], 2) == {ids[1]: 1, ids[2]: 2}
+        assert graph.shortest_path(ids[0], ids[2]) == [ids[0], ids[1], ids[2]]
+        assert graph.components() == [ids[:3], ids[3:]]
+        repo.delete(ids[1])
+        assert repo.get(ids[0])["links"] == []
+        assert repo.get(ids[2])["links"] == []
+        assert repo.graph().shortest_path(ids[0], ids[2]) is None
+        # Reloading from disk rebuilds the same graph
+        fresh = TaskRepository(path=path)
+        assert fresh.graph().components() == [ids[3:], [ids[0]], [ids[2]]]
+    finally:
+        cleanup(path)
+
+
+def test_tasks_are_records_saved_unchanged():
+    repo, path = make_repo()
+    try:
+        raw = {"id": 1, "title": "A", "description": "", "status": "someday", "tags": ["x"], "links": [],
+               "created_at": "2026-01-01T00:00:00Z", "updated_at": "2026-01-01T00:00:00Z", "version": 2,
+               "attachments": [], "owner": "me"}
+        with open(path, "w") as f:
+            json.dump([raw], f)
+        task = repo.list()[0]
+        assert isinstance(task, Task) and task == raw
+        assert task.status == "someday" and task["owner"] == "me"
+        b = repo.add("B", tags=["x"])
+        assert b["tags"][0] is task["tags"][0]  # interned
+        with open(path) as f:
+            assert json.load(f)[0] == raw
+    finally:
+        cleanup(path)
+
+
+def test_columnar_file_round_trips_and_reads_lazily():
+    repo, path = make_repo()
+    col = path + ".tcol"
+    try:
+        a = repo.add("Parser", "Write it ✓", tags=["core"])
+        b = repo.add("Docs", status="blocked")
+        repo.link(a["id"], b["id"])
+        repo.edit(b["id"], description="Later")
+        with open(path) as f:
+            original = json.load(f)
+        original[0]["owner"] = "me"
+        original[1]["updated_at"] = "yesterday"  # not a timestamp; kept as JSON
+        with open(path, "w") as f:
+            json.dump(original, f, indent=2)
+        assert convert_snapshot(path, col) == 2
+        assert convert_snapshot(col, path) == 2
+        with open(path) as f:
+            assert f.read() == json.dumps(original, indent=2)
+
+        lazy = TaskRepository(path=col)
+        assert lazy.summary() == {"open": 1, "in-progress": 0, "done": 0, "blocked": 1, "total": 2}
+        assert lazy.get(b["id"]) == original[1]
+        assert [t["id"] for t in lazy.search("pars")] == [a["id"]]
+        assert not lazy._loaded
+        assert lazy.list() == original
+        lazy.edit(a["id"], status="done")
+        assert TaskRepository(path=col).summary()["done"] == 1
+    finally:
+        cleanup(path)
+        cleanup(col)
+        cleanup(col + ".search")
+
+
+def test_summary_follows_mutations():
+    repo, path = make_repo()
+    try:
+        a = repo.add("A")
+        b = repo.add("B", status="blocked")
+        assert repo.summary() == {"open": 1, "in-progress": 0, "done": 0, "blocked": 1, "total": 2}
+        repo.edit(a["id"], status="done")
+        repo.delete(b["id"])
+        repo.add("C", status="in-progress")
+        assert repo.summary() == {"open": 0, "in-progress": 1, "done": 1, "blocked": 0, "total": 2}
+    finally:
+        cleanup(path)
+
+
+def test_filters_use_secondary_indexes_and_follow_edits():
+    repo, path = make_repo()
+    try:
+        raw = [{"id": i, "title": f"T{i}", "description": "", "status": "open" if i % 2 else "done",
+                "tags": ["even"] if i % 2 == 0 else ["odd", "x"], "links": [],
+                "created_at": f"2026-01-{i:02d}T09:00:00Z", "updated_at": f"2026-01-{i:02d}T09:00:00Z", "version": 1}
+               for i in range(1, 11)]
+        with open(path, "w") as f:
+            json.dump(raw, f)
+        ids = lambda tasks: [t["id"] for t in tasks]
+        assert ids(repo.search(status="open", tag="x")) == [1, 3, 5, 7, 9]
+        assert ids(repo.search(tag="even", since="2026-01-04", until="2026-01-09")) == [4, 6, 8]
+        assert ids(repo.search(status="done", until="2026-01-03")) == [2]
+        assert ids(repo.search(text="T3", tag="odd")) == [3] and repo.search(text="T3", tag="even") == []
+        assert repo.search(tag="missing", status="open") == []
+
+        repo.edit(3, status="done", tags=["even"])
+        repo.delete(4)
+        repo.add("New", status="blocked", tags=["x"])
+        assert ids(repo.search(status="done", tag="even")) == [2, 3, 6, 8, 10]
+        assert ids(repo.search(tag="x")) == [1, 5, 7, 9, 11]
+        assert repo.summary() == {"open": 4, "in-progress": 0, "done": 5, "blocked": 1, "total": 10}
+        assert ids(repo.search(since="2026-01-10", until="2026-01-11")) == [10]
+    finally:
+        cleanup(path)
+
+
+def test_corrupt_file_is_backed_up_with_warning():
+    import pytest
+    repo, path = make_repo()
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('[{"id": 1, "title": "A"')
+        with pytest.warns(RuntimeWarning, match="not valid JSON"):
+            assert repo.list() == []
+        with open(path + ".bak", encoding="utf-8") as f:
+            assert f.read().startswith('[{"id": 1')
+    finally:
+        cleanup(path)
+        cleanup(path + ".bak")
+
+
+def test_batch_saves_once():
+    repo, path = make_repo()
+    try:
+        with repo.batch():
+            a = repo.add("A")
+            b = repo.add("B")
+            repo.link(a["id"], b["id"])
+            assert TaskRepository(path=path).list() == []
+        assert TaskRepository(path=path).get(b["id"])["links"] == [a["id"]]
+    finally:
+        cleanup(path)
+
+
+def test_versions_and_compare_and_swap():
+    import pytest
+    from src.task_manager.locking import VersionConflictError
+    repo, path = make_repo()
+    try:
+        a = repo.add("A")
+        b = repo.add("B")
+        assert a["version"] == 1
+        assert repo.edit(a["id"], status="done", expected_version=1)["version"] == 2
+        with pytest.raises(VersionConflictError):
+            repo.edit(a["id"], status="open", expected_version=1)
+        assert repo.get(a["id"])["status"] == "done"
+        repo.link(a["id"], b["id"])
+        assert [repo.get(t)["version"] for t in (a["id"], b["id"])] == [3, 2]
+        with pytest.raises(ValueError):  # the CLI reports conflicts like other bad input
+            repo.delete(b["id"], expected_version=1)
+        assert repo.delete(b["id"], expected_version=2)
+    finally:
+        cleanup(path)
+        cleanup(path + ".lock")
+
+
+def test_writers_start_from_latest_file():
+    repo, path = make_repo()
+    try:
+        other = TaskRepository(path=path)
+        a = repo.add("A")
+        assert other.list() == [a]
+        b = repo.add("B")
+        # other still holds the old list in memory, but its write reloads first
+        c = other.add("C")
+        assert c["id"] == b["id"] + 1
+        assert repo.refresh()
+        assert not repo.refresh()
+        assert [t["title"] for t in repo.list()] == ["A", "B", "C"]
+    finally:
+        cleanup(path)
+        cleanup(path + ".lock")
+
+
+def test_add_many_saves_once_and_remaps_links():
+    repo, path = make_repo()
+    try:
+        repo.add("Existing")
+        rows = [
+            {"id": "a", "title": "A", "links": ["b", "missing"]},
+            {"id": "b", "title": "B", "tags": ["x"], "status": "done", "links": []},
+        ]
+        a, b = repo.add_many(iter(rows))
+        assert (a["id"], b["id"]) == (2, 3)
+        saved = TaskRepository(path=path)
+        assert saved.get(2)["links"] == [3]
+        assert saved.get(3)["links"] == [2]
+        assert saved.get(3)["status"] == "done"
+        assert [t["id"] for t in saved.iter_tasks()] == [1, 2, 3]
+    finally:
+        cleanup(path)
+        cleanup(path + ".lock")
+
+
+def test_edit_history_and_old_versions():
+    from src.task_manager.revisions import RevisionStore
+    repo, path = make_repo()
+    try:
+        repo._revisions = RevisionStore(path + ".revisions", keyframe_interval=3, keep=4)
+        a = repo.add("A", "x" * 200)
+        b = repo.add("B")
+        for i in range(1, 8):
+            repo.edit(a["id"], title=f"A{i}", tags=[str(i)])
+            if i == 4:
+                assert repo.get_version(a["id"], 3)["title"] == "A2"
+                assert repo.get_version(a["id"], 1)["tags"] == []
+        repo.link(a["id"], b["id"])
+        assert repo.get_version(a["id"], 6)["title"] == "A5"
+        assert repo.get_version(a["id"], 9)["links"] == [b["id"]]
+        assert repo.get_version(b["id"], 1)["links"] == []
+        history = repo.history(a["id"])
+        # Compacted to 4 once 8 revisions had accumulated; the link came after
+        assert [rev["version"] for rev in history] == [5, 6, 7, 8, 9]
+        assert history[-1]["fields"] == ["links"]
+        assert repo.get_version(a["id"], 3) is None
+        with open(path + ".revisions/1.jsonl") as f:
+            records = [json.loads(line) for line in f]
+        assert [("snapshot" in r, r["chain"]) for r in records] == [(True, 0), (False, 1), (False, 2), (False, 3), (True, 0)]
+        repo.delete(b["id"])
+        assert not os.path.exists(path + ".revisions/2.jsonl")
+        assert repo.gc_revisions(keep=1) == {"histories_removed": 0, "revisions_dropped": 4}
+        assert repo.get_version(a["id"], 9)["title"] == "A7"
+        assert repo.get_version(a["id"], 8) is None
+    finally:
+        cleanup(path)
+        cleanup(path + ".lock")
+
+
+def test_attachments_are_deduplicated_and_verified():
+    import io
+    from src.task_manager import attachments
+    repo, path = make_repo()
+    try:
+        t = repo.add("A")
+        data = os.urandom(attachments.MMAP_THRESHOLD + 10)  # large enough to be read through mmap
+        first = repo.attach(t["id"], io.BytesIO(data), filename="data.bin")
+        second = repo.attach(t["id"], io.BytesIO(data), filename="copy.bin")
+        assert first["checksum"] == second["checksum"] == hashlib.sha256(data).hexdigest()
+        assert first["size"] == len(data)
+        assert list(repo._blobs.checksums()) == [first["checksum"]]
+        assert [a["filename"] for a in TaskRepository(path=path).get(t["id"])["attachments"]] == ["data.bin", "copy.bin"]
+        out = io.BytesIO()
+        assert repo.read_attachment(t["id"], "copy.bin", out) == len(data)
+        assert out.getvalue() == data
+        assert repo.verify_attachments(workers=2) == []
+        with open(repo._blobs.path(first["checksum"]), "r+b") as f:
+            f.write(b"x")
+        problems = repo.verify_attachments()
+        assert [(tid, a["filename"]) for tid, a, _ in problems] == [(t["id"], "data.bin"), (t["id"], "copy.bin")]
+        repo.delete(t["id"])
+        assert repo._blobs.gc([], grace_seconds=0) == [first["checksum"]]
+    finally:
+        cleanup(path)
+        cleanup(path + ".lock")
+        shutil.rmtree(path + ".blobs", ignore_errors=True)
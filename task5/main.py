@@ -1,42 +1,93 @@
 import json
-import os
 import click
 
+from name_store import NameStore
+
 # File to store names
 DATA_FILE = "names.json"
 
-# Ensure the JSON file exists
-def ensure_data_file():
-    if not os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "w") as f:
-            json.dump([], f)
+# Names are kept sorted case-insensitively; adds go to an append log (see name_store.py)
+def get_store():
+    return NameStore(DATA_FILE)
 
 # Add a name to the JSON file
 @click.command()
 @click.argument("name")
 def add(name):
     "Add a name to the storage."
-    ensure_data_file()
-    with open(DATA_FILE, "r") as f:
-        names = json.load(f)
-    names.append(name)
-    names = sorted(names, key=lambda x: x.lower())  # Sort names alphabetically, case insensitive
-    with open(DATA_FILE, "w") as f:
-        json.dump(names, f)
+    get_store().add(name)
     click.echo(f"Added: {name}")
 
-# List all names in the JSON file
+# List stored names, streamed in batches instead of joined into one string
 @click.command()
-def list_names():
+@click.option("--prefix", help="Only names starting with this (case insensitive).")
+@click.option("--from", "low", help="Only names from this one on (case insensitive).")
+@click.option("--to", "high", help="Only names before this one (case insensitive).")
+def list_names(prefix, low, high):
     "List all stored names."
-    ensure_data_file()
-    with open(DATA_FILE, "r") as f:
-        names = json.load(f)
-    if names:
-        click.echo("\n".join(names))
-    else:
+    store = get_store()
+    names = store.prefix(prefix) if prefix is not None else store.range(low, high)
+    out = click.get_text_stream("stdout")
+    batch = []
+    found = False
+    for name in names:
+        batch.append(name)
+        if len(batch) == 10_000:
+            out.write("\n".join(batch) + "\n")
+            batch = []
+        found = True
+    if batch:
+        out.write("\n".join(batch) + "\n")
+    if not found:
         click.echo("No names found.")
 
+# Fuzzy search: typos, partial words and names that sound alike (see name_search.py)
+@click.command()
+@click.argument("query")
+@click.option("--limit", type=int, default=10, show_default=True, help="Most matches to print.")
+@click.option("--min-score", type=float, default=0.5, show_default=True, help="Weakest match to print, from 0 to 1.")
+@click.option("--scores", is_flag=True, help="Print each match's score.")
+def search(query, limit, min_score, scores):
+    "Find stored names resembling the query, best match first."
+    from name_search import search_names  # the index is only loaded here
+    matches = search_names(DATA_FILE, query, limit, min_score)
+    if not matches:
+        click.echo("No matches.")
+    for score, name in matches:
+        click.echo(f"{score:.2f}  {name}" if scores else name)
+
+# Validate a JSON document against schema/v1.json
+@click.command()
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--definition", default="ExportBundle", show_default=True, help="Schema definition to check against.")
+@click.option("--workers", type=int, default=None, help="Processes for large bundles (default: one per CPU).")
+@click.option("--max-errors", type=int, default=50, show_default=True, help="Problems to print; 0 prints all.")
+def validate(path, definition, workers, max_errors):
+    "Check a document against the v1 schema and report every problem."
+    from validator import load_validator  # compiling the schema is only needed here
+    checker = load_validator()
+    if definition not in checker.checkers:
+        raise click.BadParameter(f"unknown definition '{definition}'", param_hint="--definition")
+    try:
+        with open(path, "r") as f:
+            document = json.load(f)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise click.ClickException(f"{path} is not valid JSON: {e}")
+    if definition == "ExportBundle":
+        issues = checker.validate_bundle(document, workers=workers)
+    else:
+        issues = checker.validate(document, definition)
+    if not issues:
+        click.echo("Valid.")
+        return
+    shown = issues[:max_errors] if max_errors > 0 else issues
+    for issue in shown:
+        click.echo(f"{issue.path or '/'}: {issue.message}")
+    if len(shown) < len(issues):
+        click.echo(f"... and {len(issues) - len(shown)} more")
+    click.echo(f"{len(issues)} problem{'s' if len(issues) != 1 else ''} found.")
+    raise SystemExit(1)
+
 # Main CLI group
 @click.group()
 def cli():
@@ -44,6 +95,8 @@ def cli():
 
 cli.add_command(add)
 cli.add_command(list_names)
+cli.add_command(search)
+cli.add_command(validate)
 
 if __name__ == "__main__":
     cli()
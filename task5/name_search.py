@@ -0,0 +1,325 @@
+import heapq
+import marshal
+import os
+import re
+import unicodedata
+from collections import Counter
+
+from name_store import NameStore, name_key
+from storage import fsync_dir
+
+# Bump when the cached index layout changes
+INDEX_VERSION = 1
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Letter -> Soundex digit; vowels, h, w and y have none
+_SOUNDEX = {}
+for _digit, _letters in enumerate(("bfpv", "cgjkqsxz", "dt", "l", "mn", "r"), 1):
+    for _letter in _letters:
+        _SOUNDEX[_letter] = str(_digit)
+
+# How much each kind of match counts towards a query word's score
+_TRIGRAM_WEIGHT = 0.9
+_SOUND_WEIGHT = 0.6
+# Trigram (Dice) similarity below this is not a match
+_MIN_TRIGRAM = 0.4
+
+
+# Case-folded words of a name
+def tokenize(name):
+    return _TOKEN_RE.findall(name_key(name))
+
+
+# Plain ASCII letters of a word ("Émile" -> "emile"), for phonetic keys
+def _ascii_letters(word):
+    decomposed = unicodedata.normalize("NFKD", word.casefold())
+    return "".join(c for c in decomposed if "a" <= c <= "z")
+
+
+# American Soundex: first letter plus three digits ("robert" -> "r163")
+def soundex(word):
+    letters = _ascii_letters(word)
+    if not letters:
+        return None
+    code = letters[0]
+    last = _SOUNDEX.get(letters[0])
+    for letter in letters[1:]:
+        digit = _SOUNDEX.get(letter)
+        if digit and digit != last:
+            code += digit
+            if len(code) == 4:
+                break
+        if letter not in "hw":  # h and w do not separate equal digits
+            last = digit
+    return code.ljust(4, "0")
+
+
+# Padded trigrams of a word ("ann" -> {"$an", "ann", "nn$"})
+def trigrams(word):
+    padded = f"${word}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# Bit masks of where each character occurs in word, for _distance
+def _pattern(word):
+    peq = {}
+    for i, c in enumerate(word):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    return peq, len(word)
+
+
+# Levenshtein distance between a _pattern and b, computed bit-parallel
+# (Myers/Hyyrö): a few integer operations per character of b instead of a
+# row of the DP table. Patterns are built once per word and reused.
+def _distance(pattern, b):
+    peq, length = pattern
+    if not length or not b:
+        return length + len(b)
+    mask = (1 << length) - 1
+    high = 1 << (length - 1)
+    pv, mv, score = mask, 0, length
+    for c in b:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return score
+
+
+def edit_distance(a, b):
+    return _distance(_pattern(a), b)
+
+
+# Typo tolerance for a query word: one edit, or two for words of 7+ characters
+def max_edits(word):
+    return 1 if len(word) <= 6 else 2
+
+
+# Search indexes over the distinct words of all stored names.
+#
+# Every word gets an id. Three indexes map query words to candidate words:
+# trigram posting lists (fuzzy and partial matches), Soundex codes (names
+# that sound alike) and a BK-tree keyed on edit distance (typos). A posting
+# list per word then gives the names containing it. Working on distinct
+# words keeps the indexes far smaller than the name list, and a query only
+# computes edit distances for the few BK-tree nodes it visits.
+#
+# The index is cached next to the store (names.json.search) together with
+# how much of the store it covers. New log entries are added incrementally;
+# after a compaction the merged log (names.json.log.prev) brings it up to
+# date, so a full rebuild is only needed when the snapshot was replaced
+# some other way.
+class NameIndex:
+    def __init__(self):
+        self.names = []          # name id -> name
+        self.name_ids = {}       # name -> name id (duplicates are indexed once); built on first add
+        self.total = 0           # entries indexed, counting duplicates
+        self.words = []          # word id -> word
+        self.word_ids = {}
+        self.word_names = []     # word id -> name ids containing it
+        self.trigrams = {}       # trigram -> word ids
+        self.sounds = {}         # Soundex code -> word ids
+        self.bk_children = []    # word id -> {distance: child word id}; word 0 is the root
+        self.snapshot_id = None  # what part of the store is covered
+        self.log_count = 0
+
+    def add(self, name):
+        self.total += 1
+        if len(self.name_ids) != len(self.names):
+            self.name_ids = {known: i for i, known in enumerate(self.names)}
+        if name in self.name_ids:
+            return
+        name_id = len(self.names)
+        self.names.append(name)
+        self.name_ids[name] = name_id
+        for word in dict.fromkeys(tokenize(name)):
+            self.word_names[self._word_id(word)].append(name_id)
+
+    def _word_id(self, word):
+        word_id = self.word_ids.get(word)
+        if word_id is not None:
+            return word_id
+        word_id = len(self.words)
+        self.words.append(word)
+        self.word_ids[word] = word_id
+        self.word_names.append([])
+        self.bk_children.append({})
+        for gram in trigrams(word):
+            self.trigrams.setdefault(gram, []).append(word_id)
+        code = soundex(word)
+        if code:
+            self.sounds.setdefault(code, []).append(word_id)
+        if word_id:
+            node = 0
+            pattern = _pattern(word)
+            while True:
+                distance = _distance(pattern, self.words[node])
+                child = self.bk_children[node].get(distance)
+                if child is None:
+                    self.bk_children[node][distance] = word_id
+                    break
+                node = child
+        return word_id
+
+    # Words within max_distance edits of word, as {word id: distance}
+    def within(self, word, max_distance):
+        found = {}
+        if not self.words:
+            return found
+        pattern = _pattern(word)
+        pending = [0]
+        while pending:
+            node = pending.pop()
+            distance = _distance(pattern, self.words[node])
+            if distance <= max_distance:
+                found[node] = distance
+            # Triangle inequality: only children at distance +- max_distance can match
+            for edge, child in self.bk_children[node].items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    pending.append(child)
+        return found
+
+    # Words within max_distance edits of word, using the trigram postings
+    # (shared as counted by match_word) where they are guaranteed to find them
+    def _close_words(self, word, max_distance, grams, shared):
+        # Each edit destroys at most 3 of word's trigrams, so a word within
+        # max_distance edits still shares this many; for short words the bound
+        # is useless and the BK-tree does the work instead
+        needed = len(grams) - 3 * max_distance
+        if needed < 1:
+            return self.within(word, max_distance)
+        pattern = _pattern(word)
+        found = {}
+        for word_id, common in shared.items():
+            other = self.words[word_id]
+            if common >= needed and abs(len(other) - len(word)) <= max_distance:
+                distance = _distance(pattern, other)
+                if distance <= max_distance:
+                    found[word_id] = distance
+        return found
+
+    # {word id: score in (0, 1]} for the words a query word could stand for
+    def match_word(self, word):
+        scores = {}
+        exact = self.word_ids.get(word)
+        if exact is not None:
+            scores[exact] = 1.0
+        grams = trigrams(word)
+        shared = Counter(word_id for gram in grams for word_id in self.trigrams.get(gram, ()))
+        for word_id, distance in self._close_words(word, max_edits(word), grams, shared).items():
+            score = 1 - distance / max(len(word), len(self.words[word_id]))
+            if score > scores.get(word_id, 0):
+                scores[word_id] = score
+        for word_id, common in shared.items():
+            dice = 2 * common / (len(grams) + len(self.words[word_id]))  # a word has len(word) trigrams
+            if dice >= _MIN_TRIGRAM and dice * _TRIGRAM_WEIGHT > scores.get(word_id, 0):
+                scores[word_id] = dice * _TRIGRAM_WEIGHT
+        for word_id in self.sounds.get(soundex(word), ()):
+            if _SOUND_WEIGHT > scores.get(word_id, 0):
+                scores[word_id] = _SOUND_WEIGHT
+        return scores
+
+    # Best matching names for query as (score, name), best first. A name's
+    # score is the mean over query words of its best matching word's score.
+    def search(self, query, limit=10, min_score=0.5):
+        words = tokenize(query)
+        if not words:
+            return []
+        totals = Counter()
+        for word in words:
+            best = {}
+            for word_id, score in self.match_word(word).items():
+                for name_id in self.word_names[word_id]:
+                    if score > best.get(name_id, 0):
+                        best[name_id] = score
+            totals.update(best)
+        ranked = [(score / len(words), name_id) for name_id, score in totals.items() if score / len(words) >= min_score]
+        best = heapq.nsmallest(limit, ranked, key=lambda item: (-item[0], name_key(self.names[item[1]])))
+        return [(round(score, 3), self.names[name_id]) for score, name_id in best]
+
+    def to_bytes(self):
+        return marshal.dumps((
+            INDEX_VERSION, self.snapshot_id, self.log_count, self.total, self.names,
+            self.words, self.word_names, self.trigrams, self.sounds, self.bk_children,
+        ))
+
+    @classmethod
+    def from_bytes(cls, data):
+        fields = marshal.loads(data)
+        if fields[0] != INDEX_VERSION:
+            raise ValueError("index was written by another version")
+        index = cls()
+        (_, index.snapshot_id, index.log_count, index.total, index.names,
+         index.words, index.word_names, index.trigrams, index.sounds, index.bk_children) = fields
+        index.word_ids = {word: i for i, word in enumerate(index.words)}
+        return index
+
+
+# Load the cached index for store and bring it up to date with the store
+def load_index(store):
+    cache_path = store.path + ".search"
+    index = None
+    try:
+        with open(cache_path, "rb") as f:
+            index = NameIndex.from_bytes(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    changed = False
+    current = store.snapshot_id()
+    if index is not None and index.snapshot_id != current:
+        # The store was compacted: catch up from the merged log if it is the
+        # one that followed our snapshot, and check nothing else changed
+        header, merged = store.log_entries(previous=True)
+        if header is not None and header == index.snapshot_id:
+            for name in merged[index.log_count:]:
+                index.add(name)
+            index.snapshot_id, index.log_count = current, 0
+            changed = True
+        if index.snapshot_id != current or index.total != store.snapshot_count():
+            index = None
+    if index is None:
+        index = NameIndex()
+        index.snapshot_id = current
+        for name in store.snapshot_names():
+            index.add(name)
+        changed = True
+    header, logged = store.log_entries()
+    if header is not None and header == current and len(logged) > index.log_count:
+        for name in logged[index.log_count:]:
+            index.add(name)
+        index.log_count = len(logged)
+        changed = True
+    if changed and current is not None:
+        _save(cache_path, index.to_bytes())
+    return index
+
+
+def _save(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except OSError:
+        # The cache only saves time; a search still works without it
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return
+    fsync_dir(os.path.dirname(os.path.abspath(path)))
+
+
+# Ranked fuzzy search over the names stored at path
+def search_names(path, query, limit=10, min_score=0.5):
+    return load_index(NameStore(path)).search(query, limit, min_score)
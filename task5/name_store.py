@@ -0,0 +1,294 @@
+import bisect
+import json
+import os
+from collections import Counter
+
+from storage import atomic_write, file_lock
+
+# Once the append log passes this size, the next add merges it into the snapshot
+COMPACT_BYTES = 1024 * 1024
+
+# Binary searches over the snapshot switch to a linear scan below this many bytes
+_SCAN_BYTES = 4096
+
+
+# Names sort case-insensitively; casefold also folds "ß" and the like
+def name_key(name):
+    return name.casefold()
+
+
+# Identity of the snapshot file a log was started on top of
+def _stamp(path):
+    st = os.stat(path)
+    return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+
+def _entry(line):
+    # One snapshot line: a JSON string followed by "," except on the last one
+    line = line.rstrip(b",\r\n")
+    if b"\\" in line:
+        return json.loads(line)
+    return line[1:-1].decode("utf-8")  # nothing escaped: skip the JSON parser
+
+
+# A sorted list of names stored as a snapshot plus an append log.
+#
+# The snapshot (names.json) is a JSON array with one name per line, sorted by
+# name_key, so lookups binary-search the file by byte offset instead of
+# loading it. add() appends one line to names.json.log and never reads the
+# snapshot. The log is kept in memory, sorted with bisect on cached keys, and
+# merged with the snapshot when reading. Once it grows past COMPACT_BYTES it
+# is merged into a new snapshot in one streaming pass.
+#
+# The log's first line records which snapshot file it belongs to. A log
+# written for another snapshot was either merged already (a crash before it
+# was removed) or predates a snapshot replaced by someone else; only its names
+# missing from the current snapshot are kept.
+#
+# add() and compact() hold names.json.lock, so processes sharing the files
+# never replace a log another one is appending to. Reads take no lock.
+class NameStore:
+    def __init__(self, path):
+        self.path = path
+        self.log_path = path + ".log"
+        self.lock_path = path + ".lock"
+        self._log_keys = None  # loaded on first read
+        self._log_names = None
+
+    # Add one name: an O(1) append, plus an O(log n) insert if the log is loaded
+    def add(self, name):
+        with file_lock(self.lock_path):
+            self._add(name)
+
+    def _add(self, name):
+        if not os.path.exists(self.path):
+            self._write_snapshot([])
+        header = self.snapshot_id()
+        if self._log_header() != header:
+            self._start_log(header)
+        with open(self.log_path, "a+b") as f:
+            f.seek(-1, os.SEEK_END)
+            # After a torn append, start on a fresh line; _load_log skips the fragment
+            lead = b"" if f.read(1) == b"\n" else b"\n"
+            f.write(lead + json.dumps(name).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        if self._log_keys is not None:
+            key = name_key(name)
+            # bisect_right keeps equal names in the order they were added
+            i = bisect.bisect_right(self._log_keys, key)
+            self._log_keys.insert(i, key)
+            self._log_names.insert(i, name)
+        if size > COMPACT_BYTES:
+            self._compact()
+
+    # Every name in order, streamed
+    def __iter__(self):
+        return self._merged(None)
+
+    # Names whose key starts with prefix (compared case-insensitively)
+    def prefix(self, prefix):
+        start = name_key(prefix)
+        for name in self._merged(start):
+            if not name_key(name).startswith(start):
+                return
+            yield name
+
+    # Names from low up to but not including high (case-insensitive; None = open end)
+    def range(self, low=None, high=None):
+        low = name_key(low) if low is not None else None
+        high = name_key(high) if high is not None else None
+        for name in self._merged(low):
+            if high is not None and name_key(name) >= high:
+                return
+            yield name
+
+    def __len__(self):
+        self._load_log()
+        return self.snapshot_count() + len(self._log_names)
+
+    # Merge the log into a new snapshot (atomically) and start an empty log.
+    # The merged log is kept as names.json.log.prev so indexes built on the
+    # old snapshot (see name_search.py) can catch up without a rebuild.
+    def compact(self):
+        with file_lock(self.lock_path):
+            self._compact()
+
+    def _compact(self):
+        header = self.snapshot_id()
+        if header is not None and self._log_header() != header:
+            self._start_log(header)
+        # Reread the log: other processes may have appended since it was loaded
+        self._log_keys = None
+        self._write_snapshot(self._merged(None))
+        try:
+            os.replace(self.log_path, self.log_path + ".prev")
+        except FileNotFoundError:
+            pass
+        self._log_keys, self._log_names = [], []
+
+    # Identifies the current snapshot file (None if there is none); logs carry
+    # the id of the snapshot they apply to
+    def snapshot_id(self):
+        if not os.path.exists(self.path):
+            return None
+        return json.dumps({"snapshot": _stamp(self.path)})
+
+    # Names in the snapshot alone, without the log
+    def snapshot_names(self):
+        return self._snapshot(None)
+
+    # Number of names in the snapshot, counted without decoding them
+    def snapshot_count(self):
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, "rb") as f:
+            if f.readline().strip() != b"[":
+                f.seek(0)
+                return len(json.load(f))
+            lines = sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b""))
+        return lines - 1  # the closing "]" line
+
+    # (snapshot id, names in the order added) of the current log, or of the
+    # one merged by the last compaction if previous is true
+    def log_entries(self, previous=False):
+        names = []
+        try:
+            f = open(self.log_path + (".prev" if previous else ""), "r", encoding="utf-8", errors="replace")
+        except FileNotFoundError:
+            return None, names
+        with f:
+            header = f.readline().rstrip("\n")
+            for line in f:
+                try:
+                    if line.endswith("\n"):
+                        names.append(json.loads(line))
+                except json.JSONDecodeError:
+                    pass  # the start of an append torn by a crash
+        return header, names
+
+    def _merged(self, start):
+        self._load_log()
+        i = 0 if start is None else bisect.bisect_left(self._log_keys, start)
+        keys, names = self._log_keys, self._log_names
+        for name in self._snapshot(start):
+            if i < len(keys):
+                key = name_key(name)
+                # Snapshot first on ties: its names were added before the log's
+                while i < len(keys) and keys[i] < key:
+                    yield names[i]
+                    i += 1
+            yield name
+        yield from names[i:]
+
+    # Snapshot names with key >= start (all if start is None), in order
+    def _snapshot(self, start):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            first = f.readline()
+            if first.strip() != b"[":
+                # Written by something else (e.g. json.dump): load it whole and sort it
+                f.seek(0)
+                names = sorted(json.load(f), key=name_key)
+                keys = [name_key(name) for name in names]
+                yield from names[0 if start is None else bisect.bisect_left(keys, start):]
+                return
+            body = f.tell()
+            if start is not None:
+                f.seek(self._lower_bound(f, body, os.fstat(f.fileno()).st_size, start))
+            for line in f:
+                if line.startswith(b"]"):
+                    return
+                yield _entry(line)
+
+    # Offset of the first snapshot line whose key is >= key, found by bisecting
+    # byte offsets between line starts lo and hi
+    @staticmethod
+    def _lower_bound(f, lo, hi, key):
+        while hi - lo > _SCAN_BYTES:
+            mid = (lo + hi) // 2
+            f.seek(mid - 1)
+            f.readline()  # to the start of the first line at or after mid
+            line_start = f.tell()
+            if line_start >= hi:
+                hi = mid  # no line starts in [mid, hi)
+                continue
+            line = f.readline()
+            if line.startswith(b"]") or name_key(_entry(line)) >= key:
+                hi = line_start
+            else:
+                lo = line_start + len(line)
+        f.seek(lo)
+        for line in f:
+            if line.startswith(b"]") or name_key(_entry(line)) >= key:
+                break
+            lo += len(line)
+        return lo
+
+    def _log_header(self):
+        try:
+            with open(self.log_path, "r", encoding="utf-8") as f:
+                return f.readline().rstrip("\n")
+        except FileNotFoundError:
+            return None
+
+    # Replace a stale log with one for the current snapshot, carrying over
+    # the names the snapshot does not have (atomically, so a crash keeps the old log)
+    def _start_log(self, header):
+        _, names = self.log_entries()
+        names = self._unmerged(names)
+
+        def write(f):
+            f.write(header + "\n")
+            for name in names:
+                f.write(json.dumps(name) + "\n")
+
+        atomic_write(self.log_path, write)
+        names.sort(key=name_key)
+        self._log_names = names
+        self._log_keys = [name_key(name) for name in names]
+
+    # The names of a stale log that are not in the snapshot, in the order
+    # added. A name added n times needs n copies in the snapshot to count as merged.
+    def _unmerged(self, names):
+        missing = Counter(names)
+        for name in list(missing):
+            key = name_key(name)
+            for other in self._snapshot(key):
+                if name_key(other) != key or not missing[name]:
+                    break
+                if other == name:
+                    missing[name] -= 1
+        unmerged = []
+        for name in reversed(names):
+            if missing[name]:
+                missing[name] -= 1
+                unmerged.append(name)
+        unmerged.reverse()
+        return unmerged
+
+    def _load_log(self):
+        if self._log_keys is not None:
+            return
+        header, names = self.log_entries()
+        if header is None:
+            names = []
+        elif header != self.snapshot_id():
+            names = self._unmerged(names)
+        names.sort(key=name_key)  # stable: equal names stay in the order added
+        self._log_names = names
+        self._log_keys = [name_key(name) for name in names]
+
+    # Atomically replace the snapshot with names (an iterable in sorted order)
+    def _write_snapshot(self, names):
+        def write(f):
+            f.write("[")
+            separator = "\n"
+            for name in names:
+                f.write(separator + json.dumps(name))
+                separator = ",\n"
+            f.write("\n]\n")
+
+        atomic_write(self.path, write)
@@ -0,0 +1,60 @@
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# Atomically replace a file: write(f) fills a temp file next to it, which is
+# fsynced and renamed over the target, then the directory is fsynced so the
+# rename survives a crash. Readers only ever see the old or the new file.
+def atomic_write(path, write):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    fsync_dir(os.path.dirname(os.path.abspath(path)))
+
+
+# Flush a directory entry to disk (not possible on Windows, where it is skipped)
+def fsync_dir(directory):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+# Hold an exclusive advisory lock on path (created if missing) for the body of
+# a with block. Every process that locks the same path takes turns.
+@contextmanager
+def file_lock(path):
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10 s; keep waiting
+                    continue
+        yield
+    finally:
+        os.close(fd)  # closing the file releases the lock
@@ -5,17 +5,20 @@ import pytest
 
 # File to store names
 DATA_FILE = "names.json"
+DATA_FILES = [DATA_FILE + suffix for suffix in ("", ".log", ".log.prev", ".search", ".lock")]
 
 @pytest.fixture(autouse=True)
 def setup_and_teardown():
     """Ensure a clean environment before and after each test."""
-    # Remove the data file if it exists
-    if os.path.exists(DATA_FILE):
-        os.remove(DATA_FILE)
+    # Remove the data file (with its logs and search index) if it exists
+    for path in DATA_FILES:
+        if os.path.exists(path):
+            os.remove(path)
     yield
     # Cleanup after the test
-    if os.path.exists(DATA_FILE):
-        os.remove(DATA_FILE)
+    for path in DATA_FILES:
+        if os.path.exists(path):
+            os.remove(path)
 
 def test_add_name():
     """Test adding a name using the CLI."""
@@ -39,4 +42,23 @@ def test_list_names():
     )
     assert result.returncode == 0
     assert "Jane Smith" in result.stdout
-    assert "John Doe" in result.stdout
\ No newline at end of file
+    assert "John Doe" in result.stdout
+
+def test_add_keeps_names_sorted():
+    """Test that added names are listed case-insensitively sorted, and filtered by prefix."""
+    for name in ["bob", "Alice", "carol", "alfred"]:
+        subprocess.run(["python", "main.py", "add", name], capture_output=True, text=True)
+    result = subprocess.run(["python", "main.py", "list-names"], capture_output=True, text=True)
+    assert result.stdout.splitlines() == ["alfred", "Alice", "bob", "carol"]
+    result = subprocess.run(["python", "main.py", "list-names", "--prefix", "AL"], capture_output=True, text=True)
+    assert result.stdout.splitlines() == ["alfred", "Alice"]
+
+def test_search_finds_misspelled_names():
+    """Test that search tolerates typos and ranks the closest name first."""
+    for name in ["Jonathan Smith", "Jane Smyth", "Bob Jones"]:
+        subprocess.run(["python", "main.py", "add", name], capture_output=True, text=True)
+    result = subprocess.run(["python", "main.py", "search", "jonathon smith"], capture_output=True, text=True)
+    assert result.returncode == 0
+    assert result.stdout.splitlines()[0] == "Jonathan Smith"
+    result = subprocess.run(["python", "main.py", "search", "xyzzy"], capture_output=True, text=True)
+    assert "No matches." in result.stdout
@@ -0,0 +1,43 @@
+import name_store
+from name_search import NameIndex, edit_distance, load_index, soundex
+from name_store import NameStore
+
+def make_index(names):
+    index = NameIndex()
+    for name in names:
+        index.add(name)
+    return index
+
+def test_soundex_and_edit_distance():
+    """Test the phonetic codes and the bit-parallel edit distance."""
+    assert soundex("Robert") == soundex("Rupert") == "r163"
+    assert soundex("Ashcraft") == "a261"
+    assert soundex("Tymczak") == "t522"
+    assert soundex("Émile") == soundex("Emily")
+    assert edit_distance("kitten", "sitting") == 3
+    assert edit_distance("", "abc") == 3
+    assert edit_distance("flaw", "lawn") == 2
+
+def test_search_ranks_typos_and_sound_alikes():
+    """Test that exact, misspelled and phonetic matches are found and ranked."""
+    index = make_index(["Catherine Zeta", "Katherine Hepburn", "Kathryn Bigelow", "Robert Smith", "Rupert Smyth"])
+    assert index.search("Katherine")[0] == (1.0, "Katherine Hepburn")
+    assert [name for _, name in index.search("Katharine")][:2] == ["Katherine Hepburn", "Catherine Zeta"]
+    assert "Rupert Smyth" in [name for _, name in index.search("robert")]
+    assert index.search("robert smith")[0][1] == "Robert Smith"
+    assert index.search("qqqq") == []
+
+def test_cached_index_catches_up_with_the_store(tmp_path, monkeypatch):
+    """Test that the cached index picks up new names, also across a compaction."""
+    path = str(tmp_path / "names.json")
+    store = NameStore(path)
+    store.add("Alice Walker")
+    assert [name for _, name in load_index(NameStore(path)).search("alise")] == ["Alice Walker"]
+    store.add("Alicia Keys")
+    monkeypatch.setattr(name_store, "COMPACT_BYTES", 0)
+    store.add("Alice Cooper")  # merged into a new snapshot
+    index = load_index(NameStore(path))
+    assert index.total == 3
+    assert sorted(name for _, name in index.search("alice")) == ["Alice Cooper", "Alice Walker", "Alicia Keys"]
+    store._write_snapshot(["Zed"])  # replaced by something else: rebuilt
+    assert [name for _, name in load_index(NameStore(path)).search("zed")] == ["Zed"]
@@ -0,0 +1,69 @@
+import json
+import multiprocessing
+
+import name_store
+from name_store import NameStore
+
+def test_add_appends_to_log_until_compaction(tmp_path, monkeypatch):
+    """Test that adds go to the log and are merged into the sorted snapshot later."""
+    path = str(tmp_path / "names.json")
+    store = NameStore(path)
+    for name in ["bob", "Alice", "carol"]:
+        store.add(name)
+    with open(path) as f:
+        assert json.load(f) == []
+    assert list(NameStore(path)) == ["Alice", "bob", "carol"]
+    monkeypatch.setattr(name_store, "COMPACT_BYTES", 0)
+    store.add("alfred")
+    with open(path) as f:
+        assert json.load(f) == ["alfred", "Alice", "bob", "carol"]
+    assert list(NameStore(path)) == ["alfred", "Alice", "bob", "carol"]
+
+def test_prefix_and_range_lookups(tmp_path, monkeypatch):
+    """Test binary-search lookups over the snapshot merged with the log."""
+    monkeypatch.setattr(name_store, "_SCAN_BYTES", 0)  # bisect all the way down
+    path = str(tmp_path / "names.json")
+    store = NameStore(path)
+    store._write_snapshot(sorted((f"name{i:04d}" for i in range(0, 1000, 2)), key=str.casefold))
+    store.add("NAME0101")
+    store.add("Straße")
+    assert list(store.prefix("name010")) == ["name0100", "NAME0101", "name0102", "name0104", "name0106", "name0108"]
+    assert list(store.range("name0996", None)) == ["name0996", "name0998", "Straße"]
+    assert list(store.range(None, "name0004")) == ["name0000", "name0002"]
+    assert list(store.prefix("STRASSE")) == ["Straße"]
+    assert len(store) == 502
+
+def test_stale_log_is_ignored(tmp_path):
+    """Test that a log written for an older snapshot is not replayed twice."""
+    path = str(tmp_path / "names.json")
+    store = NameStore(path)
+    store.add("Jane")
+    store._write_snapshot(["Jane"])  # as if compaction crashed before removing the log
+    assert list(NameStore(path)) == ["Jane"]
+    store.add("John")
+    assert list(NameStore(path)) == ["Jane", "John"]
+
+def test_log_survives_external_rewrite(tmp_path):
+    """Test that rewriting names.json keeps the log's names it does not contain."""
+    path = str(tmp_path / "names.json")
+    store = NameStore(path)
+    store.add("Jane")
+    store.add("Zoe")
+    with open(path, "w") as f:
+        json.dump(["Jane", "Adam"], f)
+    assert list(NameStore(path)) == ["Adam", "Jane", "Zoe"]
+    NameStore(path).add("Bob")
+    assert list(NameStore(path)) == ["Adam", "Bob", "Jane", "Zoe"]
+
+def _add_names(path, prefix):
+    name_store.COMPACT_BYTES = 64  # compact every few adds
+    store = NameStore(path)
+    for i in range(40):
+        store.add(f"{prefix}{i:02d}")
+
+def test_concurrent_adds_and_compactions_lose_nothing(tmp_path):
+    """Test that processes adding and compacting the same store keep every name."""
+    path = str(tmp_path / "names.json")
+    with multiprocessing.get_context("spawn").Pool(3) as pool:
+        pool.starmap(_add_names, [(path, prefix) for prefix in "abc"])
+    assert list(NameStore(path)) == [f"{prefix}{i:02d}" for prefix in "abc" for i in range(40)]
@@ -30,4 +30,14 @@ def test_storage_read():
         json.dump(data, f)
     with open(DATA_FILE, "r") as f:
         loaded_data = json.load(f)
-    assert loaded_data == data
\ No newline at end of file
+    assert loaded_data == data
+
+
+def test_atomic_write_replaces_whole_file():
+    """Test that atomic writes leave complete JSON and no temporary files."""
+    from storage import atomic_write
+    atomic_write(DATA_FILE, lambda f: json.dump(["Jane Smith"], f))
+    atomic_write(DATA_FILE, lambda f: json.dump(["Jane Smith", "John Doe"], f))
+    with open(DATA_FILE, "r") as f:
+        assert json.load(f) == ["Jane Smith", "John Doe"]
+    assert not [name for name in os.listdir(".") if name.endswith(".tmp")]
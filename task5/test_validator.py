@@ -0,0 +1,68 @@
+import json
+import os
+import subprocess
+
+from validator import Issue, load_validator
+
+TASK_ID = "0c6e00ca-bea5-4a67-8f3b-22b750c24ed2"
+NOW = "2026-10-18T06:01:43Z"
+
+def make_task(i, **fields):
+    task = {"id": TASK_ID, "type": "task", "title": f"Task {i}", "status": "todo",
+            "created": NOW, "modified": NOW, "version": 1, "tags": ["a", "b"]}
+    task.update(fields)
+    return task
+
+def make_bundle(tasks):
+    return {"version": "1.0.0", "exported": NOW, "entities": {"tasks": tasks, "links": []}}
+
+def test_valid_bundle_has_no_issues(tmp_path):
+    """Test that a well-formed bundle validates cleanly."""
+    validator = load_validator(cache_dir=str(tmp_path))
+    assert validator.validate_bundle(make_bundle([make_task(i) for i in range(3)])) == []
+
+def test_issues_are_collected_with_paths(tmp_path):
+    """Test that every problem is reported, not only the first."""
+    validator = load_validator(cache_dir=str(tmp_path))
+    bundle = make_bundle([make_task(0), make_task(1, status="nope", priority=9, id="x")])
+    bundle["extra"] = True
+    del bundle["exported"]
+    issues = validator.validate_bundle(bundle)
+    assert Issue("", "missing required property 'exported'") in issues
+    assert Issue("", "unexpected property 'extra'") in issues
+    assert Issue("/entities/tasks/1/priority", "must be at most 5") in issues
+    assert [i.path for i in issues if i.path.startswith("/entities")] == [
+        "/entities/tasks/1/id", "/entities/tasks/1/status", "/entities/tasks/1/priority"]
+
+def test_compiled_schema_is_cached(tmp_path):
+    """Test that the compiled checkers are written once and reused."""
+    load_validator(cache_dir=str(tmp_path))
+    cached = os.listdir(tmp_path)
+    assert len(cached) == 1 and cached[0].endswith(".bin")
+    mtime = os.path.getmtime(tmp_path / cached[0])
+    validator = load_validator(cache_dir=str(tmp_path))
+    assert os.listdir(tmp_path) == cached
+    assert os.path.getmtime(tmp_path / cached[0]) == mtime
+    assert validator.validate(make_task(0), "Task") == []
+
+def test_parallel_matches_serial(tmp_path):
+    """Test that splitting a bundle across processes gives the same report."""
+    validator = load_validator(cache_dir=str(tmp_path))
+    tasks = [make_task(i, status="nope") if i % 7 == 0 else make_task(i) for i in range(100)]
+    serial = validator.validate_bundle(make_bundle(tasks), workers=1, chunk_size=10)
+    parallel = validator.validate_bundle(make_bundle(tasks), workers=2, chunk_size=10)
+    assert len(serial) == 15
+    assert parallel == serial
+
+def test_validate_command(tmp_path):
+    """Test the validate command on a valid and an invalid file."""
+    good = tmp_path / "good.json"
+    good.write_text(json.dumps(make_bundle([make_task(0)])))
+    result = subprocess.run(["python", "main.py", "validate", str(good)], capture_output=True, text=True)
+    assert result.returncode == 0
+    assert "Valid." in result.stdout
+    bad = tmp_path / "bad.json"
+    bad.write_text(json.dumps(make_bundle([make_task(0, title="")])))
+    result = subprocess.run(["python", "main.py", "validate", str(bad)], capture_output=True, text=True)
+    assert result.returncode == 1
+    assert "/entities/tasks/0/title: must be at least 1 characters long" in result.stdout
@@ -0,0 +1,458 @@
+import concurrent.futures
+import hashlib
+import json
+import marshal
+import multiprocessing
+import os
+import re
+import sys
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema", "v1.json")
+
+# Bump when the generated code changes, so stale cache entries are not reused
+GENERATOR_VERSION = 1
+
+# Entity arrays are validated in chunks of this many items, in parallel when there are several
+CHUNK_SIZE = 20_000
+
+# Keywords that only document the schema
+_ANNOTATIONS = {"$schema", "$id", "$comment", "title", "description", "default", "examples", "definitions"}
+_SUPPORTED = {
+    "$ref", "type", "const", "enum", "oneOf", "anyOf", "allOf",
+    "minLength", "maxLength", "pattern", "format",
+    "minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum",
+    "required", "properties", "additionalProperties",
+    "items", "minItems", "maxItems", "uniqueItems",
+}
+
+# Formats that are checked; any other format is treated as an annotation
+_FORMATS = {
+    "date-time": r"^\d{4}-\d{2}-\d{2}[Tt ]\d{2}:\d{2}:\d{2}(\.\d+)?([Zz]|[+-]\d{2}:\d{2})$",
+    "uri": r"^[A-Za-z][A-Za-z0-9+.-]*:\S*$",
+}
+
+# JSON type -> generated test on the value (bool is not an integer in JSON)
+_TYPE_TESTS = {
+    "string": "{v}.__class__ is str",
+    "integer": "({v}.__class__ is int or ({v}.__class__ is float and {v}.is_integer()))",
+    "number": "({v}.__class__ is int or {v}.__class__ is float)",
+    "boolean": "{v}.__class__ is bool",
+    "object": "{v}.__class__ is dict",
+    "array": "{v}.__class__ is list",
+    "null": "{v} is None",
+}
+
+# Which keywords apply to which type of value
+_STRING_KEYWORDS = ("minLength", "maxLength", "pattern", "format")
+_NUMBER_KEYWORDS = ("minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum")
+_OBJECT_KEYWORDS = ("required", "properties", "additionalProperties")
+_ARRAY_KEYWORDS = ("items", "minItems", "maxItems", "uniqueItems")
+
+
+# One problem found in a document: a JSON pointer to the value and what is wrong with it
+class Issue(NamedTuple):
+    path: str
+    message: str
+
+
+# Helpers the generated code calls ----------------------------------------
+
+# JSON equality: unlike Python, true is not 1 and types must match
+def _equal(a, b):
+    if (a.__class__ is bool) != (b.__class__ is bool):
+        return False
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_equal(a[k], b[k]) for k in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_equal(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def _has_duplicates(items):
+    if all(item.__class__ is str for item in items):
+        return len(set(items)) != len(items)
+    keys = [json.dumps(item, sort_keys=True) if isinstance(item, (dict, list)) else (item.__class__ is bool, item) for item in items]
+    return len(set(keys)) != len(keys)
+
+
+def _escape(key):
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+_RUNTIME = {"re": re, "_equal": _equal, "_has_duplicates": _has_duplicates, "_escape": _escape}
+
+
+# Code generation ----------------------------------------------------------
+
+# A JSON pointer expression: Python code for the dynamic part plus a literal suffix,
+# so "/entities/tasks" stays one constant and strings are only built on errors
+def _path(base, suffix=""):
+    return (base, suffix)
+
+
+def _render(path):
+    base, suffix = path
+    return f"{base} + {suffix!r}" if suffix else base
+
+
+def _child(path, key):
+    return (path[0], path[1] + "/" + _escape(key))
+
+
+def _indent(lines):
+    return ["    " + line for line in lines]
+
+
+def _is_scalar(schema):
+    # Small leaf schemas (uuid, timestamp, status...) are inlined instead of called
+    return isinstance(schema, dict) and not schema.keys() & {"$ref", "properties", "items", "oneOf", "anyOf", "allOf", "additionalProperties"}
+
+
+class _Generator:
+    def __init__(self, schema):
+        self.schema = schema
+        self.constants: Dict[str, str] = {}
+        self.functions: Dict[Any, str] = {}
+        self.bodies: List[List[str]] = []
+        self.queue: List[tuple] = []
+        self.counter = 0
+
+    def constant(self, source):
+        for name, existing in self.constants.items():
+            if existing == source:
+                return name
+        name = f"_K{len(self.constants)}"
+        self.constants[name] = source
+        return name
+
+    def var(self, prefix="v"):
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def resolve(self, ref):
+        if not ref.startswith("#"):
+            raise ValueError(f"Only local $ref is supported, not {ref!r}")
+        node = self.schema
+        for part in ref[2:].split("/") if ref != "#" else []:
+            node = node[part.replace("~1", "/").replace("~0", "~")]
+        return node
+
+    # Name of the function checking a schema; generated later, once per schema
+    def function(self, schema, label):
+        key = schema["$ref"] if isinstance(schema, dict) and set(schema) - _ANNOTATIONS == {"$ref"} else id(schema)
+        if key not in self.functions:
+            safe = re.sub(r"\W", "_", label)
+            self.functions[key] = f"_check_{safe}_{len(self.functions)}"
+            target = self.resolve(key) if isinstance(key, str) else schema
+            self.queue.append((self.functions[key], target))
+        return self.functions[key]
+
+    def generate(self, definitions):
+        entry = {name: self.function({"$ref": "#/definitions/" + _escape(name)}, name) for name in definitions}
+        entry[""] = self.function(self.schema, "root")
+        while self.queue:
+            name, schema = self.queue.pop()
+            self.counter = 0
+            body = self.emit(schema, "value", _path("path")) or ["pass"]
+            self.bodies.append([f"def {name}(value, path, errors):"] + _indent(body))
+        lines = [f"{name} = {source}" for name, source in self.constants.items()]
+        for body in self.bodies:
+            lines += [""] + body
+        lines += ["", "CHECKERS = {" + ", ".join(f"{name!r}: {function}" for name, function in entry.items()) + "}"]
+        return "\n".join(lines) + "\n"
+
+    def error(self, path, message):
+        return [f"errors.append(({_render(path)}, {message}))"]
+
+    # Lines checking the value in variable v against schema
+    def emit(self, schema, v, path):
+        if schema is True or schema == {}:
+            return []
+        if schema is False:
+            return self.error(path, "'is not allowed'")
+        unknown = set(schema) - _SUPPORTED - _ANNOTATIONS
+        if unknown:
+            raise ValueError(f"Unsupported schema keywords: {', '.join(sorted(unknown))}")
+        if "$ref" in schema:
+            # draft-07 ignores the keywords next to $ref
+            target = self.resolve(schema["$ref"])
+            if _is_scalar(target):
+                return self.emit(target, v, path)
+            return [f"{self.function(schema, schema['$ref'].rsplit('/', 1)[-1])}({v}, {_render(path)}, errors)"]
+
+        types = schema.get("type")
+        types = [types] if isinstance(types, str) else types
+        lines = self.emit_value(schema, v, path)
+        for kind, keywords, emit in (
+            ("string", _STRING_KEYWORDS, self.emit_string),
+            ("number", _NUMBER_KEYWORDS, self.emit_number),
+            ("object", _OBJECT_KEYWORDS, self.emit_object),
+            ("array", _ARRAY_KEYWORDS, self.emit_array),
+        ):
+            if not schema.keys() & set(keywords):
+                continue
+            group = emit(schema, v, path)
+            applies = [kind, "integer"] if kind == "number" else [kind]
+            if types and set(types) <= set(applies):
+                lines += group  # the type check below already guarantees it
+            elif group and (not types or set(types) & set(applies)):
+                test = " or ".join(_TYPE_TESTS[t].format(v=v) for t in applies)
+                lines += [f"if {test}:"] + _indent(group)
+        if not types:
+            return lines
+        test = " or ".join(_TYPE_TESTS[t].format(v=v) for t in types)
+        checked = [f"if not ({test}):"] + _indent(self.error(path, repr(f"must be of type {' or '.join(types)}")))
+        return checked + (["else:"] + _indent(lines) if lines else [])
+
+    def emit_value(self, schema, v, path):
+        lines = []
+        if "const" in schema:
+            const = schema["const"]
+            if isinstance(const, str):
+                lines += [f"if {v} != {const!r}:"]
+            else:
+                lines += [f"if not _equal({v}, {self.constant(repr(const))}):"]
+            lines += _indent(self.error(path, repr(f"must be {json.dumps(const)}")))
+        if "enum" in schema:
+            values = schema["enum"]
+            listed = ", ".join(json.dumps(value) for value in values)
+            if all(isinstance(value, str) for value in values):
+                name = self.constant(f"frozenset({sorted(values)!r})")
+                # Unhashable values cannot be in the set; skip the test when the type check already ran
+                guard = "" if schema.get("type") == "string" else f"{v}.__class__ is not str or "
+                lines += [f"if {guard}{v} not in {name}:"]
+            else:
+                name = self.constant(repr(values))
+                lines += [f"if not any(_equal({v}, option) for option in {name}):"]
+            lines += _indent(self.error(path, repr(f"must be one of {listed}")))
+        for keyword in ("oneOf", "anyOf", "allOf"):
+            if keyword in schema:
+                lines += self.emit_combinator(keyword, schema[keyword], v, path)
+        return lines
+
+    def emit_combinator(self, keyword, branches, v, path):
+        if keyword == "allOf":
+            return [line for branch in branches for line in self.emit(branch, v, path)]
+        names = [branch["$ref"].rsplit("/", 1)[-1] if "$ref" in branch else f"option {i + 1}" for i, branch in enumerate(branches)]
+        functions = ", ".join(self.function(branch, name) for branch, name in zip(branches, names))
+        matched, best, found = self.var("m"), self.var("best"), self.var("e")
+        lines = [
+            f"{matched} = 0",
+            f"{best} = None",
+            f"for check in ({functions},):",
+            f"    {found} = []",
+            f"    check({v}, {_render(path)}, {found})",
+            f"    if not {found}:",
+            f"        {matched} += 1",
+            f"    elif {best} is None or len({found}) < len({best}):",
+            f"        {best} = {found}",
+        ]
+        listed = ", ".join(names)
+        if keyword == "anyOf":
+            lines += [f"if not {matched}:"]
+        else:
+            lines += [f"if {matched} > 1:"] + _indent(self.error(path, repr(f"matches more than one of {listed}")))
+            lines += [f"elif not {matched}:"]
+        # Report the closest alternative's problems, which are usually the useful ones
+        lines += _indent(self.error(path, repr(f"matches none of {listed}")) + [f"errors.extend({best})"])
+        return lines
+
+    def emit_string(self, schema, v, path):
+        lines = []
+        if "minLength" in schema:
+            n = schema["minLength"]
+            lines += [f"if len({v}) < {n}:"] + _indent(self.error(path, repr(f"must be at least {n} characters long")))
+        if "maxLength" in schema:
+            n = schema["maxLength"]
+            lines += [f"if len({v}) > {n}:"] + _indent(self.error(path, repr(f"must be at most {n} characters long")))
+        if "pattern" in schema:
+            name = self.constant(f"re.compile({schema['pattern']!r}, re.ASCII)")
+            lines += [f"if not {name}.search({v}):"] + _indent(self.error(path, repr(f"does not match {schema['pattern']}")))
+        if schema.get("format") in _FORMATS:
+            name = self.constant(f"re.compile({_FORMATS[schema['format']]!r}, re.ASCII)")
+            lines += [f"if not {name}.match({v}):"] + _indent(self.error(path, repr(f"is not a valid {schema['format']}")))
+        return lines
+
+    def emit_number(self, schema, v, path):
+        lines = []
+        for keyword, op, words in (
+            ("minimum", "<", "at least"),
+            ("maximum", ">", "at most"),
+            ("exclusiveMinimum", "<=", "greater than"),
+            ("exclusiveMaximum", ">=", "less than"),
+        ):
+            if keyword in schema:
+                n = schema[keyword]
+                lines += [f"if {v} {op} {n!r}:"] + _indent(self.error(path, repr(f"must be {words} {n}")))
+        return lines
+
+    def emit_object(self, schema, v, path):
+        lines = []
+        for key in schema.get("required", []):
+            lines += [f"if {key!r} not in {v}:"] + _indent(self.error(path, repr(f"missing required property {key!r}")))
+        properties = schema.get("properties", {})
+        extra = schema.get("additionalProperties", True)
+        if extra is not True and extra != {}:
+            known = self.constant(f"frozenset({sorted(properties)!r})")
+            key, item = self.var("k"), self.var("x")
+            # The subset test runs in C; the loop only runs for invalid objects
+            loop = [f"for {key}, {item} in {v}.items():", f"    if {key} not in {known}:"]
+            if extra is False:
+                loop += _indent(_indent([f"errors.append(({_render(path)}, f'unexpected property {{{key}!r}}'))"]))
+            else:
+                loop += _indent(_indent(self.emit(extra, item, (f"{_render(path)} + '/' + _escape({key})", ""))))
+            lines += [f"if not {known}.issuperset({v}):"] + _indent(loop)
+        for key, subschema in properties.items():
+            item = self.var("x")
+            body = self.emit(subschema, item, _child(path, key))
+            if body:
+                lines += [f"{item} = {v}.get({key!r}, _MISSING)", f"if {item} is not _MISSING:"] + _indent(body)
+        return lines
+
+    def emit_array(self, schema, v, path):
+        lines = []
+        if "minItems" in schema:
+            n = schema["minItems"]
+            lines += [f"if len({v}) < {n}:"] + _indent(self.error(path, repr(f"must have at least {n} items")))
+        if "maxItems" in schema:
+            n = schema["maxItems"]
+            lines += [f"if len({v}) > {n}:"] + _indent(self.error(path, repr(f"must have at most {n} items")))
+        if schema.get("uniqueItems"):
+            lines += [f"if _has_duplicates({v}):"] + _indent(self.error(path, "'must not contain duplicate items'"))
+        if "items" in schema:
+            if not isinstance(schema["items"], (dict, bool)):
+                raise ValueError("Only a single schema is supported for items")
+            index, item = self.var("i"), self.var("x")
+            item_path = (f"{_render((path[0], path[1] + '/'))} + str({index})", "")
+            body = self.emit(schema["items"], item, item_path)
+            if body:
+                lines += [f"for {index}, {item} in enumerate({v}):"] + _indent(body)
+        return lines
+
+
+# Python source of a module whose CHECKERS maps each definition name ("" for the
+# root schema) to a function(value, path, errors) that appends every (path, message)
+def generate_source(schema: Dict[str, Any]) -> str:
+    return _Generator(schema).generate(schema.get("definitions", {}))
+
+
+# Compiled checkers for a schema, reusing the code object cached in cache_dir if present
+def compile_schema(schema: Dict[str, Any], cache_dir: Optional[str] = None) -> Dict[str, Callable]:
+    code = None
+    cache_file = None
+    if cache_dir:
+        digest = hashlib.sha256(json.dumps([GENERATOR_VERSION, schema], sort_keys=True).encode()).hexdigest()
+        # Marshalled code is only valid for the interpreter version that wrote it
+        cache_file = os.path.join(cache_dir, f"schema-{digest[:32]}.{sys.implementation.cache_tag}.bin")
+        try:
+            with open(cache_file, "rb") as f:
+                code = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            code = None
+    if code is None:
+        code = compile(generate_source(schema), f"<schema {schema.get('$id', '')}>", "exec")
+        if cache_file:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                tmp_path = f"{cache_file}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    marshal.dump(code, f)
+                os.replace(tmp_path, cache_file)
+            except OSError:
+                pass  # caching is only an optimisation
+    namespace = dict(_RUNTIME, _MISSING=object())
+    exec(code, namespace)
+    return namespace["CHECKERS"]
+
+
+# Worker side of Validator.validate_bundle ----------------------------------
+
+_shared: Dict[str, Any] = {}
+
+
+def _init_worker(schema, cache_dir):
+    _shared["validator"] = Validator(schema, cache_dir)
+
+
+def _check_chunk(job):
+    name, definition, start, stop, items = job
+    if items is None:  # forked worker: read the chunk from the parent's copy of the bundle
+        items = _shared["entities"][name][start:stop]
+    check = _shared["validator"].checkers[definition]
+    prefix = f"/entities/{_escape(name)}/"
+    errors = []
+    for i, item in enumerate(items, start):
+        check(item, prefix + str(i), errors)
+    return errors
+
+
+class Validator:
+    def __init__(self, schema: Dict[str, Any], cache_dir: Optional[str] = None):
+        self.schema = schema
+        self.cache_dir = cache_dir
+        self.checkers = compile_schema(schema, cache_dir)
+
+    # Every problem in document, checked against one definition ("" = the whole schema)
+    def validate(self, document: Any, definition: str = "") -> List[Issue]:
+        errors = []
+        self.checkers[definition](document, "", errors)
+        return [Issue(path, message) for path, message in errors]
+
+    # Validate an ExportBundle, splitting its entity arrays into chunks that a
+    # process pool checks in parallel. All problems are collected, in document order.
+    def validate_bundle(self, bundle: Any, workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> List[Issue]:
+        item_definitions = self._entity_definitions()
+        entities = bundle.get("entities") if isinstance(bundle, dict) else None
+        jobs = []
+        envelope = bundle
+        if isinstance(entities, dict):
+            # The arrays are emptied for the envelope check and validated item by item below
+            remaining = dict(entities)
+            for name, definition in item_definitions.items():
+                items = entities.get(name)
+                if isinstance(items, list):
+                    remaining[name] = []
+                    for start in range(0, len(items), chunk_size):
+                        jobs.append((name, definition, start, min(start + chunk_size, len(items))))
+            envelope = dict(bundle, entities=remaining)
+        issues = self.validate(envelope, "ExportBundle")
+
+        workers = workers or os.cpu_count() or 1
+        if len(jobs) < 2 or workers < 2:
+            _shared.update(validator=self, entities=entities)
+            try:
+                results = [_check_chunk(job + (None,)) for job in jobs]
+            finally:
+                _shared.clear()
+        elif "fork" in multiprocessing.get_all_start_methods():
+            # Forked workers inherit the parsed bundle, so only index ranges are sent
+            _shared.update(validator=self, entities=entities)
+            try:
+                with concurrent.futures.ProcessPoolExecutor(min(workers, len(jobs)), mp_context=multiprocessing.get_context("fork")) as pool:
+                    results = list(pool.map(_check_chunk, [job + (None,) for job in jobs]))
+            finally:
+                _shared.clear()
+        else:
+            with concurrent.futures.ProcessPoolExecutor(min(workers, len(jobs)), initializer=_init_worker, initargs=(self.schema, self.cache_dir)) as pool:
+                results = list(pool.map(_check_chunk, [(name, d, start, stop, entities[name][start:stop]) for name, d, start, stop in jobs]))
+        for errors in results:
+            issues.extend(Issue(path, message) for path, message in errors)
+        return issues
+
+    # {"tasks": "Task", ...} from ExportBundle.entities in the schema
+    def _entity_definitions(self) -> Dict[str, str]:
+        bundle = self.schema.get("definitions", {}).get("ExportBundle", {})
+        out = {}
+        for name, prop in bundle.get("properties", {}).get("entities", {}).get("properties", {}).items():
+            ref = prop.get("items", {}).get("$ref", "") if isinstance(prop, dict) else ""
+            if ref.startswith("#/definitions/"):
+                out[name] = ref[len("#/definitions/"):]
+        return out
+
+
+# Validator for schema_file, compiled once and cached under schema/__pycache__
+def load_validator(schema_file: str = SCHEMA_FILE, cache_dir: Optional[str] = None) -> Validator:
+    with open(schema_file, "r") as f:
+        schema = json.load(f)
+    return Validator(schema, cache_dir or os.path.join(os.path.dirname(os.path.abspath(schema_file)), "__pycache__"))
@@ -1,4 +1,5 @@
 import json
+import os
 
 def read_tasks_from_file(file_path="../tasks.json"):
     try:
@@ -8,8 +9,33 @@ def read_tasks_from_file(file_path="../tasks.json"):
         return []
 
 def write_tasks_to_file(file_path, tasks):
-    with open(file_path, 'w') as file:
-        json.dump(tasks, file, indent=4)
+    # Write a temp file, fsync it and rename it over the target, so a crash
+    # leaves either the old or the new tasks, never a truncated file
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w') as file:
+            json.dump(tasks, file, indent=4)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_dir(os.path.dirname(os.path.abspath(file_path)))
+
+def _fsync_dir(directory):
+    # Make the rename itself durable; not possible on Windows
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
 
 def generate_unique_id(tasks):
     if not tasks:
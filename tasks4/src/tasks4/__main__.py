@@ -1,9 +1,22 @@
+import argparse
+import asyncio
 import os
+import time
 from openai import OpenAI
 
+from tasks4.batch import CachedSummaryClient, FakeSummaryClient, OpenAISummaryClient, summarize_batch
+from tasks4.cache import SummaryCache
+
 # We'll use gpt-4o-mini, the latest fast and capable model
 MODEL = "gpt-4o-mini"
 
+TEMPERATURE = 0.1  # Low temperature for more predictable, less "creative" summaries
+
+MAX_TOKENS = 20  # Limit the output length just in case
+
+# Summaries are cached here, keyed by model, prompt, temperature and task text
+CACHE_PATH = os.getenv("TASKS4_CACHE", ".tasks4_cache.db")
+
 # This is the system prompt that "instructs" the AI on its job.
 # This is key to getting a short phrase instead of a full sentence.
 SYSTEM_PROMPT = (
@@ -13,10 +26,16 @@ SYSTEM_PROMPT = (
     "Do not use punctuation. Just output the phrase."
 )
 
-def get_task_summary(client: OpenAI, task_description: str) -> str:
+def get_task_summary(client: OpenAI, task_description: str, cache: SummaryCache = None) -> str:
     """
     Sends a task description to the OpenAI API and returns a short summary.
+    If a cache is given, a repeated description is answered from it.
     """
+    if cache is not None:
+        return cache.get_or_compute(
+            MODEL, SYSTEM_PROMPT, TEMPERATURE, task_description,
+            lambda: _summary_or_none(get_task_summary(client, task_description)),
+        )
     try:
         response = client.chat.completions.create(
             model=MODEL,
@@ -24,8 +43,8 @@ def get_task_summary(client: OpenAI, task_description: str) -> str:
                 {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": task_description},
             ],
-            temperature=0.1,  # Low temperature for more predictable, less "creative" summaries
-            max_tokens=20,    # Limit the output length just in case
+            temperature=TEMPERATURE,
+            max_tokens=MAX_TOKENS,
         )
         # Extract the text content from the API's response
         summary = response.choices[0].message.content
@@ -35,22 +54,67 @@ def get_task_summary(client: OpenAI, task_description: str) -> str:
         # Handle potential errors (like network issues or wrong API key)
         return f"[Error summarizing task: {e}]"
 
-def main():
+def _summary_or_none(summary: str):
+    # Error messages are returned to the caller but never cached
+    return None if summary.startswith("[Error summarizing task:") else summary
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="tasks4", description="Summarize task descriptions into short phrases.")
+    parser.add_argument("--fake", action="store_true", help="Use the in-process fake backend (no API key needed)")
+    parser.add_argument("--count", type=int, default=None, help="Repeat the sample tasks to this many descriptions (benchmarking)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum requests in flight")
+    parser.add_argument("--rate", type=float, default=None, help="Maximum requests per second")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per task on failure")
+    parser.add_argument("--quiet", action="store_true", help="Only print the throughput summary")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the model, bypassing the summary cache")
+    return parser.parse_args(argv)
+
+
+async def summarize_and_print(client, tasks, args) -> None:
+    """
+    Summarize the tasks concurrently and print each result in order as it arrives.
+    """
+    start = time.perf_counter()
+    async for i, summary in summarize_batch(
+        client, tasks, concurrency=args.concurrency, rate=args.rate, retries=args.retries
+    ):
+        if not args.quiet:
+            print(f"\n[Task {i + 1} Original]")
+            print(f"'{tasks[i]}'")
+            print(f"\n[Task {i + 1} Summary]")
+            print(f"-> {summary}")
+            print("-" * 30)
+    elapsed = time.perf_counter() - start
+    print(f"\n⏱️ {len(tasks)} tasks in {elapsed:.2f}s ({len(tasks) / elapsed:.1f} tasks/s)")
+
+
+def main(argv=None):
     """
     Main function to run the summarization loop.
     """
-    print(f"🤖 Using model: {MODEL}\n")
+    args = parse_args(argv)
 
-    # Check if the API key is set before trying to create the client
-    if "OPENAI_API_KEY" not in os.environ:
-        print("Error: OPENAI_API_KEY environment variable not set.")
-        print("Please set your API key and try again.")
-        print(r'Example: $env:OPENAI_API_KEY = "your-key-here"')
-        return
+    if args.fake:
+        print("🤖 Using the in-process fake backend\n")
+        client = FakeSummaryClient()
+    else:
+        print(f"🤖 Using model: {MODEL}\n")
 
-    # Initialize the OpenAI client
-    # It automatically reads the OPENAI_API_KEY from the environment
-    client = OpenAI()
+        # Check if the API key is set before trying to create the client
+        if "OPENAI_API_KEY" not in os.environ:
+            print("Error: OPENAI_API_KEY environment variable not set.")
+            print("Please set your API key and try again.")
+            print(r'Example: $env:OPENAI_API_KEY = "your-key-here"')
+            return
+
+        # Initialize the OpenAI client
+        # It automatically reads the OPENAI_API_KEY from the environment
+        client = OpenAISummaryClient(OpenAI(), MODEL, SYSTEM_PROMPT, TEMPERATURE, MAX_TOKENS)
+
+    cache = None
+    if not args.no_cache:
+        cache = SummaryCache(CACHE_PATH)
+        client = CachedSummaryClient(client, cache, MODEL, SYSTEM_PROMPT, TEMPERATURE)
 
     # --- Requirement 2: Add at least 2 sample descriptions ---
     tasks_to_summarize = [
@@ -67,21 +131,18 @@ def main():
             "and a new S3 bucket to store the images securely."
         ),
     ]
+    if args.count:
+        tasks_to_summarize = [tasks_to_summarize[i % len(tasks_to_summarize)] for i in range(args.count)]
 
     print("--- 🚀 Starting Task Summarization ---")
 
-    # --- Requirement 1: Add a loop to summarize multiple descriptions ---
-    for i, task in enumerate(tasks_to_summarize, 1):
-        print(f"\n[Task {i} Original]")
-        print(f"'{task}'")
-        
-        # Get the summary from the API
-        summary = get_task_summary(client, task)
-        
-        print(f"\n[Task {i} Summary]")
-        print(f"-> {summary}")
-        print("-" * 30)
-    
+    # --- Requirement 1: Summarize multiple descriptions, several at a time ---
+    asyncio.run(summarize_and_print(client, tasks_to_summarize, args))
+    if cache is not None:
+        stats = cache.stats()
+        print(f"🗄️ Cache: {stats['hits']} hits, {stats['misses']} misses ({stats['entries']} entries)")
+        cache.close()
+
     print("\n--- ✅ All tasks summarized. ---")
 
 # This standard Python entry point makes the file runnable
@@ -0,0 +1,244 @@
+import asyncio
+import random
+import re
+import time
+from collections import deque
+from typing import AsyncIterator, Iterable, List, Optional, Protocol, Tuple
+
+import openai
+
+from tasks4.cache import SummaryCache, cache_key
+
+# HTTP statuses worth retrying: request timeout, conflict, rate limit, and 5xx below
+_TRANSIENT_STATUSES = (408, 409, 429)
+
+
+class TransientSummaryError(Exception):
+    """
+    A failure worth retrying (rate limit, timeout, dropped connection).
+    """
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Return True if a failed request may succeed when retried.
+
+    Timeouts, dropped connections, rate limits and server errors are transient;
+    anything else (a bad request, a wrong API key, a bug) fails the same way
+    every time.
+    """
+    if isinstance(error, (TransientSummaryError, TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None)
+    return isinstance(status, int) and (status in _TRANSIENT_STATUSES or status >= 500)
+
+
+class SummaryClient(Protocol):
+    """
+    Anything that can turn one task description into a short summary.
+    """
+
+    async def summarize(self, task_description: str) -> str:
+        ...
+
+
+class OpenAISummaryClient:
+    """
+    Summarizes with the OpenAI chat API. The blocking SDK call runs in a
+    worker thread so many requests can be in flight at once. Connection
+    failures and timeouts are raised as TransientSummaryError.
+    """
+
+    def __init__(self, client, model: str, system_prompt: str, temperature: float, max_tokens: int):
+        self.client = client
+        self.model = model
+        self.system_prompt = system_prompt
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+
+    async def summarize(self, task_description: str) -> str:
+        try:
+            response = await asyncio.to_thread(
+                self.client.chat.completions.create,
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": self.system_prompt},
+                    {"role": "user", "content": task_description},
+                ],
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+            )
+        except openai.APIConnectionError as e:  # includes APITimeoutError
+            raise TransientSummaryError(str(e)) from e
+        return response.choices[0].message.content.strip()
+
+
+class CachedSummaryClient:
+    """
+    Wraps another client and answers repeated descriptions from a SummaryCache.
+    Identical descriptions that are already in flight share one request.
+    """
+
+    def __init__(self, inner: SummaryClient, cache: SummaryCache, model: str, system_prompt: str, temperature: float = 0.1):
+        self.inner = inner
+        self.cache = cache
+        self.model = model
+        self.system_prompt = system_prompt
+        self.temperature = temperature
+        self._in_flight = {}
+
+    async def summarize(self, task_description: str) -> str:
+        key = cache_key(self.model, self.system_prompt, self.temperature, task_description)
+        if key in self._in_flight:
+            return await asyncio.shield(self._in_flight[key])
+        summary = self.cache.get(key)
+        if summary is not None:
+            return summary
+        future = self._in_flight[key] = asyncio.ensure_future(self.inner.summarize(task_description))
+        try:
+            summary = await asyncio.shield(future)
+        finally:
+            del self._in_flight[key]
+        self.cache.put(key, summary)
+        return summary
+
+
+class FakeSummaryClient:
+    """
+    An in-process stand-in for the API, for offline tests and benchmarks.
+
+    Each call waits `latency` seconds, fails with TransientSummaryError with
+    probability `failure_rate` (and always for the first `fail_first` calls),
+    and otherwise returns the first five words of the description without
+    punctuation. `calls` and `max_in_flight` record how it was used.
+    """
+
+    def __init__(self, latency: float = 0.05, failure_rate: float = 0.0, seed: Optional[int] = None, fail_first: int = 0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.fail_first = fail_first
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._random = random.Random(seed)
+
+    async def summarize(self, task_description: str) -> str:
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        if self.calls <= self.fail_first or self._random.random() < self.failure_rate:
+            raise TransientSummaryError("simulated rate limit")
+        return " ".join(re.findall(r"\w+", task_description)[:5])
+
+
+class TokenBucket:
+    """
+    Allows `rate` requests per second on average, with bursts of up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """
+        Wait until a token is available, then take it.
+        """
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+async def _summarize_with_retries(
+    client: SummaryClient,
+    task_description: str,
+    limiter: asyncio.Semaphore,
+    bucket: Optional[TokenBucket],
+    retries: int,
+    backoff: float,
+) -> str:
+    """
+    Summarize one description, retrying transient failures with jittered
+    exponential backoff. Other failures are reported at once.
+    """
+    attempt = 0
+    while True:
+        async with limiter:
+            if bucket:
+                await bucket.acquire()
+            try:
+                return await client.summarize(task_description)
+            except Exception as e:
+                if attempt >= retries or not is_transient(e):
+                    return f"[Error summarizing task: {e}]"
+        # "Full jitter": sleep a random time up to the exponential cap, outside the limiter
+        await asyncio.sleep(random.uniform(0, backoff * (2 ** attempt)))
+        attempt += 1
+
+
+async def summarize_batch(
+    client: SummaryClient,
+    descriptions: Iterable[str],
+    concurrency: int = 8,
+    rate: Optional[float] = None,
+    retries: int = 3,
+    backoff: float = 0.5,
+) -> AsyncIterator[Tuple[int, str]]:
+    """
+    Summarize many descriptions concurrently and yield (index, summary) in input order.
+
+    At most `concurrency` requests are in flight, optionally throttled to `rate`
+    requests per second. Results are streamed as soon as every earlier one is
+    ready, and only a bounded window of descriptions is scheduled ahead, so
+    memory stays flat for very large batches.
+    """
+    limiter = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(rate) if rate else None
+    window = concurrency * 4
+    pending: deque = deque()
+    items = iter(enumerate(descriptions))
+
+    def schedule() -> bool:
+        try:
+            index, text = next(items)
+        except StopIteration:
+            return False
+        pending.append((index, asyncio.ensure_future(
+            _summarize_with_retries(client, text, limiter, bucket, retries, backoff)
+        )))
+        return True
+
+    while len(pending) < window and schedule():
+        pass
+    try:
+        while pending:
+            index, future = pending.popleft()
+            summary = await future
+            schedule()
+            yield index, summary
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+
+def summarize_all(client: SummaryClient, descriptions: Iterable[str], **options) -> List[str]:
+    """
+    Run summarize_batch to completion and return the summaries in input order.
+    """
+    async def collect() -> List[str]:
+        return [summary async for _, summary in summarize_batch(client, descriptions, **options)]
+
+    return asyncio.run(collect())
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Callable, Dict, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def normalize_text(text: str) -> str:
+    """
+    Collapse runs of whitespace so formatting-only changes still hit the cache.
+
+    :param text: Text sent to the model.
+    :return: The normalized text.
+    """
+    return " ".join(text.split())
+
+
+def cache_key(model: str, system_prompt: str, temperature: float, text: str) -> str:
+    """
+    Hash everything that determines the model's answer into a cache key.
+
+    :param model: Model name.
+    :param system_prompt: System prompt sent with the request.
+    :param temperature: Sampling temperature.
+    :param text: The user prompt (task text).
+    :return: Hex SHA-256 digest.
+    """
+    payload = json.dumps([model, system_prompt, temperature, normalize_text(text)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SummaryCache:
+    """
+    A persistent, content-addressed cache of AI responses with LRU eviction.
+
+    Entries are keyed by a hash of (model, system prompt, temperature, task text)
+    and stored in a small SQLite file. The cache holds at most `max_entries`
+    entries (and `max_bytes` of text, if set), evicting the least recently used
+    first; entries older than `ttl` seconds are treated as misses.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, max_bytes: Optional[int] = None, ttl: Optional[float] = None):
+        """
+        Open (and if needed create) the cache.
+
+        :param path: Path to the cache database file.
+        :param max_entries: Maximum number of cached responses.
+        :param max_bytes: Optional maximum total size of cached responses.
+        :param ttl: Optional lifetime of an entry in seconds.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(path)
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response and mark it as recently used.
+
+        :param key: Cache key from cache_key().
+        :return: The cached response, or None on a miss.
+        """
+        now = time.time()
+        row = self._conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+        with self._conn:
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                self._bump('misses')
+                return None
+            self.hits += 1
+            self._bump('hits')
+            self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        """
+        Store a response, evicting least recently used entries if over budget.
+
+        :param key: Cache key from cache_key().
+        :param value: The response to cache.
+        """
+        now = time.time()
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode('utf-8')), now, now),
+            )
+            self._evict()
+
+    def get_or_compute(self, model: str, system_prompt: str, temperature: float, text: str, compute: Callable[[], Optional[str]]) -> Optional[str]:
+        """
+        Return the cached response for a request, calling `compute` on a miss.
+
+        :param model: Model name.
+        :param system_prompt: System prompt sent with the request.
+        :param temperature: Sampling temperature.
+        :param text: The user prompt (task text).
+        :param compute: Produces the response; a None result is not cached.
+        :return: The cached or freshly computed response.
+        """
+        key = cache_key(model, system_prompt, temperature, text)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.put(key, value)
+        return value
+
+    def _bump(self, counter: str) -> None:
+        self._conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT (name) DO UPDATE SET value = value + 1",
+            (counter,),
+        )
+
+    def _evict(self) -> None:
+        """
+        Drop least recently used entries until the cache is within its limits.
+        """
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        excess = max(0, count - self.max_entries)
+        if excess:
+            self._conn.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed LIMIT ?)",
+                (excess,),
+            )
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if self.max_bytes is not None and total > self.max_bytes:
+            freed = 0
+            doomed = []
+            for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+                if total - freed <= self.max_bytes:
+                    break
+                doomed.append((key,))
+                freed += size
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return this session's hit/miss counts, the lifetime totals and the cache size.
+        """
+        totals = dict(self._conn.execute("SELECT name, value FROM counters"))
+        entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'total_hits': totals.get('hits', 0),
+            'total_misses': totals.get('misses', 0),
+            'entries': entries,
+            'bytes': size,
+        }
+
+    def close(self) -> None:
+        """
+        Close the cache database.
+        """
+        self._conn.close()
@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+import pytest
+
+from tasks4 import batch
+from tasks4.batch import FakeSummaryClient, TokenBucket, TransientSummaryError, is_transient, summarize_all
+
+
+class SlowFirstClient(FakeSummaryClient):
+    """
+    Answers earlier descriptions more slowly, so results complete out of order.
+    """
+
+    async def summarize(self, task_description: str) -> str:
+        self.latency = 0.05 / (1 + int(task_description.split()[-1]))
+        return await super().summarize(task_description)
+
+
+class BrokenClient(FakeSummaryClient):
+    """
+    Fails every call with an error that retrying cannot fix.
+    """
+
+    async def summarize(self, task_description: str) -> str:
+        self.calls += 1
+        raise ValueError("invalid API key")
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    """Record the backoff caps instead of sleeping for them."""
+    caps = []
+
+    def uniform(low, high):
+        caps.append(high)
+        return 0
+
+    monkeypatch.setattr(batch.random, "uniform", uniform)
+    return caps
+
+
+def test_concurrency_is_bounded_by_the_semaphore():
+    client = FakeSummaryClient(latency=0.01)
+    summaries = summarize_all(client, [f"task {i}" for i in range(50)], concurrency=5)
+    assert len(summaries) == 50
+    assert client.max_in_flight == 5
+
+
+def test_results_keep_input_order():
+    client = SlowFirstClient()
+    descriptions = [f"Write report {i}" for i in range(10)]
+    assert summarize_all(client, descriptions, concurrency=10) == descriptions
+
+
+def test_transient_failures_are_retried_with_exponential_backoff(no_backoff):
+    client = FakeSummaryClient(latency=0, fail_first=2)
+    assert summarize_all(client, ["Plan the launch party"], retries=3, backoff=0.5) == ["Plan the launch party"]
+    assert client.calls == 3
+    assert no_backoff == [0.5, 1.0]
+
+
+def test_retries_give_up_after_the_limit(no_backoff):
+    client = FakeSummaryClient(latency=0, fail_first=10)
+    [summary] = summarize_all(client, ["Plan the launch party"], retries=2, backoff=0.5)
+    assert summary == "[Error summarizing task: simulated rate limit]"
+    assert client.calls == 3
+    assert no_backoff == [0.5, 1.0]
+
+
+def test_other_errors_fail_without_retrying(no_backoff):
+    client = BrokenClient()
+    [summary] = summarize_all(client, ["Plan the launch party"], retries=3)
+    assert summary == "[Error summarizing task: invalid API key]"
+    assert client.calls == 1
+    assert no_backoff == []
+
+
+def test_is_transient():
+    class StatusError(Exception):
+        def __init__(self, status_code):
+            self.status_code = status_code
+
+    assert is_transient(TransientSummaryError())
+    assert is_transient(asyncio.TimeoutError())
+    assert is_transient(ConnectionResetError())
+    assert is_transient(StatusError(429)) and is_transient(StatusError(503))
+    assert not is_transient(StatusError(400)) and not is_transient(StatusError(401))
+    assert not is_transient(ValueError())
+
+
+def test_token_bucket_limits_the_rate():
+    async def take(count):
+        bucket = TokenBucket(rate=50, capacity=1)
+        start = time.monotonic()
+        for _ in range(count):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    # One token is available at once, the other five arrive 20ms apart
+    assert asyncio.run(take(6)) >= 0.09
@@ -0,0 +1,43 @@
+import asyncio
+
+from tasks4.batch import CachedSummaryClient, FakeSummaryClient
+from tasks4.cache import SummaryCache
+
+MODEL = "test-model"
+PROMPT = "Summarize."
+
+
+def test_duplicate_in_flight_requests_share_one_call(tmp_path):
+    cache = SummaryCache(str(tmp_path / "cache.db"))
+    inner = FakeSummaryClient(latency=0.02)
+    client = CachedSummaryClient(inner, cache, MODEL, PROMPT, 0.1)
+
+    async def run():
+        first = await asyncio.gather(*(client.summarize("Plan the  launch party") for _ in range(5)))
+        second = await client.summarize("Plan the launch party")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == ["Plan the launch party"] * 5
+    assert second == "Plan the launch party"
+    # Whitespace-only differences share the key; the later call is a cache hit
+    assert inner.calls == 1
+    assert cache.stats()["hits"] == 1
+    cache.close()
+
+
+def test_failed_requests_are_not_cached(tmp_path):
+    cache = SummaryCache(str(tmp_path / "cache.db"))
+    inner = FakeSummaryClient(latency=0, fail_first=1)
+    client = CachedSummaryClient(inner, cache, MODEL, PROMPT, 0.1)
+
+    async def run():
+        results = await asyncio.gather(*(client.summarize("Plan the launch party") for _ in range(3)),
+                                       return_exceptions=True)
+        return results, await client.summarize("Plan the launch party")
+
+    results, retried = asyncio.run(run())
+    assert all(isinstance(result, Exception) for result in results)
+    assert retried == "Plan the launch party"
+    assert inner.calls == 2
+    cache.close()